@@ -0,0 +1,87 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+
+
+class EmbeddingBatcher:
+    # Збирає одночасні запити протягом короткого вікна (або до max_batch штук)
+    # і ембедить їх одним викликом моделі. Кожен запит чекає свій Future.
+    def __init__(self, embed_batch, max_batch=EMBED_BATCH_SIZE, max_wait_ms=EMBED_BATCH_WAIT_MS):
+        self.embed_batch = embed_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, text) -> Future:
+        future = Future()
+        if self.max_wait <= 0 or self.max_batch <= 1:
+            # Батчинг вимкнено — рахуємо одразу в потоці запиту
+            self._run_batch([(text, future)])
+            return future
+
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text):
+        return self.submit(text).result()
+
+    def stats(self):
+        with self._lock:
+            batches, items = self.batches, self.items
+        return {
+            "batches": batches,
+            "items": items,
+            "avg_batch_size": items / batches if batches else 0.0,
+        }
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._loop, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        # Однакові тексти в пачці ембедимо один раз
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = self.embed_batch(texts)
+            if len(vectors) != len(texts):
+                raise RuntimeError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        # Без батчингу _run_batch іде з потоків запитів паралельно
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+        by_text = dict(zip(texts, vectors))
+        for text, future in batch:
+            future.set_result(by_text[text])
@@ -0,0 +1,87 @@
+import os
+import threading
+
+from cachetools import LRUCache, TTLCache
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "4096"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "4096"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "600"))
+
+
+class CountingCache:
+    # Обгортка над cachetools-кешем з лічильниками і прив'язкою до версії індексу:
+    # щойно версія змінюється, усі записи скидаються
+    def __init__(self, cache):
+        self._cache = cache
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.version = None
+
+    def get_or_compute(self, key, compute, version=None):
+        with self._lock:
+            if version != self.version:
+                self._cache.clear()
+                self.version = version
+            try:
+                value = self._cache[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                return value
+
+        value = compute()
+        with self._lock:
+            if version == self.version:
+                self._cache[key] = value
+        return value
+
+    def get_or_compute_many(self, keys, compute_many, version=None):
+        # Пакетний варіант: усі відсутні ключі рахуються одним викликом compute_many(missing),
+        # який повертає значення в тому ж порядку
+        found = {}
+        with self._lock:
+            if version != self.version:
+                self._cache.clear()
+                self.version = version
+            for key in dict.fromkeys(keys):
+                try:
+                    found[key] = self._cache[key]
+                except KeyError:
+                    continue
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            # Рахуємо кожне звернення: повтор ключа, якого не було в кеші, — теж промах
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        if missing:
+            values = compute_many(missing)
+            with self._lock:
+                if version == self.version:
+                    for key, value in zip(missing, values):
+                        self._cache[key] = value
+            found.update(zip(missing, values))
+        return [found[key] for key in keys]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+            }
+
+
+def lru_cache(maxsize=QUERY_CACHE_SIZE):
+    return CountingCache(LRUCache(maxsize=maxsize))
+
+
+def ttl_cache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL, **kwargs):
+    return CountingCache(TTLCache(maxsize=maxsize, ttl=ttl, **kwargs))
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+COLUMNS_META = "columns.json"
+
+
+def write_columns(df, directory, **attrs):
+    # Типізований колонковий формат: числові колонки — .npy як є, рядкові — словникове
+    # кодування (коди int32 у .npy + список категорій), тож усе читається через mmap
+    os.makedirs(directory, exist_ok=True)
+    columns = []
+    for name in df.columns:
+        values = df[name]
+        if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype == object:
+            values = values.astype("category")
+            np.save(os.path.join(directory, f"{name}.codes.npy"), values.cat.codes.to_numpy())
+            categories = [str(c) for c in values.cat.categories]
+            with open(os.path.join(directory, f"{name}.categories.json"), "w", encoding="utf-8") as f:
+                json.dump(categories, f, ensure_ascii=False)
+            columns.append({"name": name, "kind": "category"})
+        else:
+            np.save(os.path.join(directory, f"{name}.npy"), values.to_numpy())
+            columns.append({"name": name, "kind": "numeric"})
+
+    # Метадані пишемо останніми: їх наявність означає, що артефакт повний
+    meta_path = os.path.join(directory, COLUMNS_META)
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"rows": len(df), "columns": columns, "attrs": attrs}, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def file_hash(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def has_columns(directory):
+    return os.path.exists(os.path.join(directory, COLUMNS_META))
+
+
+def read_attrs(directory):
+    # Атрибути артефакту (порядок сортування, хеш джерела, ...) без читання колонок
+    with open(os.path.join(directory, COLUMNS_META), encoding="utf-8") as f:
+        return json.load(f).get("attrs", {})
+
+
+def read_columns(directory, mmap=True):
+    with open(os.path.join(directory, COLUMNS_META), encoding="utf-8") as f:
+        meta = json.load(f)
+    mmap_mode = "r" if mmap else None
+
+    data = {}
+    for column in meta["columns"]:
+        name = column["name"]
+        if column["kind"] == "category":
+            codes = np.load(os.path.join(directory, f"{name}.codes.npy"), mmap_mode=mmap_mode)
+            with open(os.path.join(directory, f"{name}.categories.json"), encoding="utf-8") as f:
+                categories = json.load(f)
+            data[name] = pd.Categorical.from_codes(codes, categories=categories)
+        else:
+            data[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+    df = pd.DataFrame(data, index=pd.RangeIndex(meta["rows"]), copy=False)
+    df.attrs.update(meta.get("attrs", {}))
+    return df
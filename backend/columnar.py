@@ -0,0 +1,137 @@
+import numpy as np
+
+# Словникове колонкове кодування: усі значення — в одній таблиці strings, колонки — цілі коди в ній.
+# Скалярна колонка: коди по записах (-1 — поля в записі немає).
+# Колонка-список: коди всіх значень підряд і зсуви — значення запису i це codes[offsets[i]:offsets[i + 1]].
+
+MISSING = -1
+
+
+class StringTable:
+    # Інтернування: кожне значення зберігається один раз. Ключ враховує тип, щоб 1, 1.0 і True не злились
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        key = (value.__class__, value)
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class Column:
+    def __init__(self, codes):
+        self.codes = codes
+
+    def take(self, positions):
+        return self.codes[positions]
+
+    def value(self, strings, position):
+        code = self.codes[position]
+        return strings[code] if code != MISSING else None
+
+    def present(self, position):
+        return self.codes[position] != MISSING
+
+
+class ListColumn:
+    def __init__(self, codes, offsets, missing=None):
+        self.codes = codes
+        self.offsets = offsets
+        # Записи, де поля-списку немає зовсім (на відміну від порожнього списку); None — усі мають
+        self.missing = missing
+
+    def take(self, positions):
+        starts, ends = self.offsets[positions], self.offsets[positions + 1]
+        lengths = ends - starts
+        offsets = np.zeros(len(positions) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # Індекси всіх значень вибраних записів одним масивом
+        gather = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return self.codes[gather], offsets
+
+    def value(self, strings, position):
+        return [strings[code] for code in self.codes[self.offsets[position]:self.offsets[position + 1]].tolist()]
+
+    def present(self, position):
+        return self.missing is None or not self.missing[position]
+
+
+def encode_records(records, strings=None):
+    # Записи-словники -> (таблиця значень, {поле: колонка}); порядок полів — як у першій появі
+    strings = strings if strings is not None else StringTable()
+    names = list(dict.fromkeys(name for record in records for name in record))
+    columns = {}
+    for name in names:
+        sample = next((record[name] for record in records if record.get(name) is not None), None)
+        if isinstance(sample, list):
+            codes, offsets, missing = [], [0], np.zeros(len(records), dtype=bool)
+            for i, record in enumerate(records):
+                if name not in record:
+                    missing[i] = True
+                codes.extend(strings.code(value) for value in record.get(name) or ())
+                offsets.append(len(codes))
+            columns[name] = ListColumn(
+                np.array(codes, dtype=np.int32), np.array(offsets, dtype=np.int64),
+                missing if missing.any() else None,
+            )
+        else:
+            columns[name] = Column(np.array(
+                [strings.code(record[name]) if name in record else MISSING for record in records], dtype=np.int32
+            ))
+    return strings, columns
+
+
+def decode_record(strings, columns, position):
+    return {name: column.value(strings, position) for name, column in columns.items() if column.present(position)}
+
+
+def columnar_payload(strings, columns, positions, extra=None):
+    # Відповідь format=columnar для вибраних записів: таблиця містить лише значення, що в них трапляються,
+    # коди перенумеровано під неї
+    positions = np.asarray(positions, dtype=np.int64)
+    taken = {name: column.take(positions) for name, column in columns.items()}
+    used = [value[0] if isinstance(value, tuple) else value for value in taken.values()]
+    used = np.unique(np.concatenate(used)) if used else np.empty(0, dtype=np.int64)
+    used = used[used != MISSING]
+
+    def remap(codes):
+        result = np.searchsorted(used, codes).astype(np.int64)
+        result[codes == MISSING] = MISSING
+        return result.tolist()
+
+    encoded = {}
+    for name, value in taken.items():
+        if isinstance(value, tuple):
+            codes, offsets = value
+            encoded[name] = {"codes": remap(codes), "offsets": offsets.tolist()}
+        else:
+            encoded[name] = remap(value)
+    return {
+        "format": "columnar",
+        "length": len(positions),
+        "strings": [strings[i] for i in used.tolist()],
+        "columns": encoded,
+        **(extra or {}),
+    }
+
+
+def decode_payload(payload):
+    # Зворотне перетворення (для тестів і клієнтів на Python); відсутні скалярні поля стають None
+    strings = payload["strings"]
+    records = [{} for _ in range(payload["length"])]
+    for name, column in payload["columns"].items():
+        if isinstance(column, dict):
+            offsets = column["offsets"]
+            for i, record in enumerate(records):
+                record[name] = [strings[c] for c in column["codes"][offsets[i]:offsets[i + 1]]]
+        else:
+            for record, code in zip(records, column):
+                record[name] = strings[code] if code != MISSING else None
+    return records
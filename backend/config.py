@@ -4,5 +4,10 @@ import os
 load_dotenv()
 
 GENAI_API_KEY = os.getenv("GENAI_API_KEY")
-if not GENAI_API_KEY:
-    raise ValueError("Gemini API Key is not set in the environment variables")
+
+
+def get_genai_api_key():
+    # Ключ перевіряється при використанні, а не при імпорті модуля
+    if not GENAI_API_KEY:
+        raise ValueError("Gemini API Key is not set in the environment variables")
+    return GENAI_API_KEY
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from backend.columnar import encode_records, decode_record, columnar_payload
+from backend.http_cache import dataset_version
+
+# Як часто таблиця хвороб у пам'яті перечитується з джерела (секунди)
+DISEASE_TABLE_TTL = float(os.getenv("DISEASE_TABLE_TTL", "600"))
+
+
+class DiseaseTable:
+    # Записи зберігаються колонками зі словниковим кодуванням (backend.columnar): мітки на кшталт "fever"
+    # лежать у пам'яті один раз, словники записів збираються лише для сторінки, що віддається
+    def __init__(self, records):
+        self.version = dataset_version(records)
+        self.length = len(records)
+        self.strings, self.columns = encode_records(records)
+        # Пошуковий текст готуємо один раз, а не на кожен запит
+        self.search_text = [
+            f"{record.get('name', '')} {record.get('description', '')}".lower() for record in records
+        ]
+
+    def __len__(self):
+        return self.length
+
+    def filter(self, q=None):
+        if not q:
+            return np.arange(self.length)
+        q = q.lower()
+        return np.array([i for i, text in enumerate(self.search_text) if q in text], dtype=np.int64)
+
+    def select(self, offset=0, limit=None, q=None):
+        matched = self.filter(q)
+        end = None if limit is None else offset + limit
+        return len(matched), matched[offset:end]
+
+    def projected(self, fields=None):
+        if not fields:
+            return self.columns
+        return {name: self.columns[name] for name in fields if name in self.columns}
+
+    def query(self, offset=0, limit=None, fields=None, q=None):
+        total, positions = self.select(offset, limit, q)
+        columns = self.projected(fields)
+        return total, [decode_record(self.strings.values, columns, i) for i in positions.tolist()]
+
+    def columnar(self, offset=0, limit=None, fields=None, q=None):
+        total, positions = self.select(offset, limit, q)
+        return total, columnar_payload(self.strings.values, self.projected(fields), positions)
+
+
+class DiseaseStore:
+    # Тримає останню таблицю хвороб у пам'яті і перечитує її раз на ttl секунд,
+    # тож сторінки /api/diseases не звертаються до SPARQL-кешу на кожен запит
+    def __init__(self, load, ttl=DISEASE_TABLE_TTL):
+        self.load = load
+        self.ttl = ttl
+        self.table = None
+        self.loaded_at = 0.0
+        self._lock = None
+        self._loop = None
+
+    def is_fresh(self):
+        return self.table is not None and time.monotonic() - self.loaded_at < self.ttl
+
+    async def get(self):
+        if self.is_fresh():
+            return self.table
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        async with self._lock:
+            if not self.is_fresh():
+                self.table = DiseaseTable(await self.load())
+                self.loaded_at = time.monotonic()
+        return self.table
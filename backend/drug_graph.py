@@ -0,0 +1,168 @@
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from backend.columnar import StringTable, Column, columnar_payload
+from backend.http_cache import dataset_version
+
+# Як часто граф у пам'яті перебудовується з джерела (секунди)
+DRUG_GRAPH_TTL = float(os.getenv("DRUG_GRAPH_TTL", "600"))
+# Найбільша глибина обходу для підграфа
+DRUG_GRAPH_MAX_DEPTH = int(os.getenv("DRUG_GRAPH_MAX_DEPTH", "4"))
+
+ENTITY_PREFIX = "http://www.wikidata.org/entity/"
+DISEASE_COLOR = "FFA500"
+
+
+def short_id(uri):
+    return uri[len(ENTITY_PREFIX):] if uri.startswith(ENTITY_PREFIX) else uri
+
+
+class DrugGraph:
+    # Вузли інтерновані в цілі індекси, ребра хвороба—препарат зберігаються як
+    # неорієнтована суміжність у форматі CSR: сусіди вузла i — indices[indptr[i]:indptr[i + 1]]
+    def __init__(self, rows):
+        self.version = dataset_version(rows)
+        self.position = {}
+        self.ids = []
+        self.labels = []
+        kinds = []
+        sources, targets = [], []
+
+        def intern(uri, label=None, color=None):
+            node = self.position.get(uri)
+            if node is None:
+                node = len(self.ids)
+                self.position[uri] = node
+                self.ids.append(short_id(uri))
+                self.labels.append(label)
+                kinds.append(color == DISEASE_COLOR)
+            elif label is not None and self.labels[node] is None:
+                self.labels[node] = label
+                kinds[node] = color == DISEASE_COLOR
+            return node
+
+        for row in rows:
+            node = intern(row["item"], row["label"], row["color"])
+            if row["link"]:
+                sources.append(intern(row["link"]))
+                targets.append(node)
+
+        self.labels = [label if label is not None else node_id for label, node_id in zip(self.labels, self.ids)]
+        self.is_disease = np.array(kinds, dtype=bool)
+
+        # Ті самі вузли колонками зі словниковим кодуванням — для format=columnar
+        self.strings = StringTable()
+        disease, drug = self.strings.code("disease"), self.strings.code("drug")
+        self.columns = {
+            "id": Column(np.array([self.strings.code(v) for v in self.ids], dtype=np.int32)),
+            "label": Column(np.array([self.strings.code(v) for v in self.labels], dtype=np.int32)),
+            "type": Column(np.where(self.is_disease, disease, drug).astype(np.int32)),
+        }
+
+        n = len(self.ids)
+        edges = np.unique(np.array(sources, dtype=np.int64) * n + np.array(targets, dtype=np.int64))
+        self.edge_sources = (edges // n).astype(np.int32) if n else np.empty(0, dtype=np.int32)
+        self.edge_targets = (edges % n).astype(np.int32) if n else np.empty(0, dtype=np.int32)
+
+        heads = np.concatenate([self.edge_sources, self.edge_targets])
+        tails = np.concatenate([self.edge_targets, self.edge_sources])
+        order = np.lexsort((tails, heads))
+        self.indices = tails[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(heads, minlength=n), out=self.indptr[1:])
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def edge_count(self):
+        return len(self.edge_sources)
+
+    def node(self, node_id):
+        # Вузол можна задати як QID (Q12136) або повним URI сутності
+        return self.position.get(node_id if node_id.startswith(ENTITY_PREFIX) else ENTITY_PREFIX + node_id)
+
+    def neighbours(self, node):
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def reachable(self, node, depth):
+        # BFS по CSR пошарово: кожен рівень — одна векторизована операція над фронтом
+        visited = np.zeros(len(self.ids), dtype=bool)
+        visited[node] = True
+        frontier = np.array([node], dtype=np.int64)
+        for _ in range(depth):
+            if not len(frontier):
+                break
+            starts, ends = self.indptr[frontier], self.indptr[frontier + 1]
+            lengths = ends - starts
+            offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            reached = np.unique(self.indices[offsets])
+            frontier = reached[~visited[reached]]
+            visited[frontier] = True
+        return np.flatnonzero(visited)
+
+    def edges(self, nodes=None):
+        # Плаский масив пар індексів у списку nodes (усі вузли, якщо None)
+        if nodes is None:
+            sources, targets = self.edge_sources, self.edge_targets
+        else:
+            remap = np.full(len(self.ids), -1, dtype=np.int64)
+            remap[nodes] = np.arange(len(nodes))
+            mask = (remap[self.edge_sources] >= 0) & (remap[self.edge_targets] >= 0)
+            sources, targets = remap[self.edge_sources[mask]], remap[self.edge_targets[mask]]
+        return np.stack([sources, targets], axis=1).ravel().tolist()
+
+    def payload(self, nodes=None):
+        # Компактний формат: вузли один раз, ребра — плаский масив пар індексів у списку nodes
+        edges = self.edges(nodes)
+        if nodes is None:
+            nodes = np.arange(len(self.ids))
+        return {
+            "nodes": [
+                {"id": self.ids[i], "label": self.labels[i], "type": "disease" if self.is_disease[i] else "drug"}
+                for i in nodes.tolist()
+            ],
+            "edges": edges,
+        }
+
+    def columnar(self, nodes=None):
+        # Вузли колонками кодів у спільну таблицю рядків, ребра — як у компактному форматі
+        edges = self.edges(nodes)
+        if nodes is None:
+            nodes = np.arange(len(self.ids))
+        return columnar_payload(self.strings.values, self.columns, nodes, extra={"edges": edges})
+
+    def subgraph(self, node, depth, format="compact"):
+        nodes = self.reachable(node, depth)
+        return self.columnar(nodes) if format == "columnar" else self.payload(nodes)
+
+
+class DrugGraphStore:
+    # Граф будується один раз з рядків SPARQL і тримається в пам'яті ttl секунд
+    def __init__(self, load, ttl=DRUG_GRAPH_TTL):
+        self.load = load
+        self.ttl = ttl
+        self.graph = None
+        self.loaded_at = 0.0
+        self._lock = None
+        self._loop = None
+
+    def is_fresh(self):
+        return self.graph is not None and time.monotonic() - self.loaded_at < self.ttl
+
+    async def get(self):
+        if self.is_fresh():
+            return self.graph
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        async with self._lock:
+            if not self.is_fresh():
+                rows = await self.load()
+                self.graph = await asyncio.to_thread(DrugGraph, rows)
+                self.loaded_at = time.monotonic()
+        return self.graph
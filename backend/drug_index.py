@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+
+SORT_KEYS = ['medical_condition', 'rating']
+
+
+def sort_drugs(drugs_df):
+    return drugs_df.sort_values(by=SORT_KEYS, ascending=[True, False], kind='stable', ignore_index=True)
+
+
+def take(values, key):
+    values = values[key]
+    return np.asarray(values) if isinstance(values, pd.Categorical) else values
+
+
+class DrugIndex:
+    # Індекс "стан -> препарати": колонки зберігаються як numpy-масиви, відсортовані
+    # за станом і рейтингом (за спаданням), тож препарати стану — це зріз [start:end]
+    __slots__ = ("columns", "offsets")
+
+    def __init__(self, columns, offsets):
+        self.columns = columns
+        self.offsets = offsets
+
+    @classmethod
+    def from_frame(cls, drugs_df):
+        if drugs_df.attrs.get('sorted_by') != SORT_KEYS:
+            drugs_df = sort_drugs(drugs_df)
+        # Категоріальні колонки лишаються кодами (для артефакту з create_dataset — це mmap-файли,
+        # спільні для всіх воркерів), решта — numpy-масиви без копіювання
+        columns = {
+            name: drugs_df[name].array if isinstance(drugs_df[name].dtype, pd.CategoricalDtype)
+            else drugs_df[name].to_numpy()
+            for name in drugs_df.columns
+        }
+
+        conditions = columns['medical_condition']
+        keys = conditions.codes if isinstance(conditions, pd.Categorical) else conditions
+        offsets = {}
+        if len(keys):
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            ends = np.r_[starts[1:], len(keys)]
+            offsets = {conditions[s]: (int(s), int(e)) for s, e in zip(starts, ends)}
+        return cls(columns, offsets)
+
+    def __len__(self):
+        return len(self.columns.get('medical_condition', ()))
+
+    def lookup(self, conditions):
+        slices = [self.offsets[c] for c in conditions if c in self.offsets]
+        if not slices:
+            return {name: take(values, slice(0, 0)) for name, values in self.columns.items()}
+
+        if len(slices) == 1:
+            start, end = slices[0]
+            return {name: take(values, slice(start, end)) for name, values in self.columns.items()}
+
+        positions = np.concatenate([np.arange(start, end) for start, end in slices])
+        # Кожен зріз уже відсортований; об'єднуємо за рейтингом
+        order = np.argsort(-self.columns['rating'][positions].astype(float), kind='stable')
+        positions = positions[order]
+        return {name: take(values, positions) for name, values in self.columns.items()}
+
+    def lookup_frame(self, conditions):
+        return pd.DataFrame(self.lookup(conditions))
@@ -0,0 +1,150 @@
+import asyncio
+import math
+import os
+import time
+
+import numpy as np
+from cachetools import LRUCache, TTLCache
+
+from backend.http_cache import dataset_version
+
+# Як часто дані країни перечитуються з джерела (секунди)
+HOSPITAL_TABLE_TTL = float(os.getenv("HOSPITAL_TABLE_TTL", "600"))
+# Скільки країн тримати в пам'яті одночасно; найдавніше використані витісняються
+HOSPITAL_MAX_COUNTRIES = int(os.getenv("HOSPITAL_MAX_COUNTRIES", "32"))
+# Розмір клітинки просторової сітки в градусах
+HOSPITAL_GRID_CELL = float(os.getenv("HOSPITAL_GRID_CELL", "0.5"))
+# Нижче цього масштабу карти маркери об'єднуються в кластери
+HOSPITAL_CLUSTER_ZOOM = int(os.getenv("HOSPITAL_CLUSTER_ZOOM", "10"))
+# Скільки клітинок-кластерів припадає на ширину тайла
+CLUSTER_CELLS_PER_TILE = 4
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat, lon, lats, lons):
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class HospitalIndex:
+    # Рівномірна сітка lat/lon: клітинка -> масив індексів лікарень у ній.
+    # Запити за прямокутником і радіусом перевіряють лише клітинки, що перетинаються.
+    def __init__(self, hospitals, cell=HOSPITAL_GRID_CELL):
+        self.hospitals = hospitals
+        self.cell = cell
+        self.version = dataset_version(hospitals)
+
+        located = [
+            i for i, h in enumerate(hospitals)
+            if isinstance(h.get("latitude"), (int, float)) and isinstance(h.get("longitude"), (int, float))
+        ]
+        self.ids = np.array(located, dtype=np.int64)
+        self.lats = np.array([hospitals[i]["latitude"] for i in located], dtype=np.float64)
+        self.lons = np.array([hospitals[i]["longitude"] for i in located], dtype=np.float64)
+
+        rows = np.floor(self.lats / cell).astype(np.int64)
+        cols = np.floor(self.lons / cell).astype(np.int64)
+        self.cells = {}
+        if len(located):
+            order = np.lexsort((cols, rows))
+            keys = np.stack([rows[order], cols[order]], axis=1)
+            starts = np.flatnonzero(np.r_[True, np.any(keys[1:] != keys[:-1], axis=1)])
+            ends = np.r_[starts[1:], len(order)]
+            for s, e in zip(starts, ends):
+                self.cells[(int(keys[s, 0]), int(keys[s, 1]))] = order[s:e]
+
+    def __len__(self):
+        return len(self.hospitals)
+
+    def _candidates(self, min_lat, min_lon, max_lat, max_lon):
+        row_range = range(math.floor(min_lat / self.cell), math.floor(max_lat / self.cell) + 1)
+        col_range = range(math.floor(min_lon / self.cell), math.floor(max_lon / self.cell) + 1)
+        if len(row_range) * len(col_range) > len(self.cells):
+            # Прямокутник більший за заповнену частину сітки — простіше взяти всі точки
+            return np.arange(len(self.ids))
+        parts = [self.cells[(r, c)] for r in row_range for c in col_range if (r, c) in self.cells]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def in_bbox(self, min_lon, min_lat, max_lon, max_lat):
+        candidates = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        lats, lons = self.lats[candidates], self.lons[candidates]
+        mask = (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+        return np.sort(candidates[mask])
+
+    def nearest(self, lat, lon, radius_km, k=None):
+        dlat = radius_km / 111.0
+        dlon = radius_km / (111.0 * max(math.cos(math.radians(lat)), 1e-6))
+        candidates = self._candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+        distances = haversine_km(lat, lon, self.lats[candidates], self.lons[candidates])
+        mask = distances <= radius_km
+        candidates, distances = candidates[mask], distances[mask]
+
+        order = np.argsort(distances, kind="stable")
+        if k is not None:
+            order = order[:k]
+        return candidates[order], distances[order]
+
+    def records(self, positions, distances=None):
+        result = [self.hospitals[i] for i in self.ids[positions]]
+        if distances is not None:
+            result = [dict(h, distance_km=round(float(d), 3)) for h, d in zip(result, distances)]
+        return result
+
+    def cluster(self, positions, zoom):
+        # Кластеризація по сітці, розмір клітинки залежить від масштабу карти
+        cell = 360.0 / (2 ** zoom * CLUSTER_CELLS_PER_TILE)
+        lats, lons = self.lats[positions], self.lons[positions]
+        keys = np.floor(lats / cell).astype(np.int64) * (1 << 32) + np.floor(lons / cell).astype(np.int64)
+        unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        mean_lats = np.bincount(inverse, weights=lats, minlength=len(unique)) / counts
+        mean_lons = np.bincount(inverse, weights=lons, minlength=len(unique)) / counts
+
+        markers = []
+        first = {}
+        for position, group in zip(positions, inverse):
+            first.setdefault(group, position)
+        for group in range(len(unique)):
+            if counts[group] == 1:
+                markers.append(self.hospitals[self.ids[first[group]]])
+            else:
+                markers.append({
+                    "cluster": True,
+                    "count": int(counts[group]),
+                    "latitude": float(mean_lats[group]),
+                    "longitude": float(mean_lons[group]),
+                })
+        return markers
+
+
+class HospitalStore:
+    # Повні дані по країнах з просторовим індексом; кожна країна перечитується раз на ttl.
+    # Індекси й блокування обмежені max_countries, тож пам'ять не росте з кількістю різних країн
+    def __init__(self, load, ttl=HOSPITAL_TABLE_TTL, max_countries=HOSPITAL_MAX_COUNTRIES):
+        self.load = load
+        self.ttl = ttl
+        self.max_countries = max_countries
+        self.indexes = TTLCache(maxsize=max_countries, ttl=ttl, timer=time.monotonic)
+        self._locks = LRUCache(maxsize=max_countries)
+        self._loop = None
+
+    async def get(self, country):
+        index = self.indexes.get(country)
+        if index is not None:
+            return index
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._locks = LRUCache(maxsize=self.max_countries)
+            self._loop = loop
+        # Витіснене під час завантаження блокування означає хіба що повторне завантаження країни
+        lock = self._locks.get(country)
+        if lock is None:
+            lock = self._locks[country] = asyncio.Lock()
+        async with lock:
+            index = self.indexes.get(country)
+            if index is None:
+                index = HospitalIndex(await self.load(country))
+                self.indexes[country] = index
+        return index
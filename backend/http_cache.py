@@ -0,0 +1,140 @@
+import asyncio
+import gzip
+import hashlib
+import os
+import threading
+from urllib.parse import urlencode
+
+import orjson
+from cachetools import LRUCache
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Скільки секунд браузер може брати відповідь зі свого кешу, не перепитуючи сервер
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "300"))
+# Загальний розмір закодованих і стиснутих тіл у пам'яті
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Менші тіла не стискаємо — заголовки й CPU дорожчі за виграш
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dataset_version(content):
+    # Хеш вмісту набору даних: однакові дані після перезавантаження дають ту саму версію і той самий ETag
+    data = content if isinstance(content, bytes) else orjson.dumps(content, option=JSON_OPTIONS)
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def make_etag(version, params):
+    # Тіло однозначно визначається версією даних і параметрами запиту, тож ETag рахується без тіла.
+    # Слабкий, бо те саме тіло віддається в різних Content-Encoding
+    # urlencode екранує & і = у значеннях, тож різні набори параметрів не збігаються в один рядок
+    query = urlencode(sorted(params))
+    return f'W/"{version}-{hashlib.blake2b(query.encode("utf-8"), digest_size=6).hexdigest()}"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Слабке порівняння (RFC 9110): префікс W/ не враховується
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def choose_encoding(accept_encoding):
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return "identity"
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class ResponseCache:
+    # Закодовані в JSON і стиснуті тіла відповідей за ETag (версія даних + параметри).
+    # Кожне кодування стискається один раз на версію, при першому запиті з ним;
+    # записи старих версій витісняються за LRU
+    def __init__(self, max_bytes=HTTP_CACHE_MAX_BYTES, max_age=HTTP_CACHE_MAX_AGE):
+        self.max_age = max_age
+        self._cache = LRUCache(maxsize=max_bytes, getsizeof=lambda entry: len(entry[0]))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "size": len(self._cache),
+                "bytes": self._cache.currsize,
+            }
+
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def put(self, key, entry):
+        with self._lock:
+            if len(entry[0]) <= self._cache.maxsize:
+                self._cache[key] = entry
+
+    async def respond(self, request, version, build, media_type="application/json"):
+        # build() -> (вміст або готові байти JSON, додаткові заголовки); викликається лише при промаху
+        etag = make_etag(version, request.query_params.multi_items())
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={self.max_age}", "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+        entry = self.get((etag, encoding))
+        if entry is None:
+            identity = self.get((etag, "identity"))
+            if identity is None:
+                self.misses += 1
+                content, extra_headers = await build()
+                body = content if isinstance(content, bytes) else orjson.dumps(content, option=JSON_OPTIONS)
+                identity = (body, extra_headers)
+                self.put((etag, "identity"), identity)
+            else:
+                self.hits += 1
+            if encoding != "identity" and len(identity[0]) >= COMPRESS_MIN_BYTES:
+                entry = (await asyncio.to_thread(compress, identity[0], encoding), identity[1])
+                self.put((etag, encoding), entry)
+            else:
+                encoding, entry = "identity", identity
+        else:
+            self.hits += 1
+
+        headers.update(entry[1])
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(entry[0], media_type=media_type, headers=headers)
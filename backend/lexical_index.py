@@ -0,0 +1,109 @@
+import bisect
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# Слова з назви стану важать більше за слова з опису
+NAME_BOOST = 2
+# Коротші запити не вважаємо префіксом назви — надто багато збігів
+MIN_PREFIX = 3
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def normalize_name(text):
+    return " ".join(tokenize(text))
+
+
+def split_document(text):
+    # Рядок корпусу: "<стан> Info: <опис>"
+    name, _, description = text.partition(" Info:")
+    return name.strip(), description.strip()
+
+
+class LexicalIndex:
+    # Інвертований індекс з BM25 по назвах станів і описах того ж корпусу, що й векторна база.
+    # Ваги BM25 рахуються при побудові, тож запит — це лише сума постінгів його слів.
+    def __init__(self, texts, k1=BM25_K1, b=BM25_B):
+        self.texts = list(texts)
+        self.names = []
+        lengths = []
+        postings = {}
+        for position, text in enumerate(self.texts):
+            name, description = split_document(text)
+            self.names.append(name)
+            tokens = tokenize(name) * NAME_BOOST + tokenize(description)
+            lengths.append(len(tokens))
+            for token, tf in Counter(tokens).items():
+                postings.setdefault(token, ([], []))
+                postings[token][0].append(position)
+                postings[token][1].append(tf)
+
+        lengths = np.array(lengths, dtype=np.float32)
+        avgdl = float(lengths.mean()) if len(lengths) else 0.0
+        n = len(self.texts)
+        self.postings = {}
+        for token, (positions, tfs) in postings.items():
+            positions = np.array(positions, dtype=np.int32)
+            tfs = np.array(tfs, dtype=np.float32)
+            idf = np.log(1 + (n - len(positions) + 0.5) / (len(positions) + 0.5))
+            norm = tfs + k1 * (1 - b + b * lengths[positions] / avgdl)
+            self.postings[token] = (positions, (idf * tfs * (k1 + 1) / norm).astype(np.float32))
+
+        # Нормалізовані назви, відсортовані для префіксного пошуку через bisect
+        by_name = {}
+        for name in self.names:
+            by_name.setdefault(normalize_name(name), name)
+        self.sorted_names = sorted(by_name)
+        self.by_name = by_name
+
+    def __len__(self):
+        return len(self.texts)
+
+    def match_names(self, query, limit=None):
+        # Точна назва стану або (для запитів від MIN_PREFIX символів) назви, що з неї починаються
+        key = normalize_name(query)
+        if not key:
+            return []
+        if key in self.by_name:
+            return [self.by_name[key]]
+        if len(key) < MIN_PREFIX:
+            return []
+        start = bisect.bisect_left(self.sorted_names, key)
+        matches = []
+        for name in self.sorted_names[start:]:
+            if not name.startswith(key) or (limit is not None and len(matches) >= limit):
+                break
+            matches.append(self.by_name[name])
+        return matches
+
+    def scores(self, query):
+        scores = np.zeros(len(self.texts), dtype=np.float32)
+        for token in tokenize(query):
+            if token in self.postings:
+                positions, weights = self.postings[token]
+                scores[positions] += weights
+        return scores
+
+    def search(self, query, k):
+        scores = self.scores(query)
+        matched = np.flatnonzero(scores > 0)
+        order = np.argsort(-scores[matched], kind="stable")[:k]
+        return [self.texts[i] for i in matched[order]]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    # RRF: кожен список додає 1 / (k + ранг); порядок рівних — за першою появою
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda item: -scores[item])
@@ -1,47 +1,297 @@
-from langchain_community.document_loaders import TextLoader
-from langchain_text_splitters import CharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
+import itertools
+import os
+import threading
+from dataclasses import dataclass
+
 import pandas as pd
 
-from backend.scripts.create_dataset import drugs_df
+from backend.scripts.create_dataset import create_dataset, get_drugs_df
+from backend.cache import lru_cache, ttl_cache
+from backend.batching import EmbeddingBatcher
+from backend.lexical_index import LexicalIndex, reciprocal_rank_fusion, split_document
+from backend.metrics import timed
+
+# Скільки кандидатів з кожного списку (BM25 і векторного) бере злиття RRF
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Пакетний пошук: скільки повідомлень ембедиться і шукається за один прохід
+CHAT_BATCH_SIZE = int(os.getenv("CHAT_BATCH_SIZE", "64"))
 
 
 def initialize_db():
-    raw_documents = TextLoader("illness_description.txt").load()  # Загружаем документы
-    text_splitter = CharacterTextSplitter(chunk_size=0, chunk_overlap=0, separator="\n")
-    documents = text_splitter.split_documents(raw_documents)
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-
-    db_drugs = Chroma.from_documents(
-        documents,
-        embedding=embeddings
-    )
-    return db_drugs
+    # Відкриваємо збережений індекс; перебудова лише якщо змінився файл або модель.
+    # Пошук іде через обраний бекенд (RETRIEVER_BACKEND=chroma|numpy).
+    # langchain і модель ембедінгів імпортуються лише тут, а не при імпорті застосунку
+    from backend.vector_store import open_index, input_file, embedding_model
+    from backend.retriever import open_retriever, numpy_index_current, NumpyRetriever, RETRIEVER_BACKEND, RETRIEVER_QUANTIZE
+
+    if not os.path.exists(input_file):
+        create_dataset()
+    if RETRIEVER_BACKEND == "numpy" and numpy_index_current():
+        # Актуальний експорт уже є — Chroma не відкриваємо, вектори лише відображаються в пам'ять
+        return NumpyRetriever.load(embedding_model(), quantize=RETRIEVER_QUANTIZE)
+    return open_retriever(open_index())
+
+
+def index_version():
+    from backend.vector_store import read_meta
+
+    return read_meta().get("version")
+
+
+def initialize_drug_index():
+    # Препарати за станом, відсортовані за рейтингом — будуються один раз з колонкового артефакту
+    from backend.drug_index import DrugIndex
+
+    return DrugIndex.from_frame(get_drugs_df())
 
 
+def initialize_lexical_index():
+    # Той самий корпус, що й у векторній базі: один рядок — один документ
+    from backend.vector_store import input_file
+
+    if not os.path.exists(input_file):
+        create_dataset()
+    with open(input_file, encoding="utf-8") as f:
+        return LexicalIndex(line.strip() for line in f if line.strip())
+
+
+# Важкі ресурси створюються при першому зверненні або в lifespan застосунку
+drug_index = None
 db_drugs = None
-if db_drugs is None:
-    db_drugs = initialize_db()
+db_version = None
+lexical_index = None
+_init_lock = threading.Lock()
 
 
-def get_illness_and_drugs(query: str, top_k: int = 5, get_drugs: bool = False) -> pd.DataFrame:
+def get_drug_index():
+    global drug_index
+    if drug_index is None:
+        with _init_lock:
+            if drug_index is None:
+                drug_index = initialize_drug_index()
+    return drug_index
+
+
+def get_db():
+    global db_drugs, db_version
+    if db_drugs is None:
+        with _init_lock:
+            if db_drugs is None:
+                db = initialize_db()
+                db_version = index_version()
+                db_drugs = db
+    return db_drugs
+
+
+def get_db_version():
+    # Версія відома лише після відкриття індексу; ключі кешів без неї потрапили б під версію None
+    get_db()
+    return db_version
+
+
+def get_lexical_index():
+    global lexical_index
+    if lexical_index is None:
+        with _init_lock:
+            if lexical_index is None:
+                lexical_index = initialize_lexical_index()
+    return lexical_index
+
+
+def load_resources():
+    get_drug_index()
+    get_lexical_index()
+    get_db()
+
+
+def resources_status():
+    return {
+        "drug_index": drug_index is not None,
+        "lexical_index": lexical_index is not None,
+        "vector_db": db_drugs is not None,
+    }
+
+
+def is_ready():
+    return all(resources_status().values())
+
+
+# Кеш ембедінгів запитів і кеш знайдених станів; обидва прив'язані до версії відкритого індексу
+embedding_cache = lru_cache()
+result_cache = ttl_cache()
+
+# Скільки запитів закрито точною/префіксною назвою, а скільки пройшло гібридний пошук
+retrieval_stats = {"name_match": 0, "hybrid": 0}
+# Лічильники оновлюються з потоків пулу, тож лише під замком (окремим від _init_lock, який тримається під час завантаження)
+_stats_lock = threading.Lock()
+
+
+def count_retrieval(path, amount):
+    with _stats_lock:
+        retrieval_stats[path] += amount
+
+
+# Одночасні запити ембедяться однією пачкою
+def embed_batch(texts):
+    with timed("chat.embed"):
+        return get_db().embeddings.embed_documents(texts)
+
+
+embedding_batcher = EmbeddingBatcher(embed_batch)
+
+
+def retrieval_counts():
+    with _stats_lock:
+        return dict(retrieval_stats)
+
+
+def cache_stats():
+    return {
+        "embeddings": embedding_cache.stats(),
+        "results": result_cache.stats(),
+        "batching": embedding_batcher.stats(),
+        "retrieval": retrieval_counts(),
+    }
 
-    docs = db_drugs.similarity_search(query, k=top_k)
-    found_conditions = set(doc.page_content.split(" Info:")[0].strip() for doc in docs)
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def embed_query(query: str):
+    return embedding_cache.get_or_compute(query, lambda: embedding_batcher.embed(query), get_db_version())
+
+
+def find_conditions(query: str, top_k: int, get_drugs: bool) -> tuple:
+    return find_conditions_many([query], top_k, get_drugs)[0]
+
+
+def match_condition_names(queries, top_k):
+    # Запит — це назва стану або її початок: відповідаємо з індексу, модель не потрібна
+    lexical = get_lexical_index()
+    matched = {}
+    with timed("chat.name_match"):
+        for query in queries:
+            names = lexical.match_names(query, limit=top_k)
+            if names:
+                matched[query] = tuple(sorted(names))
+    count_retrieval("name_match", len(matched))
+    return matched
+
+
+def dense_search_many(vectors, k):
+    db = get_db()
+    with timed("chat.vector_search"):
+        if len(vectors) > 1 and hasattr(db, "similarity_search_by_vectors"):
+            # Numpy-бекенд: одне множення матриць і построчний top-k на всю пачку
+            results = db.similarity_search_by_vectors(vectors, k=k)
+        else:
+            results = [db.similarity_search_by_vector(vector, k=k) for vector in vectors]
+    return [[doc.page_content for doc in docs] for docs in results]
+
+
+def fuse_conditions(query, dense, top_k, get_drugs):
+    lexical = get_lexical_index()
+    with timed("chat.lexical_search"):
+        sparse = lexical.search(query, max(top_k, HYBRID_CANDIDATES))
+    with timed("chat.fusion"):
+        texts = reciprocal_rank_fusion([dense, sparse], k=RRF_K)[:top_k]
+    found_conditions = set(split_document(text)[0] for text in texts)
 
     if not get_drugs:
-        unique_conditions = sorted(list(found_conditions))
-        return pd.DataFrame({'medical_condition': unique_conditions})
+        return tuple(sorted(found_conditions))
 
     query_conditions = [cond for cond in found_conditions if
-                        cond.lower() in query.lower() or query.lower() in cond.lower()]
-
-    if query_conditions:
-        recommendations = drugs_df[drugs_df['medical_condition'].isin(query_conditions)]
-        recommendations = recommendations.sort_values(by='rating', ascending=False)
-        return recommendations
-    else:
-        recommendations = drugs_df[drugs_df['medical_condition'].isin(found_conditions)]
-        recommendations = recommendations.sort_values(by='rating', ascending=False)
-        return recommendations
+                        cond.lower() in query or query in cond.lower()]
+    return tuple(query_conditions or found_conditions)
+
+
+def find_conditions_many(queries, top_k: int, get_drugs: bool) -> list[tuple]:
+    found = match_condition_names(queries, top_k)
+    pending = [query for query in dict.fromkeys(queries) if query not in found]
+    if pending:
+        count_retrieval("hybrid", len(pending))
+        if len(pending) == 1:
+            # Одиночний запит іде через батчер, щоб зливатися з одночасними запитами інших користувачів
+            vectors = [embed_query(pending[0])]
+        else:
+            vectors = embedding_cache.get_or_compute_many(pending, embed_batch, get_db_version())
+        dense = dense_search_many(vectors, max(top_k, HYBRID_CANDIDATES))
+        for query, texts in zip(pending, dense):
+            found[query] = fuse_conditions(query, texts, top_k, get_drugs)
+    return [found[query] for query in queries]
+
+
+@dataclass(slots=True)
+class Advice:
+    # Відповідь порадника: знайдені стани і, якщо просили, таблиця препаратів по колонках
+    # (назва колонки -> список значень), готова до JSON без pandas
+    conditions: list[str]
+    drugs: dict[str, list] | None = None
+
+
+def find_cached_conditions(query: str, top_k: int, get_drugs: bool) -> tuple:
+    query = normalize_query(query)
+    return result_cache.get_or_compute(
+        (query, top_k, get_drugs),
+        lambda: find_conditions(query, top_k, get_drugs),
+        get_db_version()
+    )
+
+
+def find_cached_conditions_many(queries, top_k: int, get_drugs: bool) -> list[tuple]:
+    keys = [(normalize_query(query), top_k, get_drugs) for query in queries]
+    return result_cache.get_or_compute_many(
+        keys,
+        lambda missing: find_conditions_many([key[0] for key in missing], top_k, get_drugs),
+        get_db_version()
+    )
+
+
+def chunks(items, size):
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def make_advice(conditions, get_drugs):
+    if not get_drugs:
+        return Advice(conditions=list(conditions))
+
+    with timed("chat.drug_lookup"):
+        columns = get_drug_index().lookup(conditions)
+    return Advice(
+        conditions=list(conditions),
+        drugs={name: values.tolist() for name, values in columns.items()},
+    )
+
+
+def advise(query: str, top_k: int = 5, get_drugs: bool = False) -> Advice:
+    return make_advice(find_cached_conditions(query, top_k, get_drugs), get_drugs)
+
+
+def advise_many(queries, top_k: int = 5, get_drugs: bool = False):
+    # Генератор відповідей у порядку запитів; повідомлення обробляються пачками по CHAT_BATCH_SIZE,
+    # тож у пам'яті одночасно лише одна пачка
+    for chunk in chunks(queries, CHAT_BATCH_SIZE):
+        for conditions in find_cached_conditions_many(chunk, top_k, get_drugs):
+            yield make_advice(conditions, get_drugs)
+
+
+def get_illness_and_drugs(query: str, top_k: int = 5, get_drugs: bool = False) -> pd.DataFrame:
+    return conditions_frame(find_cached_conditions(query, top_k, get_drugs), get_drugs)
+
+
+def get_illness_and_drugs_batch(queries, top_k: int = 5, get_drugs: bool = False):
+    # Те саме для списку повідомлень: генератор таблиць у порядку запитів
+    for chunk in chunks(queries, CHAT_BATCH_SIZE):
+        for conditions in find_cached_conditions_many(chunk, top_k, get_drugs):
+            yield conditions_frame(conditions, get_drugs)
+
+
+def conditions_frame(conditions, get_drugs):
+    if not get_drugs:
+        return pd.DataFrame({'medical_condition': list(conditions)})
+
+    return get_drug_index().lookup_frame(conditions)
@@ -0,0 +1,92 @@
+import json
+import os
+import sqlite3
+import threading
+
+# Якщо шлях задано і в сховищі є дані, API читає їх звідси, а не з WDQS.
+# Скрипт ingest_wikidata пише за цим самим шляхом, тож обидва бачать одне сховище
+LOCAL_STORE_PATH = os.getenv("LOCAL_STORE_PATH")
+
+
+class LocalStore:
+    # Локальна копія підмножин Wikidata: один рядок — одна сутність (хвороба, лікарня, вузол графа),
+    # згрупована за набором даних і ключем (наприклад, країною для лікарень)
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entities (
+                    dataset TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    record TEXT NOT NULL,
+                    PRIMARY KEY (dataset, key, id)
+                );
+                CREATE TABLE IF NOT EXISTS ingest_runs (
+                    dataset TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    started_at TEXT NOT NULL,
+                    full_started_at TEXT,
+                    PRIMARY KEY (dataset, key)
+                );
+            """)
+        return self._conn
+
+    def upsert(self, dataset, items, key="", replace=False):
+        # items — пари (id сутності, запис)
+        rows = [(dataset, key, entity_id, json.dumps(record, ensure_ascii=False)) for entity_id, record in items]
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                if replace:
+                    conn.execute("DELETE FROM entities WHERE dataset = ? AND key = ?", (dataset, key))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO entities (dataset, key, id, record) VALUES (?, ?, ?, ?)", rows
+                )
+        return len(rows)
+
+    def load(self, dataset, key=""):
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT record FROM entities WHERE dataset = ? AND key = ? ORDER BY rowid", (dataset, key)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def has(self, dataset, key=""):
+        return self.last_run(dataset, key) is not None
+
+    def count(self, dataset, key=""):
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM entities WHERE dataset = ? AND key = ?", (dataset, key)
+            ).fetchone()[0]
+
+    def last_run(self, dataset, key="", full=False):
+        column = "full_started_at" if full else "started_at"
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT {column} FROM ingest_runs WHERE dataset = ? AND key = ?", (dataset, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def finish_run(self, dataset, started_at, key="", full=False):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT INTO ingest_runs (dataset, key, started_at, full_started_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (dataset, key) DO UPDATE SET started_at = excluded.started_at, "
+                    "full_started_at = COALESCE(excluded.full_started_at, ingest_runs.full_started_at)",
+                    (dataset, key, started_at, started_at if full else None)
+                )
+
+
+local_store = LocalStore(LOCAL_STORE_PATH) if LOCAL_STORE_PATH else None
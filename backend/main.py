@@ -1,11 +1,74 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import os
+import re
+from contextlib import asynccontextmanager
+
+import orjson
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from backend import sparql_queries
+from backend.sparql_queries import (
+    get_diseases_from_wikidata, get_hospitals_from_wikidata, get_drug_illness_graph, get_drug_illness_graph_version,
+)
+from backend.sparql_client import client as sparql_client, background_priority, SparqlOverloaded
+from backend.disease_store import DiseaseStore
+from backend.hospital_store import HospitalStore, HOSPITAL_CLUSTER_ZOOM
+from backend.drug_graph import DrugGraphStore, DRUG_GRAPH_MAX_DEPTH
+from backend.llm_adviser import advise, advise_many, load_resources, resources_status, is_ready, cache_stats
+from backend.http_cache import ResponseCache
+from backend.metrics import registry, timed, cache_metrics, Counter, Gauge, MetricsMiddleware
+
+# Чи завантажувати модель, індекси й таблиці у фоні одразу після старту
+PRELOAD_RESOURCES = os.getenv("PRELOAD_RESOURCES", "1") == "1"
+# Найбільша кількість повідомлень в одному запиті /api/chat/batch
+CHAT_BATCH_MAX_MESSAGES = int(os.getenv("CHAT_BATCH_MAX_MESSAGES", "10000"))
+
+# Ідентифікатор країни у Wikidata; підставляється в SPARQL, тож інші значення не пропускаємо
+COUNTRY_ID = re.compile(r"Q[0-9]+")
+
+
+logger = logging.getLogger(__name__)
+
+# Помилки фонового передзавантаження: пишуться в лог і показуються в /readyz
+preload_errors = {}
+
+
+def preload_finished(name):
+    def done(task):
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            preload_errors[name] = f"{type(error).__name__}: {error}"
+            logger.error("Preloading %s failed", name, exc_info=error)
+    return done
+
 
-from backend.sparql_queries import get_diseases_from_wikidata, get_hospitals_from_wikidata, get_drug_illness_graph
-from backend.llm_adviser import get_illness_and_drugs
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Таблицю хвороб і важкі ресурси (модель, векторний індекс, препарати) підвантажуємо у фоні,
+    # щоб не затримувати старт; готовність видно через /readyz
+    preload_errors.clear()
+    with background_priority():
+        tasks = {"diseases": asyncio.create_task(disease_store.get())}
+    if PRELOAD_RESOURCES:
+        tasks["resources"] = asyncio.create_task(asyncio.to_thread(load_resources))
+    for name, task in tasks.items():
+        task.add_done_callback(preload_finished(name))
+    tasks = list(tasks.values())
+    yield
+    for task in tasks:
+        task.cancel()
+    await sparql_client.aclose()
 
-app = FastAPI()
+
+# Відповіді кодуються orjson; великі списки повертаються як ORJSONResponse напряму, без jsonable_encoder
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,12 +76,117 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "Retry-After"],
 )
+app.add_middleware(MetricsMiddleware)
+
+# Таблиця хвороб у пам'яті, з якої віддаються сторінки /api/diseases
+disease_store = DiseaseStore(lambda: get_diseases_from_wikidata())
+# Повні дані лікарень по країнах з просторовим індексом
+hospital_store = HospitalStore(lambda country: get_hospitals_from_wikidata(country))
+# Граф препарат—хвороба з інтернованими вузлами і суміжністю CSR
+drug_graph_store = DrugGraphStore(lambda: get_drug_illness_graph())
+# Готові (і стиснуті) тіла великих відповідей за ETag
+response_cache = ResponseCache()
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.exception_handler(SparqlOverloaded)
+async def sparql_overloaded(request: Request, exc: SparqlOverloaded):
+    # Черга до WDQS переповнена: швидка відмова, клієнт повторить пізніше
+    return ORJSONResponse(
+        {"detail": "Upstream is busy, try again later"},
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@registry.collect
+def collect_runtime_metrics():
+    stats = cache_stats()
+    batches = Counter("embedding_batches_total", "Embedding model calls made by the batcher")
+    batch_size = Gauge("embedding_batch_size_avg", "Average number of queries per embedding batch")
+    retrieval = Counter("chat_retrievals_total", "Condition lookups by retrieval path", ("path",))
+    upstream = sparql_client.stats()
+    queued = Gauge("sparql_upstream_queued", "WDQS queries waiting for a free slot")
+    active = Gauge("sparql_upstream_active", "WDQS queries currently running")
+    shed = Counter("sparql_upstream_shed_total", "WDQS queries rejected because the queue was full")
+    coalesced = Counter("sparql_upstream_coalesced_total", "Queries that joined an identical query in flight")
+    queued.set(upstream["queued"])
+    active.set(upstream["active"])
+    shed.inc(amount=upstream["shed"])
+    coalesced.inc(amount=upstream["coalesced"])
+    batches.inc(amount=stats["batching"]["batches"])
+    batch_size.set(stats["batching"]["avg_batch_size"])
+    for path, count in stats["retrieval"].items():
+        retrieval.inc(path, amount=count)
+    caches = cache_metrics({
+        "embeddings": stats["embeddings"],
+        "results": stats["results"],
+        "sparql": sparql_queries.cache.stats(),
+        "http": response_cache.stats(),
+    })
+    return [*caches, batches, batch_size, retrieval, queued, active, shed, coalesced]
+
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/readyz")
+async def readyz(response: Response):
+    resources = dict(resources_status(), diseases=disease_store.table is not None)
+    ready = is_ready()
+    if not ready:
+        response.status_code = 503
+    # Ресурси, що впали при завантаженні, самі не з'являться — це не "loading", а "failed"
+    status = "ready" if ready else "failed" if "resources" in preload_errors else "loading"
+    body = {"status": status, "resources": resources}
+    if preload_errors:
+        body["errors"] = preload_errors
+    return body
+
+
+def iter_json_array(items):
+    # Віддаємо JSON-масив по одному елементу, не збираючи все тіло відповіді в один рядок
+    yield b"["
+    for i, item in enumerate(items):
+        yield (b"," if i else b"") + orjson.dumps(item)
+    yield b"]"
 
 
 @app.get("/api/diseases")
-def get_diseases():
-    return get_diseases_from_wikidata()
+async def get_diseases(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1),
+    fields: str | None = None,
+    q: str | None = None,
+    stream: bool = False,
+    format: str = Query("rows", pattern="^(rows|columnar)$"),
+):
+    table = await disease_store.get()
+    projection = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+
+    # Колонковий формат — один об'єкт, тож stream стосується лише рядків
+    if stream and format == "rows":
+        total, diseases = table.query(offset, limit, projection, q)
+        return StreamingResponse(iter_json_array(diseases), media_type="application/json",
+                                 headers={"X-Total-Count": str(total)})
+
+    async def build():
+        if format == "columnar":
+            total, diseases = table.columnar(offset, limit, projection, q)
+        else:
+            total, diseases = table.query(offset, limit, projection, q)
+        return diseases, {"X-Total-Count": str(total)}
+
+    return await response_cache.respond(request, table.version, build)
 
 
 class ChatRequest(BaseModel):
@@ -27,16 +195,104 @@ class ChatRequest(BaseModel):
 
 @app.post("/api/chat")
 def chat(request: ChatRequest):
-    response_text = get_illness_and_drugs(request.message, top_k=10)
+    reply = advise(request.message, top_k=10)
+
+    with timed("chat.serialize"):
+        return ORJSONResponse({"reply": reply})
+
+
+class ChatBatchRequest(BaseModel):
+    messages: list[str] = Field(min_length=1, max_length=CHAT_BATCH_MAX_MESSAGES)
+    top_k: int = Field(10, ge=1, le=100)
+    get_drugs: bool = False
+
+
+def iter_ndjson(replies):
+    # Один рядок JSON на повідомлення, у порядку запиту; пачка рахується, коли клієнт читає потік
+    for index, reply in enumerate(replies):
+        yield orjson.dumps({"index": index, "reply": reply}) + b"\n"
 
-    return {"reply": response_text}
+
+@app.post("/api/chat/batch")
+def chat_batch(request: ChatBatchRequest, stream: bool = False):
+    replies = advise_many(request.messages, top_k=request.top_k, get_drugs=request.get_drugs)
+    if stream:
+        return StreamingResponse(iter_ndjson(replies), media_type="application/x-ndjson")
+    return ORJSONResponse({"replies": list(replies)})
+
+
+def parse_bbox(bbox):
+    # bbox=min_lon,min_lat,max_lon,max_lat (захід, південь, схід, північ)
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+    if min_lon > max_lon or min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="bbox minimums must not exceed maximums")
+    return min_lon, min_lat, max_lon, max_lat
 
 
 @app.get("/api/hospitals")
-def get_hospitals(country: str = "Q212"):
-    return get_hospitals_from_wikidata(country)
+async def get_hospitals(
+    request: Request,
+    country: str = "Q212",
+    bbox: str | None = None,
+    lat: float | None = Query(None, ge=-90, le=90),
+    lon: float | None = Query(None, ge=-180, le=180),
+    radius_km: float = Query(50, gt=0),
+    limit: int | None = Query(None, ge=1),
+    zoom: int | None = Query(None, ge=0, le=22),
+):
+    # Параметри перевіряємо до завантаження індексу: хибний запит не має тягнути країну з WDQS
+    if not COUNTRY_ID.fullmatch(country):
+        raise HTTPException(status_code=400, detail="country must be a Wikidata id like Q212")
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=400, detail="lat and lon must be given together")
+    box = parse_bbox(bbox) if bbox else None
+
+    index = await hospital_store.get(country)
+
+    async def build():
+        if lat is not None:
+            # Найближчі лікарні в радіусі, впорядковані за відстанню
+            positions, distances = index.nearest(lat, lon, radius_km, limit)
+            return index.records(positions, distances), {}
+        if box is None and zoom is None:
+            return index.hospitals[:limit], {}
+
+        positions = index.in_bbox(*box) if box else index.in_bbox(-180, -90, 180, 90)
+        if zoom is not None and zoom < HOSPITAL_CLUSTER_ZOOM:
+            return index.cluster(positions, zoom), {}
+        return index.records(positions[:limit]), {}
+
+    return await response_cache.respond(request, index.version, build)
 
 
 @app.get("/api/drug-disease")
-async def get_drug_disease_data():
-    return get_drug_illness_graph()
+async def get_drug_disease_data(
+    request: Request,
+    format: str = Query("rows", pattern="^(rows|compact|columnar)$"),
+    node: str | None = None,
+    depth: int = Query(1, ge=0, le=DRUG_GRAPH_MAX_DEPTH),
+):
+    if format == "rows" and node is None:
+        # Старий формат читається зі SPARQL-кешу, а не зі сховища в пам'яті. Версію кеш рахує під час запису,
+        # тож If-None-Match отримує 304 без читання і серіалізації графа
+        async def rows():
+            return await get_drug_illness_graph(), {}
+
+        return await response_cache.respond(request, await get_drug_illness_graph_version(), rows)
+
+    graph = await drug_graph_store.get()
+    position = None
+    if node is not None:
+        position = graph.node(node)
+        if position is None:
+            raise HTTPException(status_code=404, detail=f"Unknown node {node}")
+
+    async def build():
+        if position is None:
+            return (graph.columnar() if format == "columnar" else graph.payload()), {}
+        return graph.subgraph(position, depth, format), {}
+
+    return await response_cache.respond(request, graph.version, build)
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+
+from backend.vector_store import project_root, MODEL_NAME
+
+# Та сама модель, експортована в ONNX (backend.scripts.export_onnx): інференс через onnxruntime
+# без PyTorch — швидший імпорт, менший RSS, а int8-варіант ще й швидший на CPU
+onnx_dir = os.path.join(project_root, "onnx_model")
+
+MODEL_FILE = "model.onnx"
+MODEL_INT8_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+META_FILE = "onnx_meta.json"
+# Скільки текстів проганяємо через модель за раз
+ONNX_BATCH_SIZE = int(os.getenv("ONNX_BATCH_SIZE", "32"))
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))
+
+
+def model_directory(model_name=MODEL_NAME, directory=onnx_dir):
+    return os.path.join(directory, model_name)
+
+
+def model_path(model_name=MODEL_NAME, quantized=False, directory=onnx_dir):
+    return os.path.join(model_directory(model_name, directory), MODEL_INT8_FILE if quantized else MODEL_FILE)
+
+
+def mean_pool(token_embeddings, attention_mask):
+    # Як у sentence-transformers: середнє по токенах без паддінгу, потім L2-нормалізація
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return pooled / norms
+
+
+class OnnxEmbeddings:
+    # Той самий інтерфейс, що й HuggingFaceEmbeddings: embed_documents / embed_query
+    def __init__(self, session, tokenizer, batch_size=ONNX_BATCH_SIZE):
+        self.session = session
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+        self.input_names = {item.name for item in session.get_inputs()}
+
+    @classmethod
+    def load(cls, model_name=MODEL_NAME, quantized=False, directory=onnx_dir, threads=ONNX_THREADS):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        path = model_path(model_name, quantized, directory)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"ONNX model {path} not found, run: python -m backend.scripts.export_onnx"
+                + (" --quantize" if quantized else "")
+            )
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        # Налаштування обрізання і паддінгу збережені в самому tokenizer.json під час експорту
+        tokenizer = Tokenizer.from_file(os.path.join(model_directory(model_name, directory), TOKENIZER_FILE))
+        return cls(session, tokenizer)
+
+    def _embed_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": attention_mask,
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+        return mean_pool(token_embeddings, attention_mask)
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = [self._embed_batch(texts[start:start + self.batch_size])
+                   for start in range(0, len(texts), self.batch_size)]
+        return np.concatenate(vectors).tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
@@ -0,0 +1,170 @@
+import json
+import os
+
+import numpy as np
+from langchain_core.documents import Document
+
+from backend.vector_store import project_root, read_meta, write_meta, db_dir, input_file, index_version
+
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "chroma")
+RETRIEVER_QUANTIZE = os.getenv("RETRIEVER_QUANTIZE", "0") == "1"
+
+numpy_dir = os.path.join(project_root, "numpy_index")
+
+VECTORS_FILE = "vectors.npy"
+VECTORS_INT8_FILE = "vectors_int8.npy"
+SCALES_FILE = "scales.npy"
+TEXTS_FILE = "texts.json"
+
+# Скільки рядків int8-матриці переводимо у float32 за раз
+BLOCK_SIZE = 4096
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize_int8(matrix):
+    # Симетричне int8-квантування по рядках: x ≈ q * scale
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.round(matrix / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def top_k_indices(scores, k):
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[-1]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[-1])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def top_k_rows(scores, k):
+    # Той самий top-k, але для кожного рядка матриці оцінок (запити × документи) одразу
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < scores.shape[-1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[-1]), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+class NumpyRetriever:
+    def __init__(self, embeddings, texts, vectors=None, quantized=None, scales=None):
+        self.embeddings = embeddings
+        self.texts = texts
+        self.vectors = vectors
+        self.quantized = quantized
+        self.scales = scales
+
+    @classmethod
+    def load(cls, embeddings, directory=numpy_dir, quantize=False):
+        with open(os.path.join(directory, TEXTS_FILE), encoding="utf-8") as f:
+            texts = json.load(f)
+        if quantize:
+            return cls(
+                embeddings, texts,
+                quantized=np.load(os.path.join(directory, VECTORS_INT8_FILE), mmap_mode="r"),
+                scales=np.load(os.path.join(directory, SCALES_FILE), mmap_mode="r"),
+            )
+        return cls(embeddings, texts, vectors=np.load(os.path.join(directory, VECTORS_FILE), mmap_mode="r"))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def scores(self, query_vector):
+        query_vector = normalize(query_vector)
+        if self.vectors is not None:
+            return self.vectors @ query_vector
+
+        scores = np.empty(len(self.texts), dtype=np.float32)
+        for start in range(0, len(self.texts), BLOCK_SIZE):
+            block = self.quantized[start:start + BLOCK_SIZE].astype(np.float32)
+            scores[start:start + BLOCK_SIZE] = block @ query_vector
+        return scores * self.scales
+
+    def scores_many(self, query_vectors):
+        # Одне множення матриць на всю пачку запитів: результат — запити × документи
+        queries = normalize(np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1))
+        if self.vectors is not None:
+            return queries @ self.vectors.T
+
+        scores = np.empty((len(queries), len(self.texts)), dtype=np.float32)
+        for start in range(0, len(self.texts), BLOCK_SIZE):
+            block = self.quantized[start:start + BLOCK_SIZE].astype(np.float32)
+            scores[:, start:start + BLOCK_SIZE] = queries @ block.T
+        return scores * self.scales
+
+    def search_by_vectors(self, query_vectors, k=4):
+        scores = self.scores_many(query_vectors)
+        indices = top_k_rows(scores, k)
+        return indices, np.take_along_axis(scores, indices, axis=1)
+
+    def similarity_search_by_vectors(self, embeddings, k=4):
+        if not len(embeddings):
+            return []
+        indices, _ = self.search_by_vectors(embeddings, k)
+        return [[Document(page_content=self.texts[i]) for i in row] for row in indices]
+
+    def search_by_vector(self, query_vector, k=4):
+        scores = self.scores(query_vector)
+        indices = top_k_indices(scores, k)
+        return indices, scores[indices]
+
+    def similarity_search_by_vector(self, embedding, k=4):
+        indices, _ = self.search_by_vector(embedding, k)
+        return [Document(page_content=self.texts[i]) for i in indices]
+
+    def similarity_search(self, query, k=4):
+        return self.similarity_search_by_vector(self.embeddings.embed_query(query), k)
+
+
+def export_numpy_index(db, directory=numpy_dir):
+    # Беремо вже пораховані вектори з Chroma — повторно нічого не ембедимо
+    data = db.get(include=["embeddings", "documents"])
+    vectors = np.asarray(data["embeddings"], dtype=np.float32)
+    matrix = normalize(vectors.reshape(len(data["documents"]), -1) if data["documents"] else np.zeros((0, 1)))
+    quantized, scales = quantize_int8(matrix)
+
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, VECTORS_FILE), np.ascontiguousarray(matrix))
+    np.save(os.path.join(directory, VECTORS_INT8_FILE), quantized)
+    np.save(os.path.join(directory, SCALES_FILE), scales)
+    with open(os.path.join(directory, TEXTS_FILE), "w", encoding="utf-8") as f:
+        json.dump(data["documents"], f, ensure_ascii=False)
+
+
+def numpy_index_current(directory=numpy_dir, source_file=input_file, chroma_dir=db_dir):
+    # Експорт актуальний, якщо його версія збігається з версією вихідного файлу (або Chroma, коли файлу немає)
+    version = read_meta(directory).get("version")
+    if version is None:
+        return False
+    if os.path.exists(source_file):
+        return version == index_version(source_file)
+    return version == read_meta(chroma_dir).get("version")
+
+
+def open_numpy_index(db, directory=numpy_dir, chroma_dir=db_dir, quantize=RETRIEVER_QUANTIZE):
+    version = read_meta(chroma_dir).get("version")
+    if version is None or read_meta(directory).get("version") != version:
+        export_numpy_index(db, directory)
+        write_meta({"version": version}, directory)
+    return NumpyRetriever.load(db.embeddings, directory, quantize=quantize)
+
+
+def open_retriever(db, backend=RETRIEVER_BACKEND):
+    if backend == "chroma":
+        return db
+    if backend == "numpy":
+        return open_numpy_index(db)
+    raise ValueError(f"Unknown retriever backend: {backend}")
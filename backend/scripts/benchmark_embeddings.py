@@ -0,0 +1,98 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from backend.vector_store import EMBEDDING_BACKENDS
+
+# Рушії ембедінгів (torch, onnx, onnx-int8): час імпорту й завантаження моделі, RSS процесу
+# і швидкість — окремі запити (як у чаті) та пачки (як при побудові індексу).
+# Кожен рушій міряється в окремому процесі, щоб пам'ять і час імпорту не змішувались.
+
+QUERIES = [
+    "headache and fever", "acne", "high blood pressure", "skin rash after sun exposure",
+    "cannot sleep at night", "chronic cough with chest pain", "joint pain in the morning", "anxiety",
+]
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def measure(backend, queries, batch_size, duration):
+    start = time.perf_counter()
+    from backend.vector_store import embedding_model
+
+    model = embedding_model(backend=backend)
+    model.embed_query("warm up")
+    load_s = time.perf_counter() - start
+
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        for query in queries:
+            started = time.perf_counter()
+            model.embed_query(query)
+            latencies.append(time.perf_counter() - started)
+
+    batch = [queries[i % len(queries)] + f" {i}" for i in range(batch_size)]
+    batches = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        model.embed_documents(batch)
+        batches += 1
+    batch_elapsed = time.perf_counter() - started
+
+    return {
+        "backend": backend,
+        "load_s": load_s,
+        "rss_mb": rss_mb(),
+        "query_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "query_qps": len(latencies) / sum(latencies),
+        "batch_texts_per_s": batches * batch_size / batch_elapsed,
+    }
+
+
+def benchmark(backends, batch_size, duration):
+    results = []
+    print(f"{'backend':<12}{'load, s':>9}{'RSS, MB':>10}{'p50, ms':>10}{'query/s':>10}{'batch text/s':>14}")
+    for backend in backends:
+        output = subprocess.run(
+            [sys.executable, "-m", "backend.scripts.benchmark_embeddings", "--worker", backend,
+             "--batch-size", str(batch_size), "--duration", str(duration)],
+            capture_output=True, text=True,
+        )
+        if output.returncode != 0:
+            print(f"{backend:<12}❌ {output.stderr.strip().splitlines()[-1] if output.stderr.strip() else 'failed'}")
+            continue
+        row = json.loads(output.stdout.strip().splitlines()[-1])
+        results.append(row)
+        print(f"{backend:<12}{row['load_s']:>9.2f}{row['rss_mb']:>10.1f}{row['query_p50_ms']:>10.2f}"
+              f"{row['query_qps']:>10.1f}{row['batch_texts_per_s']:>14.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", action="append", choices=EMBEDDING_BACKENDS, help="за замовчуванням — усі")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=5, help="секунд на кожен вимір")
+    parser.add_argument("--json", help="зберегти результати у JSON-файл")
+    parser.add_argument("--worker", choices=EMBEDDING_BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, QUERIES, args.batch_size, args.duration)))
+        sys.exit(0)
+
+    results = benchmark(args.backend or EMBEDDING_BACKENDS, args.batch_size, args.duration)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
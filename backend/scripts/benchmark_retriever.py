@@ -0,0 +1,63 @@
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from backend.vector_store import open_index
+from backend.retriever import NumpyRetriever, export_numpy_index
+
+
+def percentile_ms(timings, q):
+    return float(np.percentile(timings, q) * 1000)
+
+
+def run(search, vectors, k):
+    timings, results = [], []
+    for vector in vectors:
+        start = time.perf_counter()
+        docs = search(vector, k)
+        timings.append(time.perf_counter() - start)
+        results.append([doc.page_content for doc in docs])
+    return timings, results
+
+
+def recall(results, reference):
+    hits = sum(len(set(r) & set(ref)) for r, ref in zip(results, reference))
+    total = sum(len(ref) for ref in reference)
+    return hits / total if total else 1.0
+
+
+def benchmark(queries, k=10):
+    db = open_index()
+    # Ембедимо запити один раз — порівнюємо лише сам пошук
+    vectors = db.embeddings.embed_documents(queries)
+
+    with tempfile.TemporaryDirectory() as directory:
+        export_numpy_index(db, directory)
+        backends = {
+            "chroma": db.similarity_search_by_vector,
+            "numpy": NumpyRetriever.load(db.embeddings, directory).similarity_search_by_vector,
+            "numpy-int8": NumpyRetriever.load(db.embeddings, directory, quantize=True).similarity_search_by_vector,
+        }
+
+        reference = None
+        print(f"{'backend':<12}{'p50, ms':>10}{'p95, ms':>10}{'recall@' + str(k):>12}")
+        for name, search in backends.items():
+            search(vectors[0], k)  # прогрів
+            timings, results = run(search, vectors, k)
+            if reference is None:
+                reference = results
+            print(f"{name:<12}{percentile_ms(timings, 50):>10.3f}{percentile_ms(timings, 95):>10.3f}"
+                  f"{recall(results, reference):>12.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("queries", nargs="*", default=[
+        "diabetes", "headache", "high blood pressure", "acne", "insomnia",
+        "stomach pain and nausea", "seasonal allergies", "depression", "asthma attack", "back pain",
+    ])
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+    benchmark(args.queries, args.k)
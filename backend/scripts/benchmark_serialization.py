@@ -0,0 +1,108 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+
+from backend.drug_graph import DrugGraph
+from backend.llm_adviser import Advice
+
+# Час серіалізації відповіді кожного ендпоінта: старий шлях FastAPI (jsonable_encoder + json.dumps)
+# проти orjson напряму. Дані синтетичні, але за формою такі ж, як у API.
+
+
+def make_diseases(n):
+    return [
+        {
+            "id": f"Q{i}", "name": f"disease {i}", "url": f"http://www.wikidata.org/entity/Q{i}",
+            "description": "long description of the disease " * 4, "icd10": f"A{i % 100:02d}",
+            "subclass_of": ["infectious disease"], "causes": ["virus", "bacteria"],
+            "symptoms": ["fever", "cough", "headache"], "fatality_rate": None,
+            "diagnostic_methods": ["blood test"], "treatments": ["rest"], "related_genes": [],
+        }
+        for i in range(n)
+    ]
+
+
+def make_hospitals(n):
+    rng = np.random.default_rng(0)
+    return [
+        {"id": f"Q{i}", "name": f"Hospital {i}", "latitude": float(lat), "longitude": float(lon),
+         "description": "hospital", "address": "street 1"}
+        for i, (lat, lon) in enumerate(zip(rng.uniform(44, 52, n), rng.uniform(22, 40, n)))
+    ]
+
+
+def make_drugs(n):
+    return pd.DataFrame({
+        "drug_name": [f"drug {i}" for i in range(n)],
+        "medical_condition": ["acne"] * n,
+        "medical_condition_description": ["skin condition"] * n,
+        "rating": np.linspace(0, 10, n),
+        "no_of_reviews": np.arange(n, dtype=float),
+        "alcohol": np.zeros(n, dtype=np.int8),
+    })
+
+
+def make_graph(n):
+    entity = "http://www.wikidata.org/entity/"
+    rows = [{"item": f"{entity}Q{i}", "label": f"disease {i}", "color": "FFA500", "link": ""} for i in range(n)]
+    rows += [{"item": f"{entity}Q{n + i}", "label": f"drug {i}", "color": "7FFF00", "link": f"{entity}Q{i % n}"}
+             for i in range(n * 3)]
+    return rows
+
+
+def fastapi_default(content):
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def orjson_default(content):
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def time_ms(encode, content, repeat):
+    encode(content)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode(content)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def benchmark(diseases, hospitals, drugs, graph_size, repeat):
+    drugs_df = make_drugs(drugs)
+    graph_rows = make_graph(graph_size)
+    advice = Advice(conditions=["acne"], drugs={name: drugs_df[name].to_numpy().tolist() for name in drugs_df})
+    cases = {
+        # (до: як відповідав ендпоінт раніше, після: що він повертає тепер)
+        "/api/diseases": (make_diseases(diseases),) * 2,
+        "/api/hospitals": (make_hospitals(hospitals),) * 2,
+        "/api/chat": ({"reply": drugs_df}, {"reply": advice}),
+        "/api/drug-disease": (graph_rows, DrugGraph(graph_rows).payload()),
+    }
+
+    print(f"{'endpoint':<20}{'before, ms':>12}{'after, ms':>12}{'speedup':>10}")
+    for endpoint, (before, after) in cases.items():
+        new = time_ms(orjson_default, after, repeat)
+        try:
+            old = time_ms(fastapi_default, before, repeat)
+        except ValueError:
+            # jsonable_encoder не вміє numpy-скаляри, тож DataFrame з int8-колонкою віддати не міг
+            print(f"{endpoint:<20}{'fails':>12}{new:>12.2f}{'-':>10}")
+            continue
+        print(f"{endpoint:<20}{old:>12.2f}{new:>12.2f}{old / new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--diseases", type=int, default=10000)
+    parser.add_argument("--hospitals", type=int, default=5000)
+    parser.add_argument("--drugs", type=int, default=200)
+    parser.add_argument("--graph", type=int, default=2000, help="кількість хвороб у графі")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    benchmark(args.diseases, args.hospitals, args.drugs, args.graph, args.repeat)
@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+# Пам'ять воркерів backend.scripts.serve при 1..N воркерах: RSS (з урахуванням спільних сторінок)
+# і PSS (спільні сторінки поділені між процесами — реальна частка кожного воркера).
+# Обидва режими запускаються з тим самим RETRIEVER_BACKEND, тож різниця лише в передзавантаженні
+
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def memory_kb(pid):
+    result = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty"):
+                result[name.lower()] = int(value.split()[0])
+    return result
+
+
+def wait_ready(url, workers, timeout):
+    # Запити розподіляються між воркерами ядром; вважаємо всіх готовими,
+    # коли поспіль приходить достатньо успішних відповідей /readyz
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while time.monotonic() < deadline:
+        try:
+            ok = httpx.get(f"{url}/readyz", timeout=5).status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        streak = streak + 1 if ok else 0
+        if streak >= 10 * workers:
+            return True
+        time.sleep(0.05 if ok else 0.5)
+    return False
+
+
+def measure(workers, preload, port, timeout, retriever):
+    command = [sys.executable, "-m", "backend.scripts.serve", "--workers", str(workers), "--port", str(port)]
+    if not preload:
+        command.append("--no-preload")
+    env = dict(os.environ, RETRIEVER_BACKEND=retriever)
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, env=env)
+    try:
+        if not wait_ready(f"http://127.0.0.1:{port}", workers, timeout):
+            raise RuntimeError(f"Воркери не стали готовими за {timeout} с")
+        time.sleep(1)
+        pids = children(process.pid)
+        stats = [memory_kb(pid) for pid in pids]
+        return {
+            "workers": workers,
+            "preload": preload,
+            "retriever": retriever,
+            "master_rss_mb": memory_kb(process.pid)["rss"] / 1024,
+            "rss_mb_per_worker": sum(s["rss"] for s in stats) / len(stats) / 1024,
+            "pss_mb_per_worker": sum(s["pss"] for s in stats) / len(stats) / 1024,
+            "total_pss_mb": (sum(s["pss"] for s in stats) + memory_kb(process.pid)["pss"]) / 1024,
+        }
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+
+
+def benchmark(max_workers, port, timeout, modes, retriever="numpy"):
+    results = []
+    print(f"{'mode':<12}{'workers':>8}{'RSS/worker, MB':>16}{'PSS/worker, MB':>16}{'total PSS, MB':>15}")
+    for preload in modes:
+        for workers in range(1, max_workers + 1):
+            row = measure(workers, preload, port, timeout, retriever)
+            results.append(row)
+            print(f"{'preload' if preload else 'independent':<12}{workers:>8}{row['rss_mb_per_worker']:>16.1f}"
+                  f"{row['pss_mb_per_worker']:>16.1f}{row['total_pss_mb']:>15.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--mode", choices=("both", "preload", "independent"), default="both")
+    parser.add_argument("--retriever", choices=("numpy", "chroma"), default="numpy",
+                        help="бекенд пошуку для обох режимів; chroma не можна ділити між воркерами після fork")
+    parser.add_argument("--json", help="зберегти результати у JSON-файл")
+    args = parser.parse_args()
+    if args.retriever == "chroma" and args.mode != "independent":
+        parser.error("--retriever chroma можливий лише з --mode independent")
+
+    modes = {"both": (True, False), "preload": (True,), "independent": (False,)}[args.mode]
+    results = benchmark(args.max_workers, args.port, args.timeout, modes, args.retriever)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
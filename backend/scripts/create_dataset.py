@@ -1,45 +1,106 @@
 
 import pandas as pd
+from pandas.api.types import union_categoricals
 import os
 import dotenv
 
+from backend.column_store import file_hash, has_columns, read_attrs, read_columns, write_columns
+from backend.drug_index import SORT_KEYS, sort_drugs
+
 # Завантаження .env
 dotenv.load_dotenv()
 
 # Отримання шляху до директорії з датасетом
 DATASET_DIR = os.getenv("DATASET_DIR")  # ОНОВЛЕНО назву змінної
-if not DATASET_DIR:
-    raise EnvironmentError("Змінна середовища 'DATASET_DIR' не знайдена або порожня.")
-
-# Шлях до CSV файлу
-csv_file = os.path.join(DATASET_DIR, "drugs_for_common_treatments.csv")
 
 # Шлях до output файлу
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 output_file = os.path.join(project_root, "illness_description.txt")
-
-
-def create_dataset():
-    if not os.path.exists(output_file):
-        if not os.path.exists(csv_file):
-            raise FileNotFoundError(f"CSV файл не знайдено за шляхом: {csv_file}")
-
-        drugs_df = pd.read_csv(csv_file)
-
-        drugs_df['alcohol'] = drugs_df['alcohol'].apply(lambda x: 1 if pd.notna(x) else 0)
-        drugs_df['no_of_reviews'] = drugs_df['no_of_reviews'].fillna(0)
-        drugs_df['rating'] = drugs_df['rating'].fillna(0)
-
-        tagged_descr = pd.DataFrame({
-            'combined_info': drugs_df.apply(
-                lambda row: f"{row['medical_condition']} Info: {row['medical_condition_description']}",
-                axis=1
-            )
-        })
-
-        unique_descriptions = tagged_descr['combined_info'].drop_duplicates()
-
-        unique_descriptions.to_csv(output_file, index=False, sep='\n', header=False)
+# Колонковий артефакт з таблицею препаратів, який API відкриває через mmap
+columns_dir = os.path.join(project_root, "drugs_columns")
+
+CSV_CHUNK_SIZE = int(os.getenv("CSV_CHUNK_SIZE", "50000"))
+CSV_DTYPES = {
+    "drug_name": "category",
+    "medical_condition": "category",
+    "medical_condition_description": "category",
+    "rating": "float64",
+    "no_of_reviews": "float64",
+    "alcohol": "string",
+}
+
+
+def clean_chunk(chunk):
+    chunk['alcohol'] = chunk['alcohol'].notna().astype('int8')
+    chunk['no_of_reviews'] = chunk['no_of_reviews'].fillna(0)
+    chunk['rating'] = chunk['rating'].fillna(0)
+    return chunk
+
+
+def combine_chunks(chunks):
+    # Категорії в кожному чанку свої — об'єднуємо їх, не переходячи до object
+    if not chunks:
+        return pd.DataFrame(columns=list(CSV_DTYPES))
+    combined = {}
+    for name in chunks[0].columns:
+        parts = [chunk[name] for chunk in chunks]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            combined[name] = union_categoricals(parts, sort_categories=True, ignore_order=True)
+        else:
+            combined[name] = pd.concat(parts, ignore_index=True).to_numpy()
+    return pd.DataFrame(combined)
+
+
+def csv_path():
+    # Директорія з CSV потрібна лише для побудови артефакту, а не при імпорті
+    if not DATASET_DIR:
+        raise EnvironmentError("Змінна середовища 'DATASET_DIR' не знайдена або порожня.")
+    return os.path.join(DATASET_DIR, "drugs_for_common_treatments.csv")
+
+
+def load_drugs_csv(chunksize=CSV_CHUNK_SIZE):
+    csv_file = csv_path()
+    if not os.path.exists(csv_file):
+        raise FileNotFoundError(f"CSV файл не знайдено за шляхом: {csv_file}")
+
+    reader = pd.read_csv(csv_file, dtype=CSV_DTYPES, chunksize=chunksize)
+    return combine_chunks([clean_chunk(chunk) for chunk in reader])
+
+
+def unique_descriptions(drugs_df):
+    # Рядки "стан Info: опис" збираються по колонках цілком; дублікати відсікаються множиною
+    combined = (
+        drugs_df['medical_condition'].astype(str) + " Info: " + drugs_df['medical_condition_description'].astype(str)
+    )
+    seen = set()
+    return pd.Series([text for text in combined if not (text in seen or seen.add(text))], dtype=object)
+
+
+def csv_hash():
+    # None, якщо CSV тут немає (розгортання лише з готовим артефактом) — тоді перевіряти нема з чим
+    if not DATASET_DIR or not os.path.exists(csv_path()):
+        return None
+    return file_hash(csv_path())
+
+
+def columns_current(source_hash):
+    if not has_columns(columns_dir):
+        return False
+    return source_hash is None or read_attrs(columns_dir).get("source_hash") == source_hash
+
+
+def create_dataset(source_hash=None):
+    source_hash = source_hash or csv_hash()
+    rebuilt = not columns_current(source_hash)
+    if rebuilt:
+        # Таблицю зберігаємо вже відсортованою для DrugIndex, тож воркери лише відкривають її через mmap.
+        # Хеш CSV у метаданих: змінений CSV перебудовує артефакт, а не лишає застарілі колонки
+        write_columns(sort_drugs(load_drugs_csv()), columns_dir, sorted_by=SORT_KEYS, source_hash=source_hash)
+        print(f"✅ Таблицю препаратів збережено у: {columns_dir}")
+
+    if rebuilt or not os.path.exists(output_file):
+        # Текстовий файл для векторної бази похідний від колонкового артефакту
+        unique_descriptions(read_columns(columns_dir)).to_csv(output_file, index=False, sep='\n', header=False)
 
         print(f"✅ Датасет успішно створено та збережено у: {output_file}")
     else:
@@ -47,12 +108,13 @@ def create_dataset():
 
 
 def get_drugs_df():
-    if not os.path.exists(output_file):
-        create_dataset()
+    source_hash = csv_hash()
+    if not columns_current(source_hash) or not os.path.exists(output_file):
+        create_dataset(source_hash)
 
-    drugs_df = pd.read_csv(output_file, header=None, names=['combined_info'])
-    return drugs_df
+    # Повна таблиця препаратів (назва, стан, рейтинг, ...) з колонкового артефакту, без повторного розбору CSV
+    return read_columns(columns_dir)
 
 
-# Ініціалізація
-drugs_df = get_drugs_df()
+if __name__ == "__main__":
+    create_dataset()
@@ -1,32 +1,30 @@
-import os
-from langchain_community.document_loaders import TextLoader
-from langchain_text_splitters import CharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
+import argparse
 from langchain_chroma import Chroma
 
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-input_file = os.path.join(project_root, "illness_description.txt")
-db_dir = os.path.join(project_root, "chroma_db")
+from backend.vector_store import input_file, db_dir, MODEL_NAME, BATCH_SIZE, update_index, embedding_model
 
 db_drugs = None
 
 
-def create_embeddings():
-    raw_documents = TextLoader(input_file).load()
-    text_splitter = CharacterTextSplitter(chunk_size=0, chunk_overlap=0, separator="\n")
-    documents = text_splitter.split_documents(raw_documents)
+def create_embeddings(full_rebuild=False, batch_size=BATCH_SIZE):
+    # Рушій (torch або ONNX) обирається через EMBEDDING_BACKEND
+    embedding = embedding_model(MODEL_NAME)
 
-    embedding = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-
-    # Создание и сохранение векторной базы данных
-    db_drugs = Chroma.from_documents(
-        documents=documents,
-        embedding=embedding,
-        persist_directory=db_dir  # указываем db_dir для сохранения базы
+    # Відкриваємо збережену базу і синхронізуємо її з файлом: ембедимо лише нові рядки,
+    # видаляємо зниклі
+    db_drugs = Chroma(embedding_function=embedding, persist_directory=db_dir)
+    db_drugs, added, removed = update_index(
+        db_drugs, input_file, db_dir, MODEL_NAME,
+        full_rebuild=full_rebuild, batch_size=batch_size
     )
 
-    print(f"Векторная база данных успешно создана и сохранена в {db_dir}")
+    print(f"Векторну базу оновлено у {db_dir}: додано {added}, видалено {removed}")
+    return db_drugs
 
 
 if __name__ == "__main__":
-    create_embeddings()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full", action="store_true", help="перебудувати індекс з нуля")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    create_embeddings(full_rebuild=args.full, batch_size=args.batch_size)
@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from backend.vector_store import MODEL_NAME, input_file, embedding_model
+from backend.onnx_embeddings import (
+    onnx_dir, model_directory, model_path, TOKENIZER_FILE, META_FILE, OnnxEmbeddings
+)
+
+# Експорт моделі ембедінгів у ONNX (і, за бажанням, динамічне int8-квантування ваг) та перевірка,
+# що вектори ONNX збігаються з PyTorch. Для експорту потрібні torch і onnx, для роботи — лише onnxruntime.
+
+# Мінімальна косинусна близькість до векторів PyTorch, за якої рушій вважається сумісним з індексом
+MIN_COSINE = {"onnx": 0.999, "onnx-int8": 0.98}
+OPSET = 17
+
+
+def export(model_name=MODEL_NAME, directory=onnx_dir, quantize=False, opset=OPSET):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+    max_length = st_model.max_seq_length
+
+    class TokenEmbeddings(torch.nn.Module):
+        # Граф віддає ембедінги токенів; пулінг і нормалізація — у numpy (onnx_embeddings.mean_pool)
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(
+                input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+            ).last_hidden_state
+
+    target = model_directory(model_name, directory)
+    os.makedirs(target, exist_ok=True)
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer),
+            tuple(sample[name] for name in names),
+            model_path(model_name, False, directory),
+            input_names=names,
+            output_names=["token_embeddings"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in names + ["token_embeddings"]},
+            opset_version=opset,
+        )
+
+    # Обрізання і паддінг зберігаються в tokenizer.json — під час роботи transformers не потрібен
+    fast = tokenizer.backend_tokenizer
+    fast.enable_truncation(max_length=max_length)
+    fast.enable_padding(pad_id=tokenizer.pad_token_id, pad_token=tokenizer.pad_token)
+    fast.save(os.path.join(target, TOKENIZER_FILE))
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        quantize_dynamic(model_path(model_name, False, directory), model_path(model_name, True, directory),
+                         weight_type=QuantType.QInt8)
+
+    with open(os.path.join(target, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({"model_name": model_name, "max_length": max_length, "opset": opset, "quantized": quantize}, f)
+    return target
+
+
+def sample_texts(source_file=input_file, limit=500, seed=0):
+    with open(source_file, encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    rng = np.random.default_rng(seed)
+    if len(lines) > limit:
+        lines = [lines[i] for i in sorted(rng.choice(len(lines), limit, replace=False))]
+    # Короткі запити, як у чаті, поводяться інакше за довгі документи — перевіряємо й їх
+    return lines + [line.partition(" Info:")[0] for line in lines[:limit // 5]]
+
+
+def cosine_agreement(reference, candidate):
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    cosines = (reference * candidate).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    return {
+        "min": float(cosines.min()),
+        "p01": float(np.percentile(cosines, 1)),
+        "mean": float(cosines.mean()),
+    }
+
+
+def top_k_agreement(reference, candidate, k=5):
+    # Чи мають тексти тих самих k найближчих сусідів у векторах обох рушіїв
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    ref_top = np.argsort(-(reference @ reference.T), axis=1)[:, 1:k + 1]
+    cand_top = np.argsort(-(candidate @ candidate.T), axis=1)[:, 1:k + 1]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)]))
+
+
+def verify(model_name=MODEL_NAME, backends=tuple(MIN_COSINE), texts=None, directory=onnx_dir):
+    texts = texts or sample_texts()
+    reference = embedding_model(model_name, backend="torch").embed_documents(texts)
+    ok = True
+    print(f"{'backend':<12}{'min cos':>10}{'p01 cos':>10}{'mean cos':>10}{'top-5':>8}")
+    for backend in backends:
+        vectors = OnnxEmbeddings.load(model_name, backend == "onnx-int8", directory).embed_documents(texts)
+        stats = cosine_agreement(reference, vectors)
+        passed = stats["min"] >= MIN_COSINE[backend]
+        ok = ok and passed
+        print(f"{backend:<12}{stats['min']:>10.5f}{stats['p01']:>10.5f}{stats['mean']:>10.5f}"
+              f"{top_k_agreement(reference, vectors):>8.3f} {'✅' if passed else '❌'}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Експорт моделі ембедінгів у ONNX і перевірка збігу з PyTorch")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--dir", default=onnx_dir)
+    parser.add_argument("--quantize", action="store_true", help="також зберегти int8-модель")
+    parser.add_argument("--opset", type=int, default=OPSET)
+    parser.add_argument("--verify", action="store_true", help="після експорту порівняти вектори з PyTorch")
+    parser.add_argument("--verify-only", action="store_true", help="лише перевірити вже експортовані моделі")
+    args = parser.parse_args()
+
+    if not args.verify_only:
+        print(f"✅ Модель збережено у {export(args.model, args.dir, args.quantize, args.opset)}")
+    if args.verify or args.verify_only:
+        backends = [b for b in MIN_COSINE if os.path.exists(model_path(args.model, b == "onnx-int8", args.dir))]
+        if not verify(args.model, backends, directory=args.dir):
+            print("❌ Вектори ONNX розходяться з PyTorch — не вмикайте цей рушій для наявного індексу")
+            sys.exit(1)
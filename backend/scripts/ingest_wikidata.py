@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import datetime
+import os
+import re
+
+from backend import sparql_queries
+from backend.local_store import LocalStore, LOCAL_STORE_PATH
+from backend.sparql_client import client
+from backend.sparql_stream import BindingsParser
+from backend.sparql_queries import (
+    DiseaseAggregator, parse_hospital, parse_graph_row,
+    diseases_query, hospitals_query, drug_illness_graph_query,
+)
+
+DATASETS = ("diseases", "hospitals", "drug_disease")
+# Країни, які пропонує сторінка Hospitals.vue
+DEFAULT_COUNTRIES = ("Q30", "Q145", "Q212", "Q183", "Q142", "Q148", "Q29", "Q38", "Q16", "Q408", "Q17", "Q155")
+PAGE_SIZE = 5000
+# WDQS відстає від Wikidata; інкрементальне вікно беремо з запасом
+MODIFIED_MARGIN = datetime.timedelta(hours=1)
+# Інкрементальний запуск бачить лише змінені сутності, а видалені у Wikidata — ні.
+# Тому раз на стільки днів набір перезавантажується повністю (0 — кожен запуск повний)
+FULL_REFRESH_DAYS = float(os.getenv("INGEST_FULL_REFRESH_DAYS", "7"))
+
+
+def utc_now():
+    return datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+
+
+def parse_time(value):
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def modified_since(store, dataset, key=""):
+    last_run = store.last_run(dataset, key)
+    if last_run is None:
+        return None
+    # Давно не було повного запуску — інкрементальне вікно не допомагає, видалення треба підхопити
+    last_full_run = store.last_run(dataset, key, full=True)
+    if last_full_run is None or utc_now() - parse_time(last_full_run) >= datetime.timedelta(days=FULL_REFRESH_DAYS):
+        return None
+    moment = parse_time(last_run) - MODIFIED_MARGIN
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def projected_variables(query):
+    select = re.search(r"SELECT\s+(?:DISTINCT\s+)?(.*?)\s+WHERE", query, re.S | re.I)
+    return re.findall(r"\?\w+", select.group(1))
+
+
+def paged(query, limit, offset):
+    # Сутність дає багато рядків (симптоми, ліки, дублікати з OPTIONAL), тож сортування лише за ?disease
+    # лишає порядок рядків однієї сутності довільним, і на межі сторінок вони губились би або повторювались.
+    # З DISTINCT сортування за всіма змінними вибірки однозначне
+    return f"{query}\nORDER BY {' '.join(projected_variables(query))}\nLIMIT {limit}\nOFFSET {offset}"
+
+
+async def paged_bindings(query, page_size=PAGE_SIZE):
+    # Сторінки OFFSET/LIMIT зі стабільним порядком, поки не прийде неповна сторінка
+    offset = 0
+    while True:
+        rows = 0
+        async for item in client.stream_bindings(sparql_queries.WIKIDATA_SPARQL_URL,
+                                                 paged(query, page_size, offset)):
+            rows += 1
+            yield item
+        if rows < page_size:
+            return
+        offset += page_size
+
+
+async def dump_bindings(path):
+    # Локальний файл з результатом SPARQL у форматі JSON (наприклад, збережений з WDQS)
+    parser = BindingsParser()
+    with open(path, encoding="utf-8") as f:
+        for chunk in iter(lambda: f.read(1 << 20), ""):
+            for item in parser.feed(chunk):
+                yield item
+    parser.close()
+
+
+async def ingest_diseases(store, bindings, replace):
+    diseases = DiseaseAggregator()
+    async for item in bindings:
+        diseases.add(item)
+    return store.upsert("diseases", ((d["id"], d) for d in diseases.iter_records()), replace=replace)
+
+
+async def ingest_hospitals(store, bindings, country, replace):
+    hospitals = {}
+    async for item in bindings:
+        hospital_id = item["hospital"]["value"].split("/")[-1]
+        if hospital_id not in hospitals:
+            hospital = parse_hospital(item)
+            if hospital is not None:
+                hospitals[hospital_id] = hospital
+    return store.upsert("hospitals", hospitals.items(), key=country, replace=replace)
+
+
+async def ingest_drug_disease(store, bindings):
+    rows = {}
+    async for item in bindings:
+        row = parse_graph_row(item)
+        rows.setdefault(f"{row['item']}|{row['link']}", row)
+    # Рядки графа залежать і від хвороби, і від препарату — оновлюємо набір повністю
+    return store.upsert("drug_disease", rows.items(), replace=True)
+
+
+async def ingest(store, datasets=DATASETS, countries=DEFAULT_COUNTRIES, page_size=PAGE_SIZE, full=False, dump=None):
+    started_at = utc_now().strftime("%Y-%m-%dT%H:%M:%SZ")
+    try:
+        if "diseases" in datasets:
+            since = None if full or dump else modified_since(store, "diseases")
+            bindings = dump_bindings(dump) if dump else paged_bindings(diseases_query(since), page_size)
+            count = await ingest_diseases(store, bindings, replace=since is None)
+            store.finish_run("diseases", started_at, full=since is None)
+            print(f"✅ diseases: записано {count} (з {since or 'початку'})")
+
+        if "hospitals" in datasets:
+            for country in countries:
+                since = None if full or dump else modified_since(store, "hospitals", country)
+                bindings = dump_bindings(dump) if dump else paged_bindings(hospitals_query(country, since), page_size)
+                count = await ingest_hospitals(store, bindings, country, replace=since is None)
+                store.finish_run("hospitals", started_at, country, full=since is None)
+                print(f"✅ hospitals {country}: записано {count} (з {since or 'початку'})")
+
+        if "drug_disease" in datasets:
+            bindings = dump_bindings(dump) if dump else paged_bindings(drug_illness_graph_query(), page_size)
+            count = await ingest_drug_disease(store, bindings)
+            store.finish_run("drug_disease", started_at, full=True)
+            print(f"✅ drug_disease: записано {count}")
+    finally:
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Завантаження підмножин Wikidata у локальне сховище. "
+                    "Повторні запуски (наприклад, щоночі з cron) оновлюють лише змінені сутності; "
+                    "видалені у Wikidata сутності прибирає повний запуск, який робиться автоматично "
+                    "раз на INGEST_FULL_REFRESH_DAYS днів (за замовчуванням 7) або з --full. "
+                    "API читає сховище лише з LOCAL_STORE_PATH, тож --store за замовчуванням береться звідти."
+    )
+    parser.add_argument(
+        "--store", default=LOCAL_STORE_PATH, required=LOCAL_STORE_PATH is None,
+        help="шлях до SQLite-сховища; обов'язковий, якщо не задано LOCAL_STORE_PATH",
+    )
+    parser.add_argument("--dataset", action="append", choices=DATASETS, help="за замовчуванням — усі")
+    parser.add_argument("--country", action="append", help="QID країни для лікарень, можна кілька")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--full", action="store_true", help="перезавантажити набори повністю")
+    parser.add_argument("--dump", help="брати біндінги з локального JSON-файлу замість WDQS")
+    args = parser.parse_args()
+
+    if args.dump and (not args.dataset or len(args.dataset) != 1):
+        parser.error("--dump потребує рівно одного --dataset")
+    if args.dump and args.dataset == ["hospitals"] and (not args.country or len(args.country) != 1):
+        parser.error("--dump для лікарень потребує рівно однієї --country")
+
+    asyncio.run(ingest(
+        LocalStore(args.store),
+        datasets=args.dataset or DATASETS,
+        countries=args.country or DEFAULT_COUNTRIES,
+        page_size=args.page_size,
+        full=args.full,
+        dump=args.dump,
+    ))
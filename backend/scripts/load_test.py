@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import datetime
+import hashlib
+import itertools
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from backend.scripts.sparql_fixtures import FixtureServer, fixtures_dir, synthesize
+
+# Навантажувальний тест чотирьох ендпоінтів backend.main:app: SPARQL віддає локальний сервер фікстур,
+# ембедінги — маленька детермінована модель, тож результати залежать лише від коду API.
+# Звіт: p50/p95/p99 і пропускна здатність для кожного рівня конкурентності, збережені в JSON.
+
+results_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmark_results")
+
+CONCURRENCY = (1, 8, 32)
+REQUESTS = 200
+CHAT_CONDITIONS = 300
+
+
+class HashEmbeddings:
+    # Детермінована "модель": хешування слів у вектор фіксованої розмірності
+    def __init__(self, dim=64):
+        self.dim = dim
+
+    def embed_documents(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+                vectors[row, h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def synthetic_drugs(conditions=CHAT_CONDITIONS, drugs_per_condition=5, seed=0):
+    rng = np.random.default_rng(seed)
+    n = conditions * drugs_per_condition
+    condition_ids = np.repeat(np.arange(conditions), drugs_per_condition)
+    return pd.DataFrame({
+        "drug_name": [f"drug {i}" for i in range(n)],
+        "medical_condition": [f"condition {i}" for i in condition_ids],
+        "medical_condition_description": [f"symptom {i % 37} and symptom {i % 11} of organ {i % 7}" for i in condition_ids],
+        "rating": rng.uniform(0, 10, n).round(1),
+        "no_of_reviews": rng.integers(0, 500, n).astype(float),
+        "alcohol": (rng.uniform(size=n) < 0.2).astype(np.int8),
+    })
+
+
+def install_chat_resources(drugs_df):
+    # Підміняємо важкі ресурси порадника: індекси будуються з синтетичної таблиці, модель — HashEmbeddings
+    from backend import llm_adviser
+    from backend.drug_index import DrugIndex
+    from backend.lexical_index import LexicalIndex
+    from backend.retriever import NumpyRetriever, normalize
+
+    texts = list(dict.fromkeys(
+        drugs_df["medical_condition"] + " Info: " + drugs_df["medical_condition_description"]
+    ))
+    embeddings = HashEmbeddings()
+    llm_adviser.drug_index = DrugIndex.from_frame(drugs_df)
+    llm_adviser.lexical_index = LexicalIndex(texts)
+    llm_adviser.db_drugs = NumpyRetriever(embeddings, texts, vectors=normalize(embeddings.embed_documents(texts)))
+    llm_adviser.db_version = "load-test"
+
+
+def scenarios(conditions=CHAT_CONDITIONS):
+    # Кожен сценарій: номер запиту -> (метод, шлях, аргументи httpx)
+    chat_messages = [f"condition {i}" if i % 2 else f"symptom {i % 37} in organ {i % 7}" for i in range(conditions)]
+    boxes = [f"{lon},{lat},{lon + 3},{lat + 2}" for lon, lat in itertools.product(range(22, 38, 3), range(44, 51, 2))]
+    return {
+        "/api/chat": lambda i: ("POST", "/api/chat", {"json": {"message": chat_messages[i % len(chat_messages)]}}),
+        "/api/diseases": lambda i: ("GET", "/api/diseases", {
+            "params": {"offset": (i * 60) % 1800, "limit": 60, "fields": "id,name,description"}
+        }),
+        "/api/hospitals": lambda i: ("GET", "/api/hospitals", {
+            "params": {"country": "Q212", "bbox": boxes[i % len(boxes)]} if i % 2
+            else {"country": "Q212", "zoom": 6}
+        }),
+        "/api/drug-disease": lambda i: ("GET", "/api/drug-disease", {
+            "params": {"format": "compact"} if i % 4 == 0 else {"node": f"Q{300000 + i % 1000}", "depth": 2}
+        }),
+    }
+
+
+def summarize(latencies, errors, elapsed):
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+async def run_level(client, scenario, concurrency, requests):
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while (i := next(counter)) < requests:
+            method, path, kwargs = scenario(i)
+            start = time.perf_counter()
+            try:
+                ok = (await client.request(method, path, **kwargs)).status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run(client, endpoints, concurrency, requests, warmup=5):
+    table = scenarios()
+    results = []
+    print(f"{'endpoint':<20}{'conc':>6}{'p50, ms':>10}{'p95, ms':>10}{'p99, ms':>10}{'rps':>10}{'errors':>8}")
+    for endpoint in endpoints:
+        # Прогрів: перше звернення завантажує таблицю/індекс з SPARQL
+        await run_level(client, table[endpoint], 1, warmup)
+        for level in concurrency:
+            row = dict(endpoint=endpoint, concurrency=level, **await run_level(client, table[endpoint], level, requests))
+            results.append(row)
+            print(f"{endpoint:<20}{level:>6}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+                  f"{row['throughput_rps']:>10.1f}{row['errors']:>8}")
+    return results
+
+
+async def run_in_process(endpoints, concurrency, requests, fixtures=fixtures_dir):
+    from backend import sparql_queries
+    from backend.main import app
+    from backend.sparql_cache import SparqlCache
+    from backend.sparql_client import client as sparql_client
+
+    if not os.path.isdir(fixtures) or not os.listdir(fixtures):
+        synthesize(fixtures)
+    server = FixtureServer(fixtures).start()
+    install_chat_resources(synthetic_drugs())
+    with tempfile.TemporaryDirectory() as directory:
+        sparql_queries.WIKIDATA_SPARQL_URL = server.url
+        sparql_queries.local_store = None
+        sparql_queries.cache = SparqlCache(os.path.join(directory, "sparql_cache.sqlite3"))
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=60) as client:
+                return await run(client, endpoints, concurrency, requests)
+        finally:
+            await sparql_client.aclose()
+            server.stop()
+
+
+async def run_against(url, endpoints, concurrency, requests):
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        return await run(client, endpoints, concurrency, requests)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    # Зміни p95 і пропускної здатності відносно попереднього запуску
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+    print(f"\n{'endpoint':<20}{'conc':>6}{'p95 Δ':>10}{'rps Δ':>10}")
+    for row in results:
+        before = baseline.get((row["endpoint"], row["concurrency"]))
+        if before is None:
+            continue
+        p95 = (row["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+        rps = (row["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0.0
+        print(f"{row['endpoint']:<20}{row['concurrency']:>6}{p95:>+9.1f}%{rps:>+9.1f}%")
+
+
+def save(results, output, config):
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": git_commit(),
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "config": config,
+            "results": results,
+        }, f, indent=2)
+
+
+if __name__ == "__main__":
+    endpoints = list(scenarios())
+    parser = argparse.ArgumentParser(description="Навантажувальний тест API з локальними SPARQL-фікстурами")
+    parser.add_argument("--endpoint", action="append", choices=endpoints, help="за замовчуванням — усі")
+    parser.add_argument("--concurrency", type=int, action="append", help=f"за замовчуванням {CONCURRENCY}")
+    parser.add_argument("--requests", type=int, default=REQUESTS, help="запитів на кожен рівень конкурентності")
+    parser.add_argument("--url", help="тестувати запущений сервер замість застосунку в процесі")
+    parser.add_argument("--fixtures", default=fixtures_dir)
+    parser.add_argument("--output", help="JSON з результатами (за замовчуванням backend/benchmark_results/<commit>.json)")
+    parser.add_argument("--baseline", help="попередній JSON для порівняння")
+    args = parser.parse_args()
+
+    config = {
+        "endpoints": args.endpoint or endpoints,
+        "concurrency": args.concurrency or list(CONCURRENCY),
+        "requests": args.requests,
+        "target": args.url or "in-process",
+    }
+    if args.url:
+        results = asyncio.run(run_against(args.url, config["endpoints"], config["concurrency"], args.requests))
+    else:
+        results = asyncio.run(run_in_process(config["endpoints"], config["concurrency"], args.requests, args.fixtures))
+
+    output = args.output or os.path.join(results_dir, f"load_test-{git_commit() or 'local'}.json")
+    save(results, output, config)
+    print(f"\n✅ Результати збережено у {output}")
+    if args.baseline:
+        compare(results, args.baseline)
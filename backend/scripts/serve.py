@@ -0,0 +1,80 @@
+import argparse
+import os
+import signal
+import socket
+
+import uvicorn
+
+# Один процес-майстер: відкриває сокет, (за замовчуванням) один раз завантажує модель, індекс препаратів
+# і mmap-вектори, а потім робить fork воркерів. Воркери отримують усе це як спільні сторінки
+# copy-on-write; вектори й колонки препаратів і так читаються з mmap-файлів через спільний page cache.
+
+
+def preload():
+    # Токенайзери HF не переживають fork з увімкненим паралелізмом
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    # Chroma (sqlite, фонові потоки) не можна ділити між процесами — лише numpy-бекенд з mmap
+    os.environ.setdefault("RETRIEVER_BACKEND", "numpy")
+    from backend.llm_adviser import load_resources
+
+    load_resources()
+
+
+def bind(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    from backend.main import app
+
+    config = uvicorn.Config(app, lifespan="on", log_level="warning")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(host="127.0.0.1", port=8000, workers=2, preload_resources=True):
+    sock = bind(host, port)
+    if preload_resources:
+        preload()
+        print("✅ Ресурси завантажено в майстер-процесі, запускаємо воркерів")
+    # Застосунок імпортуємо до fork, щоб воркери не повторювали імпорт
+    import backend.main  # noqa: F401
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(sock)
+            finally:
+                os._exit(0)
+        children.append(pid)
+    print(f"ℹ️ Воркери: {', '.join(map(str, children))} на http://{host}:{port}")
+
+    def stop(signum, frame):
+        for child in children:
+            try:
+                os.kill(child, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for child in children:
+        os.waitpid(child, 0)
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Кілька воркерів uvicorn зі спільними завантаженими ресурсами")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--no-preload", action="store_true", help="кожен воркер завантажує ресурси сам")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, preload_resources=not args.no_preload)
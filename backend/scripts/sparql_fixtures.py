@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import httpx
+
+from backend.sparql_cache import cache_key
+from backend.sparql_client import USER_AGENT
+from backend.sparql_queries import WIKIDATA_SPARQL_URL, diseases_query, hospitals_query, drug_illness_graph_query
+
+# Локальний SPARQL-сервер для бенчмарків: віддає записані відповіді WDQS з файлів <hash запиту>.json.
+# У режимі запису невідомі запити проксіюються до WDQS і зберігаються.
+
+fixtures_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sparql")
+ENTITY = "http://www.wikidata.org/entity/"
+# Приблизні межі країн, для яких синтезуються лікарні
+COUNTRY_BOUNDS = {"Q212": (44.4, 52.3, 22.1, 40.2), "Q30": (25.0, 49.0, -124.0, -67.0), "Q183": (47.3, 55.0, 5.9, 15.0)}
+
+
+def fixture_path(directory, query):
+    return os.path.join(directory, f"{cache_key(query)}.json")
+
+
+class FixtureServer:
+    def __init__(self, directory=fixtures_dir, upstream=None):
+        self.directory = directory
+        # Якщо задано upstream — режим запису
+        self.upstream = upstream
+        self.misses = 0
+        self._server = None
+
+    def respond(self, query):
+        path = fixture_path(self.directory, query)
+        if not os.path.exists(path):
+            if self.upstream is None:
+                self.misses += 1
+                return 404, b'{"error": "no fixture for query"}'
+            response = httpx.get(self.upstream, params={"format": "json", "query": query},
+                                 headers={"User-Agent": USER_AGENT}, timeout=120)
+            if response.status_code != 200:
+                return response.status_code, response.content
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(response.content)
+        with open(path, "rb") as f:
+            return 200, f.read()
+
+    def start(self, host="127.0.0.1", port=0):
+        fixtures = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query).get("query", [""])[0]
+                status, body = fixtures.respond(query)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/sparql-results+json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/sparql"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def literal(value):
+    return {"type": "literal", "value": value}
+
+
+def uri(value):
+    return {"type": "uri", "value": value}
+
+
+def results(bindings):
+    return {"head": {"vars": sorted({name for b in bindings for name in b})}, "results": {"bindings": bindings}}
+
+
+def synthetic_diseases(rng, count):
+    bindings = []
+    symptoms = [f"symptom {i}" for i in range(60)]
+    for i in range(count):
+        base = {
+            "disease": uri(f"{ENTITY}Q{100000 + i}"),
+            "diseaseLabel": literal(f"Disease {i}"),
+            "description": literal(f"synthetic disease number {i} with {rng.choice(symptoms)}"),
+            "icd10": literal(f"A{i % 100:02d}.{i % 10}"),
+            "causeLabel": literal(rng.choice(["virus", "bacteria", "genetics", "unknown"])),
+            "treatmentLabel": literal(f"drug {rng.randrange(count)}"),
+        }
+        for symptom in rng.sample(symptoms, 3):
+            bindings.append(dict(base, symptomLabel=literal(symptom)))
+    return results(bindings)
+
+
+def synthetic_hospitals(rng, country, count):
+    min_lat, max_lat, min_lon, max_lon = COUNTRY_BOUNDS.get(country, (-60, 70, -180, 180))
+    return results([
+        {
+            "hospital": uri(f"{ENTITY}Q{200000 + i}"),
+            "hospitalLabel": literal(f"Hospital {country}-{i}"),
+            "geo": literal(f"Point({rng.uniform(min_lon, max_lon):.5f} {rng.uniform(min_lat, max_lat):.5f})"),
+            "hospitalDescription": literal("hospital"),
+        }
+        for i in range(count)
+    ])
+
+
+def synthetic_graph(rng, diseases, drugs_per_disease):
+    bindings = []
+    for i in range(diseases):
+        disease = f"{ENTITY}Q{300000 + i}"
+        bindings.append({"item": uri(disease), "itemLabel": literal(f"disease {i}"), "rgb": literal("FFA500")})
+        for _ in range(drugs_per_disease):
+            drug = rng.randrange(diseases * 2)
+            bindings.append({"item": uri(f"{ENTITY}Q{400000 + drug}"), "itemLabel": literal(f"drug {drug}"),
+                             "rgb": literal("7FFF00"), "link": uri(disease)})
+    return results(bindings)
+
+
+def synthesize(directory=fixtures_dir, diseases=2000, hospitals=3000, graph=1000, countries=tuple(COUNTRY_BOUNDS), seed=0):
+    # Детерміновані фікстури для поточних запитів API, щоб бенчмарк працював офлайн
+    rng = random.Random(seed)
+    fixtures = {diseases_query(): synthetic_diseases(rng, diseases),
+                drug_illness_graph_query(): synthetic_graph(rng, graph, 3)}
+    for country in countries:
+        fixtures[hospitals_query(country)] = synthetic_hospitals(rng, country, hospitals)
+
+    os.makedirs(directory, exist_ok=True)
+    for query, payload in fixtures.items():
+        with open(fixture_path(directory, query), "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+    return len(fixtures)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Фікстури SPARQL для бенчмарків")
+    parser.add_argument("command", choices=("synthesize", "record", "serve"))
+    parser.add_argument("--dir", default=fixtures_dir)
+    parser.add_argument("--port", type=int, default=8890)
+    parser.add_argument("--country", action="append", help="QID країни для запису лікарень")
+    args = parser.parse_args()
+
+    if args.command == "synthesize":
+        print(f"✅ Створено {synthesize(args.dir)} фікстур у {args.dir}")
+    elif args.command == "record":
+        # Проганяємо ті самі запити, що й API, через живий WDQS і зберігаємо відповіді
+        recorder = FixtureServer(args.dir, upstream=WIKIDATA_SPARQL_URL)
+        queries = [diseases_query(), drug_illness_graph_query()]
+        queries += [hospitals_query(country) for country in args.country or COUNTRY_BOUNDS]
+        for query in queries:
+            status, _ = recorder.respond(query)
+            print(f"{'✅' if status == 200 else '❌'} {cache_key(query)[:12]}: {status}")
+    else:
+        server = FixtureServer(args.dir).start(port=args.port)
+        print(f"ℹ️ SPARQL-фікстури на {server.url}")
+        threading.Event().wait()
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+
+from backend.sparql_client import client, background_priority
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+
+SPARQL_CACHE_PATH = os.getenv("SPARQL_CACHE_PATH", os.path.join(project_root, "sparql_cache.sqlite3"))
+# Скільки секунд відповідь вважається свіжою
+SPARQL_CACHE_TTL = float(os.getenv("SPARQL_CACHE_TTL", str(24 * 3600)))
+# Скільки ще секунд після TTL можна віддавати застарілу відповідь, оновлюючи її у фоні
+SPARQL_CACHE_MAX_STALE = float(os.getenv("SPARQL_CACHE_MAX_STALE", str(7 * 24 * 3600)))
+# Скільки елементів списку пишеться в SQLite за один executemany
+CACHE_WRITE_BATCH = int(os.getenv("SPARQL_CACHE_WRITE_BATCH", "1000"))
+
+
+def cache_key(query, **params):
+    payload = json.dumps({"query": query, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SparqlCache:
+    def __init__(self, path=SPARQL_CACHE_PATH, ttl=SPARQL_CACHE_TTL, max_stale=SPARQL_CACHE_MAX_STALE):
+        self.path = path
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            # Списки (хвороби, лікарні, рядки графа) зберігаються по рядку на елемент, тож ні запис,
+            # ні читання не будують JSON усієї відповіді одним рядком
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    created REAL NOT NULL,
+                    version TEXT NOT NULL,
+                    is_list INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS entry_rows (
+                    key TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (key, position)
+                );
+            """)
+        return self._conn
+
+    def get(self, key):
+        # Рядки декодуються по одному прямо з курсора — без проміжного JSON усієї відповіді
+        with self._lock:
+            conn = self._connection()
+            entry = conn.execute("SELECT created, is_list FROM entries WHERE key = ?", (key,)).fetchone()
+            if entry is None:
+                return None
+            values = [
+                json.loads(payload) for (payload,) in
+                conn.execute("SELECT value FROM entry_rows WHERE key = ? ORDER BY position", (key,))
+            ]
+        created, is_list = entry
+        return (values if is_list else values[0]), created
+
+    def meta(self, key):
+        # (час створення, версія) без читання самого значення
+        with self._lock:
+            return self._connection().execute(
+                "SELECT created, version FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+    def set(self, key, value, created=None):
+        # value — список або ітератор (пишеться потоком, пачками по CACHE_WRITE_BATCH), або одне значення
+        is_list = isinstance(value, (list, Iterator))
+        digest = hashlib.blake2b(digest_size=8)
+
+        def rows():
+            for position, item in enumerate(value if is_list else [value]):
+                payload = json.dumps(item, ensure_ascii=False)
+                digest.update(payload.encode("utf-8"))
+                digest.update(b"\n")
+                yield key, position, payload
+
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM entry_rows WHERE key = ?", (key,))
+                batches = rows()
+                while batch := list(itertools.islice(batches, CACHE_WRITE_BATCH)):
+                    conn.executemany("INSERT INTO entry_rows (key, position, value) VALUES (?, ?, ?)", batch)
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, created, version, is_list) VALUES (?, ?, ?, ?)",
+                    (key, time.time() if created is None else created, digest.hexdigest(), int(is_list))
+                )
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM entries")
+                conn.execute("DELETE FROM entry_rows")
+
+    def stats(self):
+        return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses}
+
+    async def get_or_fetch(self, key, fetch, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        entry = await asyncio.to_thread(self.get, key)
+        if entry is not None:
+            value, created = entry
+            age = time.time() - created
+            if age < ttl:
+                self.hits += 1
+                return value
+            if age < ttl + self.max_stale:
+                # Віддаємо застаріле одразу, а свіже підтягуємо у фоні
+                self.stale_hits += 1
+                self.refresh_in_background(key, fetch)
+                return value
+
+        self.misses += 1
+        return await asyncio.shield(self._begin(key, fetch))
+
+    async def version(self, key, fetch, ttl=None):
+        # Версія значення (хеш, порахований під час запису) для ETag: свіжість — як у get_or_fetch,
+        # але збережене значення не читається і не розбирається
+        ttl = self.ttl if ttl is None else ttl
+        meta = await asyncio.to_thread(self.meta, key)
+        if meta is not None:
+            created, version = meta
+            age = time.time() - created
+            if age < ttl:
+                return version
+            if age < ttl + self.max_stale:
+                self.refresh_in_background(key, fetch)
+                return version
+        await self.get_or_fetch(key, fetch, ttl)
+        return (await asyncio.to_thread(self.meta, key))[1]
+
+    def refresh_in_background(self, key, fetch):
+        # Фонове оновлення стоїть у черзі до WDQS після запитів, на які чекають користувачі
+        with background_priority():
+            task = self._begin(key, fetch)
+        # Помилка фонового оновлення не має значення — лишається застаріла відповідь
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    def _begin(self, key, fetch):
+        # Single-flight: на один ключ у польоті лише одне звернення до джерела і один запис у кеш.
+        # Спільну задачу веде клієнт WDQS, бо він же керує її пріоритетом у черзі
+        return client.shared(("cache", self.path, key), lambda: self._run(key, fetch))
+
+    async def _run(self, key, fetch):
+        value = await fetch()
+        await asyncio.to_thread(self.set, key, value)
+        if isinstance(value, Iterator):
+            # Ітератор уже вичерпано записом у кеш — значення читаємо назад по рядку
+            value = (await asyncio.to_thread(self.get, key))[0]
+        return value
@@ -0,0 +1,344 @@
+import asyncio
+import contextvars
+import email.utils
+import heapq
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+
+from backend.sparql_stream import BindingsParser, BindingsParseError, JSON_DECODE_ERROR
+from backend.metrics import observe_stage, upstream_seconds, upstream_retries
+
+SPARQL_TIMEOUT = float(os.getenv("SPARQL_TIMEOUT", "60"))
+SPARQL_MAX_CONNECTIONS = int(os.getenv("SPARQL_MAX_CONNECTIONS", "10"))
+# Скільки запитів одночасно може летіти до WDQS
+SPARQL_MAX_CONCURRENCY = int(os.getenv("SPARQL_MAX_CONCURRENCY", "4"))
+# Скільки запитів може чекати на вільний слот; понад це — відмова з 503 замість черги, що росте
+SPARQL_MAX_QUEUE = int(os.getenv("SPARQL_MAX_QUEUE", "16"))
+# Початкова оцінка тривалості запиту до WDQS (секунди) для Retry-After, далі — ковзне середнє
+SPARQL_EXPECTED_SECONDS = float(os.getenv("SPARQL_EXPECTED_SECONDS", "5"))
+SPARQL_MAX_RETRIES = int(os.getenv("SPARQL_MAX_RETRIES", "3"))
+SPARQL_BACKOFF = float(os.getenv("SPARQL_BACKOFF", "1"))
+SPARQL_MAX_BACKOFF = float(os.getenv("SPARQL_MAX_BACKOFF", "30"))
+
+USER_AGENT = f"WDQS-openLinkedData Python/{sys.version_info[0]}.{sys.version_info[1]}"
+
+
+# Менше значення — вищий пріоритет у черзі до WDQS
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# Пріоритет запитів поточної задачі; фонові оновлення й передзавантаження виставляють PRIORITY_BACKGROUND
+upstream_priority = contextvars.ContextVar("upstream_priority", default=PRIORITY_INTERACTIVE)
+
+
+class SharedPriority:
+    # Пріоритет спільної задачі (однакові запити в польоті): кожен, хто приєднується, може лише підняти його.
+    # queue — черга допуску, в якій задача зараз чекає на слот
+    def __init__(self, value):
+        self.value = value
+        self.queue = None
+
+    def promote(self, value):
+        if value < self.value:
+            self.value = value
+            if self.queue is not None:
+                self.queue.reorder()
+
+
+def priority_level(priority):
+    return priority.value if isinstance(priority, SharedPriority) else priority
+
+
+@contextmanager
+def background_priority():
+    # Задачі, створені всередині, успадковують фоновий пріоритет (asyncio копіює контекст при створенні)
+    token = upstream_priority.set(PRIORITY_BACKGROUND)
+    try:
+        yield
+    finally:
+        upstream_priority.reset(token)
+
+
+class SparqlError(Exception):
+    pass
+
+
+class SparqlOverloaded(SparqlError):
+    # Черга до WDQS переповнена; retry_after — через скільки секунд варто спробувати знову
+    def __init__(self, retry_after):
+        super().__init__(f"Too many pending WDQS queries, retry in {retry_after} s")
+        self.retry_after = retry_after
+
+
+def retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - time.time())
+
+
+class AdmissionQueue:
+    # Не більше max_concurrency запитів одночасно; решта чекає в черзі за пріоритетом (у межах
+    # пріоритету — за часом приходу). Коли в черзі вже max_queue запитів, новий відхиляється одразу
+    def __init__(self, max_concurrency, max_queue, expected_seconds=SPARQL_EXPECTED_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.avg_seconds = expected_seconds
+        self.active = 0
+        self.shed = 0
+        self._waiters = []
+        self._order = itertools.count()
+
+    def stats(self):
+        return {"active": self.active, "queued": len(self._waiters), "shed": self.shed}
+
+    def retry_after(self):
+        # Скільки "хвиль" запитів попереду, помножене на середню тривалість запиту
+        waves = (len(self._waiters) + self.active) / self.max_concurrency
+        return max(1, math.ceil(waves * self.avg_seconds))
+
+    def observe(self, seconds):
+        # Ковзне середнє тривалості запиту до WDQS — лише час самого запиту, без пауз між повторами
+        # і без часу, поки споживач читає тіло
+        self.avg_seconds += 0.2 * (seconds - self.avg_seconds)
+
+    @asynccontextmanager
+    async def slot(self, priority=PRIORITY_INTERACTIVE):
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def reorder(self):
+        # Пріоритет когось із тих, хто чекає, піднявся
+        for entry in self._waiters:
+            entry[0] = priority_level(entry[3])
+        heapq.heapify(self._waiters)
+
+    async def _acquire(self, priority):
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            raise SparqlOverloaded(self.retry_after())
+
+        entry = [priority_level(priority), next(self._order), asyncio.get_running_loop().create_future(), priority]
+        heapq.heappush(self._waiters, entry)
+        if isinstance(priority, SharedPriority):
+            priority.queue = self
+        try:
+            await entry[2]
+        except asyncio.CancelledError:
+            if entry[2].done() and not entry[2].cancelled():
+                # Слот уже передали цьому запиту, але він скасований — віддаємо наступному
+                self._release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+        finally:
+            if isinstance(priority, SharedPriority):
+                priority.queue = None
+
+    def _release(self):
+        # Слот переходить до першого в черзі, не звільняючись
+        while self._waiters:
+            waiter = heapq.heappop(self._waiters)[2]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class SparqlClient:
+    # Один пул з'єднань (keep-alive) на процес, черга допуску з обмеженою кількістю одночасних запитів,
+    # об'єднання однакових запитів у польоті (shared), тайм-аути і повтори з експоненційною затримкою на 429/5xx
+    def __init__(self, timeout=SPARQL_TIMEOUT, max_connections=SPARQL_MAX_CONNECTIONS,
+                 max_concurrency=SPARQL_MAX_CONCURRENCY, max_queue=SPARQL_MAX_QUEUE, max_retries=SPARQL_MAX_RETRIES,
+                 backoff=SPARQL_BACKOFF, max_backoff=SPARQL_MAX_BACKOFF, transport=None):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.transport = transport
+        self.coalesced = 0
+        self._client = None
+        self._admission = None
+        self._inflight = {}
+        self._loop = None
+
+    def _session(self):
+        # httpx-клієнт, черга допуску і задачі в польоті прив'язані до event loop, тож створюємо їх для поточного
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            if self._client is not None:
+                self._close_on_loop(self._client, self._loop)
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                headers={"User-Agent": USER_AGENT, "Accept": "application/sparql-results+json"},
+                transport=self.transport,
+            )
+            self._admission = AdmissionQueue(self.max_concurrency, self.max_queue)
+            self._inflight = {}
+            self._loop = loop
+        return self._client, self._admission
+
+    @staticmethod
+    def _close_on_loop(client, loop):
+        # З'єднання пулу належать старому циклу, тож закривати їх треба там. Якщо цикл уже закритий,
+        # aclose неможливий — сокети звільнить збирач сміття разом із клієнтом
+        if loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(lambda: loop.create_task(client.aclose()))
+        except RuntimeError:
+            pass
+
+    def stats(self):
+        stats = self._admission.stats() if self._admission is not None else {"active": 0, "queued": 0, "shed": 0}
+        return dict(stats, coalesced=self.coalesced)
+
+    def shared(self, key, fetch):
+        # Однакові запити в польоті ділять одну задачу (єдиний рівень single-flight, ним користується і SparqlCache).
+        # Задача чекає в черзі з найвищим пріоритетом серед тих, хто на неї чекає: інтерактивний запит,
+        # що приєднався до фонового оновлення, піднімає його пріоритет
+        self._session()
+        priority = priority_level(upstream_priority.get())
+        flight = self._inflight.get(key)
+        if flight is None:
+            shared_priority = SharedPriority(priority)
+            token = upstream_priority.set(shared_priority)
+            try:
+                task = asyncio.ensure_future(fetch())
+            finally:
+                upstream_priority.reset(token)
+            self._inflight[key] = (task, shared_priority)
+            task.add_done_callback(lambda t: self._forget(key, t))
+            return task
+        task, shared_priority = flight
+        shared_priority.promote(priority)
+        self.coalesced += 1
+        return task
+
+    def _forget(self, key, task):
+        flight = self._inflight.get(key)
+        if flight is not None and flight[0] is task:
+            del self._inflight[key]
+
+    def retry_delay(self, attempt, response=None):
+        delay = retry_after_seconds(response) if response is not None else None
+        if delay is None:
+            delay = self.backoff * (2 ** attempt)
+        return min(delay, self.max_backoff)
+
+    @asynccontextmanager
+    async def open(self, url, query, name="query"):
+        # Відкриває потокову відповідь зі статусом 200; повтори — лише до початку читання тіла.
+        # name — мітка запиту в метриках (diseases, hospitals, ...)
+        client, admission = self._session()
+        priority = upstream_priority.get()
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            # Слот тримається лише на час спроби: пауза перед повтором не займає місце інших запитів до WDQS
+            async with admission.slot(priority):
+                start = time.perf_counter()
+                try:
+                    request = client.build_request("GET", url, params={"format": "json", "query": query})
+                    response = await client.send(request, stream=True)
+                except httpx.TransportError as e:
+                    upstream_seconds.observe(time.perf_counter() - start, name, "error")
+                    if last_attempt:
+                        raise SparqlError(f"Request to {url} failed: {e}") from e
+                    delay = self.retry_delay(attempt)
+                else:
+                    elapsed = time.perf_counter() - start
+                    upstream_seconds.observe(elapsed, name, str(response.status_code))
+                    admission.observe(elapsed)
+
+                    if (response.status_code == 429 or response.status_code >= 500) and not last_attempt:
+                        await response.aclose()
+                        delay = self.retry_delay(attempt, response)
+                    else:
+                        try:
+                            if response.status_code != 200:
+                                await response.aread()
+                                raise SparqlError(f"Error {response.status_code}: {response.text}")
+                            yield response
+                        finally:
+                            await response.aclose()
+                        return
+            upstream_retries.inc(name)
+            await asyncio.sleep(delay)
+
+    async def query(self, url, query, name="query"):
+        start = time.perf_counter()
+        async with self.open(url, query, name) as response:
+            try:
+                body = await response.aread()
+            except httpx.HTTPError as e:
+                raise SparqlError(f"Request to {url} failed while reading the response: {e}") from e
+        parse_start = time.perf_counter()
+        observe_stage(f"sparql.{name}.network", parse_start - start)
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise SparqlError(JSON_DECODE_ERROR)
+        finally:
+            observe_stage(f"sparql.{name}.parse", time.perf_counter() - parse_start)
+
+    async def stream_bindings(self, url, query, name="query"):
+        # Мережа і розбір чергуються; час розбору рахуємо окремо, решта — очікування мережі.
+        # Час споживача між біндінгами сюди не входить
+        network = parse = 0.0
+        async with self.open(url, query, name) as response:
+            parser = BindingsParser()
+            mark = time.perf_counter()
+            try:
+                async for text in response.aiter_text():
+                    now = time.perf_counter()
+                    network += now - mark
+                    bindings = parser.feed(text)
+                    mark = time.perf_counter()
+                    parse += mark - now
+                    for binding in bindings:
+                        yield binding
+                    mark = time.perf_counter()
+                parser.close()
+            except httpx.HTTPError as e:
+                # Обрив з'єднання чи тайм-аут посеред тіла — повторювати вже пізно, але помилка та сама, що й до нього
+                raise SparqlError(f"Request to {url} failed while reading the response: {e}") from e
+            except BindingsParseError as e:
+                raise SparqlError(str(e)) from e
+            finally:
+                observe_stage(f"sparql.{name}.network", network)
+                observe_stage(f"sparql.{name}.parse", parse)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+client = SparqlClient()
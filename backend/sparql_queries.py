@@ -1,30 +1,50 @@
-import requests
-from SPARQLWrapper import SPARQLWrapper, JSON
+import asyncio
+import os
 import sys
 
+from backend.sparql_cache import SparqlCache, cache_key
+from backend.sparql_client import client
+from backend.local_store import local_store
+from backend.metrics import timed, timed_function
+
 
 WIKIDATA_SPARQL_URL = "https://query.wikidata.org/sparql"
 
+# TTL кешу для кожного запиту окремо (секунди); за замовчуванням — SPARQL_CACHE_TTL
+DISEASES_CACHE_TTL = float(os.getenv("DISEASES_CACHE_TTL", "0")) or None
+HOSPITALS_CACHE_TTL = float(os.getenv("HOSPITALS_CACHE_TTL", "0")) or None
+GRAPH_CACHE_TTL = float(os.getenv("GRAPH_CACHE_TTL", "0")) or None
+
+cache = SparqlCache()
+
 
-def get_diseases_from_wikidata():
-    query = """
+def modified_filter(var, since=None):
+    # Для інкрементального оновлення: лише сутності, змінені після мітки часу
+    if since is None:
+        return ""
+    return f'?{var} schema:dateModified ?modified. FILTER(?modified >= "{since}"^^xsd:dateTime)'
+
+
+def diseases_query(modified_since=None):
+    return f"""
                SELECT DISTINCT ?disease ?diseaseLabel ?description ?icd10 ?subclassOfLabel 
            ?causeLabel ?fatalityRate ?diagnosticMethodLabel ?treatmentLabel ?symptomLabel 
-           ?relatedGeneLabel WHERE {
+           ?relatedGeneLabel WHERE {{
           ?disease wdt:P31 wd:Q12136.  
+          {modified_filter("disease", modified_since)}
           
          
           ?disease wdt:P780 ?symptom.
           ?disease wdt:P2176 ?treatment.
           ?disease wdt:P828 ?cause.
-          OPTIONAL { ?disease wdt:P1995 ?icd10. } 
-          OPTIONAL { ?disease wdt:P279 ?subclassOf. }  
-          OPTIONAL { ?disease wdt:P828 ?cause. }  
-          OPTIONAL { ?disease wdt:P1193 ?fatalityRate. }  
-          OPTIONAL { ?disease wdt:P2176 ?treatment. }  
-          OPTIONAL { ?disease schema:description ?description. FILTER (LANG(?description) = "en") }
+          OPTIONAL {{ ?disease wdt:P1995 ?icd10. }} 
+          OPTIONAL {{ ?disease wdt:P279 ?subclassOf. }}  
+          OPTIONAL {{ ?disease wdt:P828 ?cause. }}  
+          OPTIONAL {{ ?disease wdt:P1193 ?fatalityRate. }}  
+          OPTIONAL {{ ?disease wdt:P2176 ?treatment. }}  
+          OPTIONAL {{ ?disease schema:description ?description. FILTER (LANG(?description) = "en") }}
         
-          SERVICE wikibase:label { 
+          SERVICE wikibase:label {{ 
             bd:serviceParam wikibase:language "en".  
             ?disease rdfs:label ?diseaseLabel.
             ?subclassOf rdfs:label ?subclassOfLabel.
@@ -33,74 +53,93 @@ def get_diseases_from_wikidata():
             ?diagnosticMethod rdfs:label ?diagnosticMethodLabel.
             ?treatment rdfs:label ?treatmentLabel.
             ?relatedGene rdfs:label ?relatedGeneLabel.
-          }
-        }
+          }}
+        }}
     
     """
 
-    response = requests.get(WIKIDATA_SPARQL_URL, params={"format": "json", "query": query})
 
-    if response.status_code != 200:
-        raise Exception(f"Error {response.status_code}: {response.text}")
+async def get_diseases_from_wikidata():
+    if local_store is not None and local_store.has("diseases"):
+        return await asyncio.to_thread(local_store.load, "diseases")
 
-    try:
-        data = response.json()
-    except requests.exceptions.JSONDecodeError:
-        raise Exception("Ошибка декодирования JSON. Возможно, сервер вернул пустой ответ.")
+    query = diseases_query()
+    return await cache.get_or_fetch(cache_key(query), lambda: fetch_diseases(query), ttl=DISEASES_CACHE_TTL)
+
+
+@timed_function("sparql.diseases.fetch")
+async def fetch_diseases(query):
+    # Біндінги розбираються потоком і одразу згортаються в записи хвороб —
+    # сира відповідь цілком у пам'яті не тримається. Записи віддаються ітератором: кеш пише їх у SQLite
+    # по одному, поки агрегатор звільняє свої множини, тож другого повного списку в пам'яті не буває
+    diseases = DiseaseAggregator()
+    async for item in client.stream_bindings(WIKIDATA_SPARQL_URL, query, name="diseases"):
+        diseases.add(item)
+    return diseases.iter_records()
+
+
+# Поля-списки: ім'я в записі -> змінна SPARQL
+DISEASE_LIST_FIELDS = {
+    "causes": "causeLabel",
+    "symptoms": "symptomLabel",
+    "diagnostic_methods": "diagnosticMethodLabel",
+    "treatments": "treatmentLabel",
+    "related_genes": "relatedGeneLabel",
+}
 
-    diseases_dict = {}
 
-    for item in data["results"]["bindings"]:
-        disease_id = item["disease"]["value"].split("/")[-1]
-        disease_url = f"https://www.wikidata.org/wiki/{disease_id}"  # Генерируем ссылку
+class DiseaseRecord:
+    __slots__ = ("fields", "lists")
 
+    def __init__(self, fields):
+        self.fields = fields
+        self.lists = {name: set() for name in DISEASE_LIST_FIELDS}
+
+    def as_dict(self):
+        record = dict(self.fields)
+        for name, values in self.lists.items():
+            record[name] = list(values)
+        return record
+
+
+class DiseaseAggregator:
+    def __init__(self):
+        self.diseases = {}
+
+    def add(self, item):
         disease_name = item["diseaseLabel"]["value"]
+        record = self.diseases.get(disease_name)
 
-        if disease_name not in diseases_dict:
-            diseases_dict[disease_name] = {
+        if record is None:
+            disease_id = item["disease"]["value"].split("/")[-1]
+            record = self.diseases[disease_name] = DiseaseRecord({
                 "id": disease_id,
                 "name": disease_name.lower(),
-                "url": disease_url,
+                "url": f"https://www.wikidata.org/wiki/{disease_id}",  # Генерируем ссылку
                 "description": item.get("description", {}).get("value", "No description available"),
                 "icd10": item.get("icd10", {}).get("value", "N/A"),
                 "subclass_of": item.get("subclassOfLabel", {}).get("value", "Unknown"),
-                "causes": set(),
-                "symptoms": set(),
                 "fatality_rate": item.get("fatalityRate", {}).get("value", "N/A"),
-                "diagnostic_methods": set(),
-                "treatments": set(),
-                "related_genes": set(),
-            }
-
-        # Добавляем множественные значения в `set()`
-        if "causeLabel" in item:
-            diseases_dict[disease_name]["causes"].add(item["causeLabel"]["value"])
-        if "symptomLabel" in item:
-            diseases_dict[disease_name]["symptoms"].add(item["symptomLabel"]["value"])
-        if "diagnosticMethodLabel" in item:
-            diseases_dict[disease_name]["diagnostic_methods"].add(item["diagnosticMethodLabel"]["value"])
-        if "treatmentLabel" in item:
-            diseases_dict[disease_name]["treatments"].add(item["treatmentLabel"]["value"])
-        if "relatedGeneLabel" in item:
-            diseases_dict[disease_name]["related_genes"].add(item["relatedGeneLabel"]["value"])
-
-    # Преобразуем множества в списки для удобства
-    for disease in diseases_dict.values():
-        disease["causes"] = list(disease["causes"])
-        disease["symptoms"] = list(disease["symptoms"])
-        disease["diagnostic_methods"] = list(disease["diagnostic_methods"])
-        disease["treatments"] = list(disease["treatments"])
-        disease["related_genes"] = list(disease["related_genes"])
-
-    return list(diseases_dict.values())
-
-
-def get_hospitals_from_wikidata(country_code):
-    query = f"""
+            })
+
+        # Мітки на кшталт "fever" повторюються в сотнях хвороб — інтернуємо їх
+        for name, var in DISEASE_LIST_FIELDS.items():
+            if var in item:
+                record.lists[name].add(sys.intern(item[var]["value"]))
+
+    def iter_records(self):
+        # Перетворюємо записи у словники по одному, звільняючи проміжні множини
+        for name in list(self.diseases):
+            yield self.diseases.pop(name).as_dict()
+
+
+def hospitals_query(country_code, modified_since=None):
+    return f"""
     SELECT DISTINCT ?hospital ?hospitalLabel ?geo ?hospitalDescription ?website ?wikiImportURL ?image ?address WHERE {{
       ?hospital wdt:P31/wdt:P279* wd:Q16917;  # Тип - больница
                 wdt:P625 ?geo;  # Географические координаты
                 wdt:P17 wd:{country_code}.  # Фильтр по стране
+      {modified_filter("hospital", modified_since)}
       OPTIONAL {{ ?hospital schema:description ?hospitalDescription. FILTER(LANG(?hospitalDescription) = "en") }}  # Описание
       OPTIONAL {{ ?hospital wdt:P856 ?website. }}  # Официальный сайт
       OPTIONAL {{ ?hospital wdt:P4656 ?wikiImportURL. }}  # URL из Wikimedia import
@@ -109,44 +148,67 @@ def get_hospitals_from_wikidata(country_code):
 
       SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
     }}
-    LIMIT 500
     """
-    user_agent = "WDQS-Hospital-Map Python/%s.%s" % (sys.version_info[0], sys.version_info[1])
-    sparql = SPARQLWrapper(WIKIDATA_SPARQL_URL, agent=user_agent)
-    sparql.setQuery(query)
-    sparql.setReturnFormat(JSON)
-    results = sparql.query().convert()
-
-    hospitals = []
-    for item in results["results"]["bindings"]:
-        coordinates = item["geo"]["value"].replace("Point(", "").replace(")", "").split(" ")
-        latitude, longitude = float(coordinates[1]), float(coordinates[0])
 
-        image_url = None
-        if "image" in item:
-            image_name = item["image"]["value"].split("/")[-1]  # Получаем имя файла
-            image_url = f"https://commons.wikimedia.org/wiki/Special:FilePath/{image_name}"  # Формируем URL
 
-        # Додаємо адресу, якщо вона є, або координати
-        address = item.get("address", {}).get("value", f"Coordinates: {latitude}, {longitude}")
+async def get_hospitals_from_wikidata(country_code):
+    if local_store is not None and local_store.has("hospitals", country_code):
+        return await asyncio.to_thread(local_store.load, "hospitals", country_code)
+
+    query = hospitals_query(country_code)
+    return await cache.get_or_fetch(
+        cache_key(query, country=country_code),
+        lambda: fetch_hospitals(query),
+        ttl=HOSPITALS_CACHE_TTL
+    )
 
-        hospitals.append({
-            "name": item["hospitalLabel"]["value"],
-            "latitude": latitude,
-            "longitude": longitude,
-            "description": item.get("hospitalDescription", {}).get("value", "No description available"),
-            "website": item.get("website", {}).get("value", None),
-            "wikimedia_url": item.get("wikiImportURL", {}).get("value", None),
-            "wikidata_url": f"https://www.wikidata.org/wiki/{item['hospital']['value'].split('/')[-1]}",
-            "image": image_url,
-            "address": address
-        })
 
-    return hospitals
+@timed_function("sparql.hospitals.fetch")
+async def fetch_hospitals(query):
+    # Без LIMIT: повний набір по країні читається потоком; OPTIONAL-поля можуть
+    # дублювати рядки, тож лишаємо перший запис кожної лікарні
+    hospitals = {}
+    async for item in client.stream_bindings(WIKIDATA_SPARQL_URL, query, name="hospitals"):
+        hospital_id = item["hospital"]["value"].split("/")[-1]
+        if hospital_id not in hospitals:
+            hospital = parse_hospital(item)
+            if hospital is not None:
+                hospitals[hospital_id] = hospital
+    return list(hospitals.values())
 
 
-def get_drug_illness_graph():
-    query = """
+def parse_hospital(item):
+    coordinates = item["geo"]["value"].split("Point(")[-1].replace(")", "").split(" ")
+    try:
+        latitude, longitude = float(coordinates[1]), float(coordinates[0])
+    except (IndexError, ValueError):
+        return None
+
+    image_url = None
+    if "image" in item:
+        image_name = item["image"]["value"].split("/")[-1]  # Получаем имя файла
+        image_url = f"https://commons.wikimedia.org/wiki/Special:FilePath/{image_name}"  # Формируем URL
+
+    # Додаємо адресу, якщо вона є, або координати
+    address = item.get("address", {}).get("value", f"Coordinates: {latitude}, {longitude}")
+    hospital_id = item["hospital"]["value"].split("/")[-1]
+
+    return {
+        "id": hospital_id,
+        "name": item["hospitalLabel"]["value"],
+        "latitude": latitude,
+        "longitude": longitude,
+        "description": item.get("hospitalDescription", {}).get("value", "No description available"),
+        "website": item.get("website", {}).get("value", None),
+        "wikimedia_url": item.get("wikiImportURL", {}).get("value", None),
+        "wikidata_url": f"https://www.wikidata.org/wiki/{hospital_id}",
+        "image": image_url,
+        "address": address
+    }
+
+
+def drug_illness_graph_query():
+    return """
         SELECT DISTINCT ?item ?itemLabel ?rgb ?link
         WHERE
         {
@@ -164,19 +226,42 @@ def get_drug_illness_graph():
           BIND(IF(?toggle,"",?disease) AS ?link).
         }
         """
-    user_agent = f"WDQS-example Python/{sys.version_info[0]}.{sys.version_info[1]}"
-    sparql = SPARQLWrapper(WIKIDATA_SPARQL_URL, agent=user_agent)
-    sparql.setQuery(query)
-    sparql.setReturnFormat(JSON)
-    results = sparql.query().convert()
 
-    data = [
-        {
-            "item": res["item"]["value"],
-            "label": res["itemLabel"]["value"],
-            "color": res["rgb"]["value"],
-            "link": res.get("link", {}).get("value", "")
-        }
-        for res in results["results"]["bindings"]
-    ]
+
+async def get_drug_illness_graph():
+    if local_store is not None and local_store.has("drug_disease"):
+        return await asyncio.to_thread(local_store.load, "drug_disease")
+
+    query = drug_illness_graph_query()
+    return await cache.get_or_fetch(cache_key(query), lambda: fetch_drug_illness_graph(query), ttl=GRAPH_CACHE_TTL)
+
+
+async def get_drug_illness_graph_version():
+    # Версія того, що поверне get_drug_illness_graph(), без читання самих рядків
+    if local_store is not None and local_store.has("drug_disease"):
+        # Граф у сховищі щоразу перезаписується повністю, тож час запуску однозначно визначає дані
+        return "local-" + await asyncio.to_thread(local_store.last_run, "drug_disease")
+
+    query = drug_illness_graph_query()
+    return await cache.version(cache_key(query), lambda: fetch_drug_illness_graph(query), ttl=GRAPH_CACHE_TTL)
+
+
+@timed_function("sparql.drug_disease.fetch")
+async def fetch_drug_illness_graph(query):
+    results = await client.query(WIKIDATA_SPARQL_URL, query, name="drug_disease")
+    with timed("sparql.drug_disease.rows"):
+        return parse_drug_illness_graph(results)
+
+
+def parse_graph_row(res):
+    return {
+        "item": res["item"]["value"],
+        "label": res["itemLabel"]["value"],
+        "color": res["rgb"]["value"],
+        "link": res.get("link", {}).get("value", "")
+    }
+
+
+def parse_drug_illness_graph(results):
+    data = [parse_graph_row(res) for res in results["results"]["bindings"]]
     return data
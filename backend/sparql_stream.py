@@ -0,0 +1,107 @@
+import json
+import re
+
+BINDINGS_START = re.compile(r'"bindings"\s*:\s*\[')
+
+JSON_DECODE_ERROR = "Ошибка декодирования JSON. Возможно, сервер вернул пустой ответ."
+
+
+class BindingsParseError(ValueError):
+    pass
+
+
+# Символи, що змінюють вкладеність, поза рядками та всередині рядка
+STRUCTURE = re.compile(r'["{}\[\]]')
+STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class BindingsParser:
+    # Інкрементальний розбір SPARQL JSON: текст подається шматками, а назовні
+    # віддаються готові елементи results.bindings, щойно кожен з них повністю прийшов.
+    # У пам'яті лежить лише недочитаний хвіст, а не вся відповідь.
+    # Межу елемента шукаємо сканером вкладеності, стан якого переживає шматки: кожен символ
+    # переглядається один раз, а json.loads викликається лише для вже повного елемента
+    def __init__(self):
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+        self._start = None  # початок недочитаного елемента в буфері
+        self._pos = 0  # звідки продовжувати сканування
+        self._depth = 0
+        self._in_string = False
+
+    def feed(self, text):
+        if self._finished:
+            return []
+        self._buffer += text
+
+        if not self._started:
+            match = BINDINGS_START.search(self._buffer)
+            if match is None:
+                # Ключ може бути розрізаний між шматками — лишаємо трохи хвоста
+                self._buffer = self._buffer[-64:]
+                return []
+            self._buffer = self._buffer[match.end():]
+            self._started = True
+
+        items = []
+        buffer, pos, size = self._buffer, self._pos, len(self._buffer)
+        while pos < size:
+            if self._start is None:
+                while pos < size and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos == size:
+                    break
+                if buffer[pos] == "]":
+                    self._finished = True
+                    pos += 1
+                    break
+                if buffer[pos] not in "{[":
+                    raise BindingsParseError(JSON_DECODE_ERROR)
+                self._start = pos
+
+            if self._in_string:
+                match = STRING_SPECIAL.search(buffer, pos)
+                if match is None:
+                    pos = size
+                elif match.group() == "\\":
+                    if match.end() == size:
+                        # Екранований символ ще не прийшов
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                else:
+                    self._in_string = False
+                    pos = match.end()
+                continue
+
+            match = STRUCTURE.search(buffer, pos)
+            if match is None:
+                pos = size
+                continue
+            pos = match.end()
+            char = match.group()
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        items.append(json.loads(buffer[self._start:pos]))
+                    except json.JSONDecodeError as e:
+                        raise BindingsParseError(JSON_DECODE_ERROR) from e
+                    self._start = None
+
+        # Тримаємо лише недочитаний елемент
+        keep = self._start if self._start is not None else pos
+        self._buffer = buffer[keep:]
+        self._pos = pos - keep
+        if self._start is not None:
+            self._start = 0
+        return items
+
+    def close(self):
+        if not self._finished:
+            raise BindingsParseError(JSON_DECODE_ERROR)
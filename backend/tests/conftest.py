@@ -1,3 +1,8 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 import pandas as pd
 
@@ -10,3 +15,72 @@ def dummy_drugs_df():
         "medical_condition": ["treatment", "treatment"],
         "medical_condition_description": ["Info about treatment A", "Info about treatment B"]
     })
+
+
+@pytest.fixture(autouse=True)
+def sparql_cache(tmp_path, monkeypatch):
+    # Кожен тест має власний порожній кеш SPARQL-відповідей
+    from backend import sparql_queries
+    from backend.sparql_cache import SparqlCache
+
+    cache = SparqlCache(str(tmp_path / "sparql_cache.sqlite3"))
+    monkeypatch.setattr(sparql_queries, "cache", cache)
+    return cache
+
+
+class SparqlStub:
+    def __init__(self):
+        self.payload = {"head": {"vars": []}, "results": {"bindings": []}}
+        self.status = 200
+        self.raw_body = None
+        self.headers = {}
+        self.delay = 0
+        self.queries = []
+        self.url = None
+
+    @property
+    def hits(self):
+        return len(self.queries)
+
+
+@pytest.fixture
+def sparql_stub(monkeypatch):
+    # Локальний SPARQL-ендпоінт з наперед заданою відповіддю
+    from urllib.parse import urlparse, parse_qs
+    from backend import sparql_queries
+
+    stub = SparqlStub()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query).get("query", [""])[0]
+            self.respond(query)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+            self.respond(parse_qs(body).get("query", [""])[0])
+
+        def respond(self, query):
+            stub.queries.append(query)
+            time.sleep(stub.delay)
+            payload = stub.payload(query) if callable(stub.payload) else stub.payload
+            body = stub.raw_body if stub.raw_body is not None else json.dumps(payload).encode()
+            self.send_response(stub.status)
+            self.send_header("Content-Type", "application/sparql-results+json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in stub.headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    stub.url = f"http://127.0.0.1:{server.server_port}/sparql"
+    monkeypatch.setattr(sparql_queries, "WIKIDATA_SPARQL_URL", stub.url)
+    yield stub
+    server.shutdown()
+    server.server_close()
@@ -1,10 +1,14 @@
+import asyncio
 import pytest
 import pandas as pd
 from backend.sparql_queries import (
     get_diseases_from_wikidata,
     get_hospitals_from_wikidata
 )
-from backend.llm_adviser import get_illness_and_drugs
+from backend.llm_adviser import get_illness_and_drugs, get_illness_and_drugs_batch, advise_many
+from backend.cache import lru_cache, ttl_cache
+from backend.drug_index import DrugIndex
+from backend.lexical_index import LexicalIndex
 
 
 def test_get_illness_and_drugs_without_drugs():
@@ -19,15 +23,18 @@ import pandas as pd
 
 def test_get_illness_and_drugs_with_drugs(dummy_drugs_df, monkeypatch):
     # Замінюємо датафрейм
-    monkeypatch.setattr("backend.llm_adviser.drugs_df", dummy_drugs_df)
+    monkeypatch.setattr("backend.llm_adviser.drug_index", DrugIndex.from_frame(dummy_drugs_df))
 
     # Мокаємо результат similarity_search
     mock_doc = MagicMock()
     mock_doc.page_content = "treatment Info: This is some mock info"
     mock_db = MagicMock()
-    mock_db.similarity_search.return_value = [mock_doc]
+    mock_db.similarity_search_by_vector.return_value = [mock_doc]
+    mock_db.embeddings.embed_documents.side_effect = lambda texts: [[0.1, 0.2] for _ in texts]
 
     monkeypatch.setattr("backend.llm_adviser.db_drugs", mock_db)
+    monkeypatch.setattr("backend.llm_adviser.lexical_index", LexicalIndex([]))
+    monkeypatch.setattr("backend.llm_adviser.result_cache", ttl_cache())
 
     # Виклик функції
     result = get_illness_and_drugs("treatment", top_k=2, get_drugs=True)
@@ -38,9 +45,122 @@ def test_get_illness_and_drugs_with_drugs(dummy_drugs_df, monkeypatch):
     assert len(result) > 0
 
 
+def test_get_illness_and_drugs_repeat_query_skips_inference(monkeypatch):
+    mock_doc = MagicMock()
+    mock_doc.page_content = "headache Info: This is some mock info"
+    mock_db = MagicMock()
+    mock_db.similarity_search_by_vector.return_value = [mock_doc]
+    mock_db.embeddings.embed_documents.side_effect = lambda texts: [[0.1, 0.2] for _ in texts]
+
+    monkeypatch.setattr("backend.llm_adviser.db_drugs", mock_db)
+    monkeypatch.setattr("backend.llm_adviser.lexical_index", LexicalIndex([]))
+    monkeypatch.setattr("backend.llm_adviser.embedding_cache", lru_cache())
+    monkeypatch.setattr("backend.llm_adviser.result_cache", ttl_cache())
+
+    first = get_illness_and_drugs("Headache", top_k=3)
+    second = get_illness_and_drugs("  headache ", top_k=3)
+
+    assert list(first['medical_condition']) == list(second['medical_condition']) == ["headache"]
+    mock_db.embeddings.embed_documents.assert_called_once_with(["headache"])
+    mock_db.similarity_search_by_vector.assert_called_once()
+
+
+def test_first_cached_entries_use_the_opened_index_version(monkeypatch):
+    mock_doc = MagicMock()
+    mock_doc.page_content = "headache Info: This is some mock info"
+    mock_db = MagicMock()
+    mock_db.similarity_search_by_vector.return_value = [mock_doc]
+    mock_db.embeddings.embed_documents.side_effect = lambda texts: [[0.1, 0.2] for _ in texts]
+
+    monkeypatch.setattr("backend.llm_adviser.initialize_db", lambda: mock_db)
+    monkeypatch.setattr("backend.llm_adviser.index_version", lambda: "v7")
+    monkeypatch.setattr("backend.llm_adviser.db_drugs", None)
+    monkeypatch.setattr("backend.llm_adviser.db_version", None)
+    monkeypatch.setattr("backend.llm_adviser.lexical_index", LexicalIndex([]))
+    monkeypatch.setattr("backend.llm_adviser.embedding_cache", embedding_cache := lru_cache())
+    monkeypatch.setattr("backend.llm_adviser.result_cache", result_cache := ttl_cache())
+
+    get_illness_and_drugs("headache", top_k=3)
+    assert embedding_cache.version == result_cache.version == "v7"
+
+    get_illness_and_drugs("headache", top_k=3)
+    assert result_cache.stats()["hits"] == 1
+
+
+def test_condition_name_query_skips_inference(monkeypatch):
+    mock_db = MagicMock()
+    monkeypatch.setattr("backend.llm_adviser.db_drugs", mock_db)
+    monkeypatch.setattr("backend.llm_adviser.lexical_index", LexicalIndex([
+        "acne Info: skin condition",
+        "migraine Info: severe headache",
+        "migraine with aura Info: visual disturbance",
+    ]))
+    monkeypatch.setattr("backend.llm_adviser.result_cache", ttl_cache())
+
+    assert list(get_illness_and_drugs("Acne")['medical_condition']) == ["acne"]
+    assert list(get_illness_and_drugs("migr")['medical_condition']) == ["migraine", "migraine with aura"]
+    mock_db.similarity_search_by_vector.assert_not_called()
+    mock_db.embeddings.embed_documents.assert_not_called()
+
+
+def test_hybrid_query_fuses_lexical_and_dense(monkeypatch):
+    texts = [
+        "acne Info: pimples on the skin",
+        "insomnia Info: trouble sleeping at night",
+        "eczema Info: itchy dry skin",
+    ]
+    dense_docs = [MagicMock(page_content=texts[1]), MagicMock(page_content=texts[2])]
+    mock_db = MagicMock()
+    mock_db.similarity_search_by_vector.return_value = dense_docs
+    mock_db.embeddings.embed_documents.side_effect = lambda batch: [[0.1, 0.2] for _ in batch]
+
+    monkeypatch.setattr("backend.llm_adviser.db_drugs", mock_db)
+    monkeypatch.setattr("backend.llm_adviser.lexical_index", LexicalIndex(texts))
+    monkeypatch.setattr("backend.llm_adviser.embedding_cache", lru_cache())
+    monkeypatch.setattr("backend.llm_adviser.result_cache", ttl_cache())
+
+    # "eczema" є і в BM25 (слово "skin"), і у векторному списку — після злиття він перший
+    result = get_illness_and_drugs("my skin is itchy", top_k=1)
+    assert list(result['medical_condition']) == ["eczema"]
+    mock_db.similarity_search_by_vector.assert_called_once()
+
+
+def test_batch_lookup_embeds_once_and_keeps_order(monkeypatch):
+    texts = [
+        "acne Info: pimples on the skin",
+        "insomnia Info: trouble sleeping at night",
+        "eczema Info: itchy dry skin",
+    ]
+    mock_db = MagicMock()
+    mock_db.similarity_search_by_vectors.side_effect = lambda vectors, k: [
+        [MagicMock(page_content=texts[1])] for _ in vectors
+    ]
+    mock_db.embeddings.embed_documents.side_effect = lambda batch: [[0.1, 0.2] for _ in batch]
+
+    monkeypatch.setattr("backend.llm_adviser.db_drugs", mock_db)
+    monkeypatch.setattr("backend.llm_adviser.lexical_index", LexicalIndex(texts))
+    monkeypatch.setattr("backend.llm_adviser.embedding_cache", lru_cache())
+    monkeypatch.setattr("backend.llm_adviser.result_cache", ttl_cache())
+    monkeypatch.setattr("backend.llm_adviser.CHAT_BATCH_SIZE", 3)
+
+    messages = ["cannot sleep", "Acne", "restless night", "cannot sleep", "no rest at night"]
+    replies = list(advise_many(messages, top_k=1))
+
+    assert [reply.conditions for reply in replies] == [["insomnia"], ["acne"], ["insomnia"], ["insomnia"], ["insomnia"]]
+    # Дві пачки по 3: у першій два різні запити для моделі одним викликом і одним матричним пошуком,
+    # у другій лише один новий запит — він іде звичайним шляхом
+    assert [call.args[0] for call in mock_db.embeddings.embed_documents.call_args_list] == [
+        ["cannot sleep", "restless night"], ["no rest at night"]
+    ]
+    mock_db.similarity_search_by_vectors.assert_called_once()
+    mock_db.similarity_search_by_vector.assert_called_once()
+
+    frames = list(get_illness_and_drugs_batch(["acne", "cannot sleep"], top_k=1))
+    assert [list(frame["medical_condition"]) for frame in frames] == [["acne"], ["insomnia"]]
+
 
 def test_get_diseases_from_wikidata_structure():
-    result = get_diseases_from_wikidata()
+    result = asyncio.run(get_diseases_from_wikidata())
     assert isinstance(result, list)
     assert len(result) > 0
     disease = result[0]
@@ -54,7 +174,7 @@ def test_get_diseases_from_wikidata_structure():
 
 @pytest.mark.parametrize("country_code", ["Q30", "Q40", "Q183"])
 def test_get_hospitals_from_wikidata(country_code):
-    hospitals = get_hospitals_from_wikidata(country_code)
+    hospitals = asyncio.run(get_hospitals_from_wikidata(country_code))
     assert isinstance(hospitals, list)
     assert len(hospitals) > 0
     first = hospitals[0]
@@ -62,3 +182,49 @@ def test_get_hospitals_from_wikidata(country_code):
     assert "latitude" in first
     assert "longitude" in first
     assert "description" in first
+
+
+def test_import_does_not_load_heavy_resources(monkeypatch):
+    import os
+    import subprocess
+    import sys
+    from backend import llm_adviser
+
+    # Окремий інтерпретатор: у поточному backend.main уже імпортований іншими тестами
+    code = (
+        "import sys, backend.main; "
+        "heavy = [name for name in ('torch', 'chromadb', 'sentence_transformers') if name in sys.modules]; "
+        "assert not heavy, heavy"
+    )
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(llm_adviser.__file__)))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=project_root)
+    assert result.returncode == 0, result.stderr
+
+    calls = []
+    monkeypatch.setattr("backend.llm_adviser.initialize_db", lambda: calls.append("db") or MagicMock())
+    monkeypatch.setattr("backend.llm_adviser.index_version", lambda: "v1")
+    monkeypatch.setattr(llm_adviser, "db_drugs", None)
+    monkeypatch.setattr(llm_adviser, "db_version", None)
+
+    db = llm_adviser.get_db()
+    assert llm_adviser.get_db() is db
+    assert calls == ["db"]
+    assert llm_adviser.db_version == "v1"
+
+
+def test_advise_returns_column_oriented_records(dummy_drugs_df, monkeypatch):
+    import orjson
+    from backend.llm_adviser import advise
+
+    monkeypatch.setattr("backend.llm_adviser.drug_index", DrugIndex.from_frame(dummy_drugs_df))
+    monkeypatch.setattr("backend.llm_adviser.db_drugs", MagicMock())
+    monkeypatch.setattr("backend.llm_adviser.lexical_index", LexicalIndex(["treatment Info: mock"]))
+    monkeypatch.setattr("backend.llm_adviser.result_cache", ttl_cache())
+
+    advice = advise("treatment", get_drugs=True)
+    assert advice.conditions == ["treatment"]
+    assert advice.drugs["name"] == ["DrugA", "DrugB"]
+    assert advice.drugs["rating"] == [4.5, 3.9]
+    assert orjson.loads(orjson.dumps(advice))["drugs"]["name"] == ["DrugA", "DrugB"]
+
+    assert advise("treatment").drugs is None
@@ -0,0 +1,79 @@
+import threading
+import pytest
+
+from backend.batching import EmbeddingBatcher
+
+
+def fake_embed(calls):
+    def embed_batch(texts):
+        calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+    return embed_batch
+
+
+def test_concurrent_queries_share_one_batch():
+    calls = []
+    batcher = EmbeddingBatcher(fake_embed(calls), max_batch=8, max_wait_ms=200)
+    results = {}
+
+    def worker(text):
+        results[text] = batcher.embed(text)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in ["a", "bb", "ccc", "bb"]]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {"a": [1.0], "bb": [2.0], "ccc": [3.0]}
+    assert len(calls) == 1
+    assert sorted(calls[0]) == ["a", "bb", "ccc"]
+    assert batcher.stats()["items"] == 4
+
+
+def test_batch_size_limit():
+    calls = []
+    batcher = EmbeddingBatcher(fake_embed(calls), max_batch=2, max_wait_ms=200)
+    futures = [batcher.submit(t) for t in ["a", "b", "c"]]
+    assert [f.result(timeout=5) for f in futures] == [[1.0], [1.0], [1.0]]
+    assert [len(c) for c in calls] == [2, 1]
+
+
+def test_disabled_window_embeds_inline():
+    calls = []
+    batcher = EmbeddingBatcher(fake_embed(calls), max_wait_ms=0)
+    assert batcher.embed("abcd") == [4.0]
+    assert batcher._worker is None
+
+
+def test_errors_reach_every_waiter():
+    def broken(texts):
+        raise ValueError("model failed")
+
+    batcher = EmbeddingBatcher(broken, max_wait_ms=50)
+    futures = [batcher.submit("a"), batcher.submit("b")]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+
+
+def test_counters_are_exact_under_threads():
+    # Без вікна батчингу _run_batch іде паралельно з потоків запитів — лічильники не мають губитись
+    from backend import llm_adviser
+
+    batcher = EmbeddingBatcher(lambda texts: [[0.0]] * len(texts), max_wait_ms=0)
+    before = llm_adviser.retrieval_counts()["hybrid"]
+
+    def worker():
+        for i in range(500):
+            batcher.embed(str(i))
+            llm_adviser.count_retrieval("hybrid", 1)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert batcher.stats()["items"] == 4000
+    assert llm_adviser.retrieval_counts()["hybrid"] - before == 4000
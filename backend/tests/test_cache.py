@@ -0,0 +1,51 @@
+from backend.cache import lru_cache, ttl_cache
+
+
+def test_counting_cache_hits_and_misses():
+    cache = lru_cache(maxsize=2)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "value"
+
+    assert cache.get_or_compute("a", compute) == "value"
+    assert cache.get_or_compute("a", compute) == "value"
+    assert len(calls) == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 2}
+
+
+def test_counting_cache_invalidated_by_version():
+    cache = lru_cache()
+    cache.get_or_compute("a", lambda: 1, version="v1")
+    assert cache.get_or_compute("a", lambda: 2, version="v1") == 1
+    assert cache.get_or_compute("a", lambda: 3, version="v2") == 3
+    assert cache.stats()["misses"] == 2
+
+
+def test_counting_cache_computes_missing_keys_in_one_call():
+    cache = lru_cache()
+    cache.get_or_compute("b", lambda: "B")
+    calls = []
+
+    def compute_many(keys):
+        calls.append(keys)
+        return [key.upper() for key in keys]
+
+    assert cache.get_or_compute_many(["a", "b", "c", "a"], compute_many) == ["A", "B", "C", "A"]
+    assert calls == [["a", "c"]]
+    assert cache.get_or_compute_many(["c"], compute_many) == ["C"]
+    assert len(calls) == 1
+    # Промахи: "b" при get_or_compute і "a", "c", повторне "a" у першій пачці; влучання: "b" і потім "c"
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 4
+
+
+def test_ttl_cache_expires():
+    now = [0.0]
+    cache = ttl_cache(maxsize=10, ttl=5, timer=lambda: now[0])
+    cache.get_or_compute("a", lambda: 1)
+    now[0] = 4
+    assert cache.get_or_compute("a", lambda: 2) == 1
+    now[0] = 6
+    assert cache.get_or_compute("a", lambda: 3) == 3
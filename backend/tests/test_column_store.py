@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from backend.column_store import has_columns, read_columns, write_columns
+
+
+def test_columns_roundtrip_with_mmap(tmp_path):
+    df = pd.DataFrame({
+        "drug_name": ["A", "B", "C"],
+        "medical_condition": pd.Categorical(["acne", "flu", "acne"]),
+        "rating": [5.0, 7.5, 0.0],
+        "alcohol": np.array([1, 0, 0], dtype=np.int8),
+    })
+    directory = str(tmp_path / "columns")
+    assert not has_columns(directory)
+    write_columns(df, directory)
+    assert has_columns(directory)
+
+    loaded = read_columns(directory)
+    assert list(loaded.columns) == list(df.columns)
+    assert loaded["medical_condition"].tolist() == ["acne", "flu", "acne"]
+    assert list(loaded["medical_condition"].cat.categories) == ["acne", "flu"]
+    assert isinstance(loaded["drug_name"].dtype, pd.CategoricalDtype)
+    assert loaded["rating"].tolist() == [5.0, 7.5, 0.0]
+    assert loaded["alcohol"].dtype == np.int8
+
+
+def test_missing_values_survive_encoding(tmp_path):
+    df = pd.DataFrame({"medical_condition_description": ["x", None, "x"]})
+    write_columns(df, str(tmp_path))
+    loaded = read_columns(str(tmp_path), mmap=False)
+    assert loaded["medical_condition_description"].isna().tolist() == [False, True, False]
+
+
+def test_artifact_rebuilt_when_csv_changes(tmp_path, monkeypatch):
+    from backend.scripts import create_dataset as cd
+
+    header = "drug_name,medical_condition,medical_condition_description,rating,no_of_reviews,alcohol\n"
+    csv = tmp_path / "drugs_for_common_treatments.csv"
+    csv.write_text(header + "A,acne,Skin,5,1,\n", encoding="utf-8")
+    monkeypatch.setattr(cd, "DATASET_DIR", str(tmp_path))
+    monkeypatch.setattr(cd, "columns_dir", str(tmp_path / "columns"))
+    monkeypatch.setattr(cd, "output_file", str(tmp_path / "descriptions.txt"))
+
+    assert cd.get_drugs_df()["drug_name"].tolist() == ["A"]
+
+    # Новий CSV: колонки й текстовий файл перебудовуються, а не лишаються застарілими
+    csv.write_text(header + "A,acne,Skin,5,1,\nB,flu,Fever,7,2,\n", encoding="utf-8")
+    assert sorted(cd.get_drugs_df()["drug_name"].tolist()) == ["A", "B"]
+    assert "flu Info: Fever" in (tmp_path / "descriptions.txt").read_text(encoding="utf-8")
+
+    # Без CSV працюємо з наявним артефактом
+    monkeypatch.setattr(cd, "DATASET_DIR", None)
+    assert len(cd.get_drugs_df()) == 2
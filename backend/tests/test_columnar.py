@@ -0,0 +1,60 @@
+import numpy as np
+
+from backend.columnar import MISSING, StringTable, columnar_payload, decode_payload, decode_record, encode_records
+from backend.disease_store import DiseaseTable
+
+
+def make_records():
+    return [
+        {"id": "D1", "name": "flu", "symptoms": ["fever", "cough"], "fatality_rate": 0.1},
+        {"id": "D2", "name": "cold", "symptoms": ["cough"]},
+        {"id": "D3", "name": "rash", "symptoms": [], "fatality_rate": 1},
+        {"id": "D4", "name": "acne"},
+    ]
+
+
+def test_string_table_interns_by_value_and_type():
+    strings = StringTable()
+    assert strings.code("fever") == strings.code("fever") == 0
+    assert len({strings.code(1), strings.code(1.0), strings.code(True)}) == 3
+    assert strings.values == ["fever", 1, 1.0, True]
+
+
+def test_encode_records_round_trips():
+    records = make_records()
+    strings, columns = encode_records(records)
+
+    # "cough" зберігається один раз на весь набір
+    assert strings.values.count("cough") == 1
+    assert columns["fatality_rate"].codes[1] == MISSING
+    assert [decode_record(strings.values, columns, i) for i in range(len(records))] == records
+
+
+def test_columnar_payload_keeps_only_used_strings():
+    strings, columns = encode_records(make_records())
+    payload = columnar_payload(strings.values, columns, np.array([1, 3]))
+
+    assert payload["format"] == "columnar"
+    assert payload["length"] == 2
+    assert sorted(payload["strings"]) == ["D2", "D4", "acne", "cold", "cough"]
+    assert payload["columns"]["fatality_rate"] == [MISSING, MISSING]
+    assert payload["columns"]["symptoms"]["offsets"] == [0, 1, 1]
+    assert decode_payload(payload) == [
+        {"id": "D2", "name": "cold", "symptoms": ["cough"], "fatality_rate": None},
+        {"id": "D4", "name": "acne", "symptoms": [], "fatality_rate": None},
+    ]
+
+
+def test_disease_table_columnar_matches_rows():
+    table = DiseaseTable(make_records())
+    total, rows = table.query(1, 2, ["id", "symptoms"])
+    assert total == 4
+    assert rows == [{"id": "D2", "symptoms": ["cough"]}, {"id": "D3", "symptoms": []}]
+
+    total, payload = table.columnar(1, 2, ["id", "symptoms"])
+    assert total == 4
+    assert list(payload["columns"]) == ["id", "symptoms"]
+    assert decode_payload(payload) == rows
+
+    total, payload = table.columnar(q="COUGH")
+    assert total == 0 and payload["length"] == 0
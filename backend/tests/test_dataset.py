@@ -1,17 +1,24 @@
+import json
+
 from fastapi.testclient import TestClient
-from backend.main import app
+from backend.main import app, disease_store, hospital_store, drug_graph_store
 
 client = TestClient(app)
 
 
+def reset_disease_store(monkeypatch):
+    monkeypatch.setattr(disease_store, "table", None)
+
+
 def test_get_diseases(monkeypatch):
     fake_response = [{"id": "D1", "label": "Disease 1"}]
 
-    def mock_get_diseases_from_wikidata():
+    async def mock_get_diseases_from_wikidata():
         return fake_response
 
     # Меняем функцию именно в backend.main, откуда её FastAPI вызывает
     monkeypatch.setattr("backend.main.get_diseases_from_wikidata", mock_get_diseases_from_wikidata)
+    reset_disease_store(monkeypatch)
 
     response = client.get("/api/diseases")
     assert response.status_code == 200
@@ -20,19 +27,41 @@ def test_get_diseases(monkeypatch):
 
 
 def test_chat(monkeypatch):
-    fake_reply = {
-        "message": "This is a test reply.",
-        "medications": ["med1", "med2"],
-    }
+    from backend.llm_adviser import Advice
+
+    fake_reply = Advice(conditions=["acne"], drugs={"drug_name": ["med1", "med2"], "rating": [5.0, float("nan")]})
 
-    def mock_get_illness_and_drugs(message, top_k):
+    def mock_advise(message, top_k):
         return fake_reply
 
-    monkeypatch.setattr("backend.main.get_illness_and_drugs", mock_get_illness_and_drugs)
+    monkeypatch.setattr("backend.main.advise", mock_advise)
 
     response = client.post("/api/chat", json={"message": "Hello"})
     assert response.status_code == 200
-    assert response.json() == {"reply": fake_reply}
+    assert response.json() == {"reply": {"conditions": ["acne"], "drugs": {"drug_name": ["med1", "med2"], "rating": [5.0, None]}}}
+
+def test_chat_batch(monkeypatch):
+    from backend.llm_adviser import Advice
+
+    def mock_advise_many(messages, top_k, get_drugs):
+        return (Advice(conditions=[message.lower()]) for message in messages)
+
+    monkeypatch.setattr("backend.main.advise_many", mock_advise_many)
+
+    response = client.post("/api/chat/batch", json={"messages": ["Acne", "Flu"]})
+    assert response.status_code == 200
+    assert response.json() == {"replies": [
+        {"conditions": ["acne"], "drugs": None}, {"conditions": ["flu"], "drugs": None}
+    ]}
+
+    response = client.post("/api/chat/batch", params={"stream": True}, json={"messages": ["Acne", "Flu"]})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [{"index": 0, "reply": {"conditions": ["acne"], "drugs": None}},
+                     {"index": 1, "reply": {"conditions": ["flu"], "drugs": None}}]
+
+    assert client.post("/api/chat/batch", json={"messages": []}).status_code == 422
+
 
 def test_get_hospitals(monkeypatch):
     fake_hospitals = [
@@ -45,29 +74,213 @@ def test_get_hospitals(monkeypatch):
         }
     ]
 
-    def mock_get_hospitals_from_wikidata(country):
+    async def mock_get_hospitals_from_wikidata(country):
         return fake_hospitals
 
     # Мокаем именно в backend.main, откуда FastAPI вызывает
     monkeypatch.setattr("backend.main.get_hospitals_from_wikidata", mock_get_hospitals_from_wikidata)
+    monkeypatch.setattr(hospital_store, "indexes", {})
 
     response = client.get("/api/hospitals")
     assert response.status_code == 200
     assert response.json() == fake_hospitals
 
 
+def test_upstream_overload_returns_503(monkeypatch):
+    from backend.sparql_client import SparqlOverloaded
+
+    async def overloaded(country):
+        raise SparqlOverloaded(retry_after=7)
+
+    monkeypatch.setattr("backend.main.get_hospitals_from_wikidata", overloaded)
+    monkeypatch.setattr(hospital_store, "indexes", {})
+
+    response = client.get("/api/hospitals", params={"country": "Q212"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+
+
 def test_get_drug_disease_data(monkeypatch):
     fake_graph = {
         "nodes": [{"id": "node1", "label": "Node 1"}],
         "edges": [{"source": "node1", "target": "node2"}]
     }
 
-    def mock_get_drug_illness_graph():
+    async def mock_get_drug_illness_graph():
         return fake_graph
 
+    async def mock_get_drug_illness_graph_version():
+        return "v1"
+
     # Мокаем в backend.main
     monkeypatch.setattr("backend.main.get_drug_illness_graph", mock_get_drug_illness_graph)
+    monkeypatch.setattr("backend.main.get_drug_illness_graph_version", mock_get_drug_illness_graph_version)
 
     response = client.get("/api/drug-disease")
     assert response.status_code == 200
     assert response.json() == fake_graph
+
+
+def test_get_diseases_streamed(monkeypatch):
+    fake_response = [{"id": "D1", "label": "Disease 1"}, {"id": "D2", "label": "Хвороба 2"}]
+
+    async def mock_get_diseases_from_wikidata():
+        return fake_response
+
+    monkeypatch.setattr("backend.main.get_diseases_from_wikidata", mock_get_diseases_from_wikidata)
+    reset_disease_store(monkeypatch)
+
+    response = client.get("/api/diseases", params={"stream": True})
+    assert response.status_code == 200
+    assert response.json() == fake_response
+
+
+def test_get_diseases_paginated_and_projected(monkeypatch):
+    fake_response = [
+        {"id": f"D{i}", "name": f"disease {i}", "description": "fever and cough" if i % 2 else "rash",
+         "symptoms": ["s"]}
+        for i in range(10)
+    ]
+    calls = []
+
+    async def mock_get_diseases_from_wikidata():
+        calls.append(1)
+        return fake_response
+
+    monkeypatch.setattr("backend.main.get_diseases_from_wikidata", mock_get_diseases_from_wikidata)
+    reset_disease_store(monkeypatch)
+
+    response = client.get("/api/diseases", params={"offset": 2, "limit": 3, "fields": "id,name"})
+    assert response.status_code == 200
+    assert response.json() == [{"id": "D2", "name": "disease 2"}, {"id": "D3", "name": "disease 3"}, {"id": "D4", "name": "disease 4"}]
+    assert response.headers["X-Total-Count"] == "10"
+
+    response = client.get("/api/diseases", params={"q": "FEVER", "limit": 2, "fields": "id"})
+    assert response.json() == [{"id": "D1"}, {"id": "D3"}]
+    assert response.headers["X-Total-Count"] == "5"
+
+    # Усі сторінки віддаються з таблиці в пам'яті
+    assert len(calls) == 1
+
+    assert client.get("/api/diseases", params={"limit": 0}).status_code == 422
+
+    response = client.get("/api/diseases", params={"offset": 2, "limit": 2, "fields": "id,symptoms", "format": "columnar"})
+    payload = response.json()
+    assert response.headers["X-Total-Count"] == "10"
+    assert payload["length"] == 2
+    assert [payload["strings"][code] for code in payload["columns"]["id"]] == ["D2", "D3"]
+    assert payload["columns"]["symptoms"]["offsets"] == [0, 1, 2]
+    assert len(payload["strings"]) == 3
+
+
+def test_get_hospitals_spatial_queries(monkeypatch):
+    fake_hospitals = [
+        {"id": "H1", "name": "Kyiv", "latitude": 50.45, "longitude": 30.52},
+        {"id": "H2", "name": "Lviv", "latitude": 49.84, "longitude": 24.03},
+        {"id": "H3", "name": "Kyiv 2", "latitude": 50.46, "longitude": 30.53},
+    ]
+    requested = []
+
+    async def mock_get_hospitals_from_wikidata(country):
+        requested.append(country)
+        return fake_hospitals
+
+    monkeypatch.setattr("backend.main.get_hospitals_from_wikidata", mock_get_hospitals_from_wikidata)
+    monkeypatch.setattr(hospital_store, "indexes", {})
+
+    response = client.get("/api/hospitals", params={"country": "Q212", "bbox": "29,49,31,51"})
+    assert [h["id"] for h in response.json()] == ["H1", "H3"]
+
+    response = client.get("/api/hospitals", params={"country": "Q212", "lat": 49.8, "lon": 24.0, "radius_km": 600, "limit": 2})
+    assert [h["id"] for h in response.json()] == ["H2", "H1"]
+
+    response = client.get("/api/hospitals", params={"country": "Q212", "zoom": 3})
+    assert sum(m.get("count", 1) for m in response.json()) == 3
+
+    assert client.get("/api/hospitals", params={"bbox": "1,2,3"}).status_code == 400
+    assert client.get("/api/hospitals", params={"lat": 50}).status_code == 400
+    # Хибні параметри відхиляються до завантаження країни
+    assert client.get("/api/hospitals", params={"country": "Q30", "bbox": "3,2,1,0"}).status_code == 400
+    # Країна підставляється в SPARQL, тож приймаються лише ідентифікатори Wikidata
+    for country in ("Q30} . ?x ?y ?z {", "wd:Q30", "Q", "q30"):
+        assert client.get("/api/hospitals", params={"country": country}).status_code == 400
+    assert requested == ["Q212"]
+
+
+def test_get_drug_disease_compact_and_subgraph(monkeypatch):
+    entity = "http://www.wikidata.org/entity/"
+    rows = [
+        {"item": entity + "Q1", "label": "Flu", "color": "FFA500", "link": ""},
+        {"item": entity + "Q2", "label": "Aspirin", "color": "7FFF00", "link": entity + "Q1"},
+        {"item": entity + "Q3", "label": "Cold", "color": "FFA500", "link": ""},
+    ]
+    calls = []
+
+    async def mock_get_drug_illness_graph():
+        calls.append(1)
+        return rows
+
+    monkeypatch.setattr("backend.main.get_drug_illness_graph", mock_get_drug_illness_graph)
+    monkeypatch.setattr(drug_graph_store, "graph", None)
+
+    response = client.get("/api/drug-disease", params={"format": "compact"})
+    assert response.status_code == 200
+    assert [n["id"] for n in response.json()["nodes"]] == ["Q1", "Q2", "Q3"]
+    assert response.json()["edges"] == [0, 1]
+
+    response = client.get("/api/drug-disease", params={"node": "Q2", "depth": 1})
+    assert response.json() == {
+        "nodes": [{"id": "Q1", "label": "Flu", "type": "disease"}, {"id": "Q2", "label": "Aspirin", "type": "drug"}],
+        "edges": [0, 1],
+    }
+
+    response = client.get("/api/drug-disease", params={"format": "columnar", "node": "Q2", "depth": 1})
+    payload = response.json()
+    assert [payload["strings"][code] for code in payload["columns"]["label"]] == ["Flu", "Aspirin"]
+    assert payload["edges"] == [0, 1]
+
+    assert client.get("/api/drug-disease", params={"node": "Q404"}).status_code == 404
+    assert client.get("/api/drug-disease", params={"format": "xml"}).status_code == 422
+    # Підграфи відповідаються з графа в пам'яті
+    assert len(calls) == 1
+
+
+def test_health_and_readiness(monkeypatch):
+    from backend import llm_adviser
+
+    assert client.get("/healthz").json() == {"status": "ok"}
+
+    monkeypatch.setattr(llm_adviser, "db_drugs", None)
+    monkeypatch.setattr(llm_adviser, "drug_index", None)
+    monkeypatch.setattr(llm_adviser, "lexical_index", None)
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["status"] == "loading"
+    assert response.json()["resources"]["vector_db"] is False
+
+    # Передзавантаження впало: причина в лозі і в тілі /readyz, а не вічне "loading"
+    import asyncio
+    from backend import main
+
+    async def fail():
+        raise RuntimeError("index is corrupted")
+
+    async def finish_failed():
+        task = asyncio.create_task(fail())
+        await asyncio.wait([task])
+        main.preload_finished("resources")(task)
+
+    monkeypatch.setattr(main, "preload_errors", {})
+    asyncio.run(finish_failed())
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["status"] == "failed"
+    assert response.json()["errors"] == {"resources": "RuntimeError: index is corrupted"}
+    monkeypatch.setattr(main, "preload_errors", {})
+
+    monkeypatch.setattr(llm_adviser, "db_drugs", object())
+    monkeypatch.setattr(llm_adviser, "drug_index", object())
+    monkeypatch.setattr(llm_adviser, "lexical_index", object())
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json()["resources"]["drug_index"] is True
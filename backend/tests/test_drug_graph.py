@@ -0,0 +1,83 @@
+from backend.columnar import decode_payload
+from backend.drug_graph import DrugGraph
+
+E = "http://www.wikidata.org/entity/"
+
+
+def make_rows():
+    # Дві хвороби зі спільним препаратом Q3 і окремим препаратом Q4 у другої хвороби
+    return [
+        {"item": E + "Q1", "label": "Flu", "color": "FFA500", "link": ""},
+        {"item": E + "Q2", "label": "Cold", "color": "FFA500", "link": ""},
+        {"item": E + "Q3", "label": "Aspirin", "color": "7FFF00", "link": E + "Q1"},
+        {"item": E + "Q3", "label": "Aspirin", "color": "7FFF00", "link": E + "Q2"},
+        {"item": E + "Q4", "label": "Zinc", "color": "7FFF00", "link": E + "Q2"},
+        {"item": E + "Q3", "label": "Aspirin", "color": "7FFF00", "link": E + "Q1"},
+    ]
+
+
+def neighbour_ids(graph, node_id):
+    return sorted(graph.ids[i] for i in graph.neighbours(graph.node(node_id)))
+
+
+def test_nodes_are_interned_and_edges_deduplicated():
+    graph = DrugGraph(make_rows())
+    assert graph.ids == ["Q1", "Q2", "Q3", "Q4"]
+    assert graph.is_disease.tolist() == [True, True, False, False]
+    assert graph.edge_count == 3
+    assert graph.node(E + "Q3") == graph.node("Q3") == 2
+    assert graph.node("Q404") is None
+
+
+def test_csr_adjacency_is_undirected():
+    graph = DrugGraph(make_rows())
+    assert graph.indptr.tolist() == [0, 1, 3, 5, 6]
+    assert neighbour_ids(graph, "Q1") == ["Q3"]
+    assert neighbour_ids(graph, "Q2") == ["Q3", "Q4"]
+    assert neighbour_ids(graph, "Q3") == ["Q1", "Q2"]
+
+
+def test_payload_is_compact():
+    payload = DrugGraph(make_rows()).payload()
+    assert payload["nodes"][0] == {"id": "Q1", "label": "Flu", "type": "disease"}
+    assert payload["nodes"][3]["type"] == "drug"
+    assert payload["edges"] == [0, 2, 1, 2, 1, 3]
+
+
+def test_columnar_matches_compact():
+    graph = DrugGraph(make_rows())
+    compact, columnar = graph.payload(), graph.columnar()
+    assert decode_payload(columnar) == compact["nodes"]
+    assert columnar["edges"] == compact["edges"]
+    # Тип вузла — один із двох кодів, а не рядок на кожен вузол
+    assert columnar["strings"].count("drug") == 1
+
+    payload = graph.subgraph(graph.node("Q1"), 1, "columnar")
+    assert decode_payload(payload) == graph.subgraph(graph.node("Q1"), 1)["nodes"]
+    assert payload["edges"] == [0, 1]
+    assert decode_payload(DrugGraph([]).columnar()) == []
+
+
+def test_subgraph_by_depth():
+    graph = DrugGraph(make_rows())
+    q1 = graph.node("Q1")
+    assert [n["id"] for n in graph.subgraph(q1, 0)["nodes"]] == ["Q1"]
+
+    payload = graph.subgraph(q1, 1)
+    assert [n["id"] for n in payload["nodes"]] == ["Q1", "Q3"]
+    assert payload["edges"] == [0, 1]
+
+    assert [n["id"] for n in graph.subgraph(q1, 2)["nodes"]] == ["Q1", "Q2", "Q3"]
+    payload = graph.subgraph(q1, 3)
+    assert len(payload["nodes"]) == 4
+    assert len(payload["edges"]) == 6
+
+
+def test_link_without_own_row_and_empty_graph():
+    graph = DrugGraph([{"item": E + "Q3", "label": "Aspirin", "color": "7FFF00", "link": E + "Q9"}])
+    assert graph.labels == ["Aspirin", "Q9"]
+    assert graph.subgraph(graph.node("Q9"), 1)["edges"] == [1, 0]
+
+    empty = DrugGraph([])
+    assert len(empty) == 0
+    assert empty.payload() == {"nodes": [], "edges": []}
@@ -0,0 +1,57 @@
+import mmap
+
+import pandas as pd
+
+from backend.drug_index import DrugIndex
+
+
+def make_df():
+    return pd.DataFrame({
+        'drug_name': ['A', 'B', 'C', 'D', 'E'],
+        'medical_condition': ['acne', 'flu', 'acne', 'flu', 'cold'],
+        'rating': [5.0, 9.0, 8.0, 2.0, 7.0],
+    })
+
+
+def test_lookup_single_condition_is_slice_sorted_by_rating():
+    index = DrugIndex.from_frame(make_df())
+    result = index.lookup(['acne'])
+    assert list(result['drug_name']) == ['C', 'A']
+    assert index.offsets['acne'] == (0, 2)
+
+
+def test_lookup_merges_conditions_by_rating():
+    index = DrugIndex.from_frame(make_df())
+    result = index.lookup_frame(['flu', 'acne', 'unknown'])
+    assert list(result['drug_name']) == ['B', 'C', 'A', 'D']
+    assert list(result.columns) == ['drug_name', 'medical_condition', 'rating']
+
+
+def test_lookup_missing_condition_returns_empty_columns():
+    index = DrugIndex.from_frame(make_df())
+    result = index.lookup_frame(['unknown'])
+    assert len(result) == 0
+    assert 'drug_name' in result.columns
+
+
+def is_mapped(array):
+    while getattr(array, 'base', None) is not None:
+        array = array.base
+    return isinstance(array, mmap.mmap)
+
+
+def test_index_over_sorted_columnar_artifact_keeps_codes_mapped(tmp_path):
+    from backend.column_store import read_columns, write_columns
+    from backend.drug_index import SORT_KEYS, sort_drugs
+
+    df = make_df().astype({'medical_condition': 'category'})
+    write_columns(sort_drugs(df), str(tmp_path), sorted_by=SORT_KEYS)
+    index = DrugIndex.from_frame(read_columns(str(tmp_path)))
+
+    assert is_mapped(index.columns['medical_condition'].codes)
+    assert is_mapped(index.columns['rating'])
+    assert index.offsets == {'acne': (0, 2), 'cold': (2, 3), 'flu': (3, 5)}
+    assert list(index.lookup(['acne'])['drug_name']) == ['C', 'A']
+    result = index.lookup_frame(['flu', 'acne'])
+    assert list(result['drug_name']) == ['B', 'C', 'A', 'D']
+    assert result['medical_condition'].dtype == object
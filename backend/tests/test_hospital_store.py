@@ -0,0 +1,71 @@
+import asyncio
+
+import numpy as np
+
+from backend.hospital_store import HospitalIndex, HospitalStore, haversine_km
+
+
+def make_hospitals():
+    # Київ, Львів, Харків, дві поруч у Києві і запис без координат
+    return [
+        {"id": "H1", "name": "Kyiv 1", "latitude": 50.45, "longitude": 30.52},
+        {"id": "H2", "name": "Lviv", "latitude": 49.84, "longitude": 24.03},
+        {"id": "H3", "name": "Kharkiv", "latitude": 49.99, "longitude": 36.23},
+        {"id": "H4", "name": "Kyiv 2", "latitude": 50.46, "longitude": 30.53},
+        {"id": "H5", "name": "Kyiv 3", "latitude": 50.40, "longitude": 30.60},
+        {"id": "H6", "name": "No coordinates"},
+    ]
+
+
+def test_haversine_km():
+    kyiv_lviv = haversine_km(50.45, 30.52, np.array([49.84]), np.array([24.03]))[0]
+    assert 460 < kyiv_lviv < 480
+
+
+def test_bbox_matches_brute_force():
+    index = HospitalIndex(make_hospitals(), cell=0.25)
+    names = [h["name"] for h in index.records(index.in_bbox(30.0, 50.0, 31.0, 51.0))]
+    assert names == ["Kyiv 1", "Kyiv 2", "Kyiv 3"]
+    assert index.records(index.in_bbox(0.0, 0.0, 1.0, 1.0)) == []
+    assert len(index.in_bbox(-180, -90, 180, 90)) == 5
+
+
+def test_nearest_sorted_by_distance_within_radius():
+    index = HospitalIndex(make_hospitals(), cell=0.25)
+    positions, distances = index.nearest(50.451, 30.521, radius_km=20, k=2)
+    records = index.records(positions, distances)
+    assert [r["id"] for r in records] == ["H1", "H4"]
+    assert records[0]["distance_km"] <= records[1]["distance_km"] < 20
+
+    positions, _ = index.nearest(50.45, 30.52, radius_km=600)
+    assert [index.records([p])[0]["id"] for p in positions][-1] == "H2"
+
+
+def test_cluster_groups_nearby_points():
+    index = HospitalIndex(make_hospitals())
+    markers = index.cluster(index.in_bbox(-180, -90, 180, 90), zoom=4)
+    clusters = [m for m in markers if m.get("cluster")]
+    singles = [m for m in markers if not m.get("cluster")]
+    assert sum(m["count"] for m in clusters) + len(singles) == 5
+    assert any(m["count"] >= 3 for m in clusters)
+
+    markers = index.cluster(index.in_bbox(-180, -90, 180, 90), zoom=9)
+    assert len([m for m in markers if not m.get("cluster")]) >= 3
+
+
+def test_store_evicts_least_recently_used_countries():
+    loaded = []
+
+    async def load(country):
+        loaded.append(country)
+        return make_hospitals()
+
+    store = HospitalStore(load, max_countries=2)
+
+    async def scenario():
+        for country in ("Q1", "Q2", "Q1", "Q3", "Q1", "Q2"):
+            await store.get(country)
+
+    asyncio.run(scenario())
+    assert loaded == ["Q1", "Q2", "Q3", "Q2"]
+    assert len(store.indexes) == 2 and len(store._locks) == 2
@@ -0,0 +1,124 @@
+import asyncio
+import gzip
+
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from backend.http_cache import ResponseCache, choose_encoding, dataset_version, etag_matches, make_etag
+from backend.main import app, disease_store
+
+client = TestClient(app)
+
+
+def make_request(query="", headers=None):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "query_string": query.encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+def test_etag_depends_on_version_and_params_only():
+    assert make_etag("v1", [("b", "2"), ("a", "1")]) == make_etag("v1", [("a", "1"), ("b", "2")])
+    assert make_etag("v1", [("a", "1")]) != make_etag("v2", [("a", "1")])
+    assert dataset_version([{"id": 1}]) == dataset_version([{"id": 1}])
+
+    etag = make_etag("v1", [])
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag.removeprefix("W/")}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+
+
+def test_escaped_params_do_not_share_etag():
+    cache = ResponseCache()
+
+    async def build_projected():
+        return [{}, {}, {}, {}, {}], {}
+
+    async def build_limited():
+        return [{"name": "flu"}], {}
+
+    async def scenario():
+        escaped = await cache.respond(make_request("fields=name%26limit%3D1"), "v1", build_projected)
+        plain = await cache.respond(make_request("fields=name&limit=1"), "v1", build_limited)
+        return escaped, plain
+
+    escaped, plain = asyncio.run(scenario())
+    assert escaped.headers["ETag"] != plain.headers["ETag"]
+    assert plain.body == b'[{"name":"flu"}]'
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") == "identity"
+    assert choose_encoding(None) == "identity"
+
+
+def test_respond_builds_and_compresses_once():
+    cache = ResponseCache()
+    builds = []
+    payload = [{"id": i, "name": f"disease {i}"} for i in range(200)]
+
+    async def build():
+        builds.append(1)
+        return payload, {"X-Total-Count": "200"}
+
+    async def scenario():
+        first = await cache.respond(make_request("offset=0", {"Accept-Encoding": "gzip"}), "v1", build)
+        second = await cache.respond(make_request("offset=0", {"Accept-Encoding": "gzip"}), "v1", build)
+        plain = await cache.respond(make_request("offset=0"), "v1", build)
+        revalidated = await cache.respond(
+            make_request("offset=0", {"If-None-Match": first.headers["ETag"]}), "v1", build
+        )
+        return first, second, plain, revalidated
+
+    first, second, plain, revalidated = asyncio.run(scenario())
+    assert builds == [1]
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert first.body is second.body
+    assert gzip.decompress(first.body) == plain.body
+    assert first.headers["X-Total-Count"] == "200"
+    assert first.headers["Cache-Control"].startswith("public, max-age=")
+    assert revalidated.status_code == 304 and revalidated.body == b""
+    assert cache.stats()["not_modified"] == 1
+
+
+def test_diseases_conditional_get(monkeypatch):
+    async def mock_get_diseases_from_wikidata():
+        return [{"id": "D1", "name": "flu"}]
+
+    monkeypatch.setattr("backend.main.get_diseases_from_wikidata", mock_get_diseases_from_wikidata)
+    monkeypatch.setattr(disease_store, "table", None)
+
+    response = client.get("/api/diseases")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    cached = client.get("/api/diseases", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    # Інша сторінка — інший ETag
+    assert client.get("/api/diseases", params={"limit": 1}).headers["ETag"] != etag
+
+
+def test_drug_disease_rows_revalidated_without_reading_graph(sparql_stub, sparql_cache, monkeypatch):
+    sparql_stub.payload = {"results": {"bindings": [
+        {"item": {"value": "d1"}, "itemLabel": {"value": "Disease"}, "rgb": {"value": "FFA500"}},
+    ]}}
+
+    response = client.get("/api/drug-disease")
+    assert response.json()[0]["label"] == "Disease"
+    etag = response.headers["ETag"]
+
+    # Версія береться з метаданих кешу: значення не читається, до WDQS теж не звертаємось
+    def fail(key):
+        raise AssertionError("value read")
+
+    monkeypatch.setattr(sparql_cache, "get", fail)
+    cached = client.get("/api/drug-disease", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert sparql_stub.hits == 1
@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+from backend import sparql_queries
+from backend.local_store import LocalStore
+from backend.scripts import ingest_wikidata
+
+
+def hospital_binding(i):
+    return {
+        "hospital": {"value": f"http://www.wikidata.org/entity/Q{i}"},
+        "hospitalLabel": {"value": f"Hospital {i}"},
+        "geo": {"value": f"Point({30 + i / 100} 50)"},
+    }
+
+
+def paged_payload(total):
+    # Відповідає на OFFSET/LIMIT так, як це зробив би WDQS
+    def respond(query):
+        limit = int(query.split("LIMIT")[1].split()[0])
+        offset = int(query.split("OFFSET")[1].split()[0])
+        rows = [hospital_binding(i) for i in range(total)][offset:offset + limit]
+        return {"results": {"bindings": rows}}
+    return respond
+
+
+def test_paged_ingestion_and_serving_from_store(sparql_stub, tmp_path, monkeypatch):
+    sparql_stub.payload = paged_payload(5)
+    store = LocalStore(str(tmp_path / "store.sqlite3"))
+
+    asyncio.run(ingest_wikidata.ingest(store, datasets=["hospitals"], countries=["Q212"], page_size=2))
+
+    assert sparql_stub.hits == 3
+    # Порядок однозначний: сортування за всіма змінними вибірки, а не лише за сутністю
+    assert all("ORDER BY ?hospital ?hospitalLabel ?geo ?hospitalDescription" in q for q in sparql_stub.queries)
+    assert "dateModified" not in sparql_stub.queries[0]
+    assert store.count("hospitals", "Q212") == 5
+
+    # API читає з локального сховища і більше не звертається до WDQS
+    monkeypatch.setattr(sparql_queries, "local_store", store)
+    hospitals = asyncio.run(sparql_queries.get_hospitals_from_wikidata("Q212"))
+    assert [h["id"] for h in hospitals] == [f"Q{i}" for i in range(5)]
+    assert sparql_stub.hits == 3
+
+
+def test_incremental_run_filters_by_modification_date(sparql_stub, tmp_path):
+    store = LocalStore(str(tmp_path / "store.sqlite3"))
+    sparql_stub.payload = paged_payload(3)
+    asyncio.run(ingest_wikidata.ingest(store, datasets=["hospitals"], countries=["Q212"]))
+
+    changed = hospital_binding(1)
+    changed["hospitalLabel"]["value"] = "Renamed"
+    sparql_stub.payload = {"results": {"bindings": [changed]}}
+    asyncio.run(ingest_wikidata.ingest(store, datasets=["hospitals"], countries=["Q212"]))
+
+    assert "schema:dateModified" in sparql_stub.queries[-1]
+    names = [h["name"] for h in store.load("hospitals", "Q212")]
+    assert sorted(names) == ["Hospital 0", "Hospital 2", "Renamed"]
+
+
+def test_periodic_full_run_drops_deleted_entities(sparql_stub, tmp_path, monkeypatch):
+    store = LocalStore(str(tmp_path / "store.sqlite3"))
+    sparql_stub.payload = paged_payload(3)
+    asyncio.run(ingest_wikidata.ingest(store, datasets=["hospitals"], countries=["Q212"]))
+    assert store.last_run("hospitals", "Q212", full=True) is not None
+
+    # Повний запуск прострочений: інкрементальне вікно не використовується, видалена лікарня зникає
+    monkeypatch.setattr(ingest_wikidata, "FULL_REFRESH_DAYS", 0)
+    sparql_stub.payload = paged_payload(2)
+    asyncio.run(ingest_wikidata.ingest(store, datasets=["hospitals"], countries=["Q212"]))
+
+    assert "dateModified" not in sparql_stub.queries[-1]
+    assert [h["id"] for h in store.load("hospitals", "Q212")] == ["Q0", "Q1"]
+
+
+def test_ingest_from_dump_file(tmp_path, sparql_stub):
+    dump = tmp_path / "graph.json"
+    dump.write_text(json.dumps({"results": {"bindings": [
+        {"item": {"value": "d1"}, "itemLabel": {"value": "Disease"}, "rgb": {"value": "FFA500"}},
+        {"item": {"value": "m1"}, "itemLabel": {"value": "Drug"}, "rgb": {"value": "7FFF00"}, "link": {"value": "d1"}},
+    ]}}), encoding="utf-8")
+    store = LocalStore(str(tmp_path / "store.sqlite3"))
+
+    asyncio.run(ingest_wikidata.ingest(store, datasets=["drug_disease"], dump=str(dump)))
+
+    assert sparql_stub.hits == 0
+    assert [row["label"] for row in store.load("drug_disease")] == ["Disease", "Drug"]
+    assert store.has("drug_disease")
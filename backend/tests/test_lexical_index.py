@@ -0,0 +1,39 @@
+from backend.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+
+
+def make_index():
+    return LexicalIndex([
+        "diabetes type 1 Info: autoimmune disease of the pancreas",
+        "diabetes type 2 Info: insulin resistance and high blood sugar",
+        "hypertension Info: high blood pressure",
+        "Acne Info: skin disease with pimples",
+    ])
+
+
+def test_tokenize():
+    assert tokenize("High-blood, Pressure!") == ["high", "blood", "pressure"]
+
+
+def test_exact_and_prefix_name_matches():
+    index = make_index()
+    assert index.match_names("acne") == ["Acne"]
+    assert index.match_names("  Hypertension ") == ["hypertension"]
+    assert index.match_names("diab") == ["diabetes type 1", "diabetes type 2"]
+    assert index.match_names("diab", limit=1) == ["diabetes type 1"]
+    # Надто короткий префікс і слова не з початку назви не збігаються
+    assert index.match_names("di") == []
+    assert index.match_names("pressure") == []
+
+
+def test_bm25_ranks_rarer_terms_higher():
+    index = make_index()
+    assert index.search("high blood pressure", 2)[0].startswith("hypertension")
+    assert index.search("insulin", 5) == ["diabetes type 2 Info: insulin resistance and high blood sugar"]
+    assert index.search("unknown words", 5) == []
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c"]], k=60)
+    assert fused[0] == "b"
+    assert set(fused) == {"a", "b", "c"}
+    assert reciprocal_rank_fusion([["x", "y"], []]) == ["x", "y"]
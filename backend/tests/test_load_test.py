@@ -0,0 +1,35 @@
+import asyncio
+
+from backend import llm_adviser, sparql_queries
+from backend.main import disease_store, hospital_store, drug_graph_store
+from backend.scripts.load_test import HashEmbeddings, run_in_process
+from backend.scripts.sparql_fixtures import synthesize
+
+
+def test_hash_embeddings_are_deterministic_and_normalized():
+    embeddings = HashEmbeddings(dim=16)
+    first, second = embeddings.embed_documents(["acne on skin", "acne on skin"])
+    assert first == second == embeddings.embed_query("Acne on skin")
+    assert abs(sum(v * v for v in first) - 1.0) < 1e-5
+
+
+def test_load_test_runs_against_fixture_server(tmp_path, monkeypatch):
+    # Ресурси, які підміняє бенчмарк, повертаються після тесту
+    for module, names in ((llm_adviser, ("drug_index", "lexical_index", "db_drugs", "db_version")),
+                          (sparql_queries, ("WIKIDATA_SPARQL_URL", "local_store", "cache"))):
+        for name in names:
+            monkeypatch.setattr(module, name, getattr(module, name))
+    monkeypatch.setattr(disease_store, "table", None)
+    monkeypatch.setattr(hospital_store, "indexes", {})
+    monkeypatch.setattr(drug_graph_store, "graph", None)
+
+    synthesize(str(tmp_path), diseases=40, hospitals=40, graph=10)
+    endpoints = ["/api/chat", "/api/diseases", "/api/hospitals"]
+    results = asyncio.run(run_in_process(endpoints, [1, 4], 8, str(tmp_path)))
+
+    assert [(r["endpoint"], r["concurrency"]) for r in results] == [(e, c) for e in endpoints for c in (1, 4)]
+    for row in results:
+        assert row["requests"] == 8
+        assert row["errors"] == 0
+        assert row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
+        assert row["throughput_rps"] > 0
@@ -0,0 +1,66 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from backend.metrics import Counter, Histogram, Registry, cache_metrics, stage_seconds, timed_function
+from backend.main import app
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(Histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0)))
+    histogram.observe(0.05, "a")
+    histogram.observe(0.5, "a")
+    histogram.observe(5, "a")
+
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="a",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{stage="a"} 3' in text
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("things_total", "Things", ("name",))
+    counter.inc('say "hi"', amount=2)
+    assert counter.render()[-1] == 'things_total{name="say \\"hi\\""} 2'
+
+
+def test_timed_function_records_sync_and_async():
+    @timed_function("test.sync")
+    def work():
+        return 1
+
+    @timed_function("test.async")
+    async def async_work():
+        return 2
+
+    assert work() == 1
+    assert asyncio.run(async_work()) == 2
+    assert stage_seconds._values[("test.sync",)][2] >= 1
+    assert stage_seconds._values[("test.async",)][2] >= 1
+
+
+def test_cache_metrics_hit_ratio():
+    hits, misses, ratio, size = cache_metrics({"results": {"hits": 3, "stale_hits": 1, "misses": 4, "size": 7}})
+    assert hits._values[("results",)] == 4
+    assert ratio._values[("results",)] == 0.5
+    assert size._values[("results",)] == 7
+
+
+def test_metrics_endpoint():
+    client.get("/healthz")
+    client.get("/no-such-route")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/healthz",status="200"}' in text
+    assert 'route="unmatched",status="404"' in text
+    assert "http_requests_in_flight" in text
+    assert 'cache_hit_ratio{cache="sparql"}' in text
+    assert 'chat_retrievals_total{path="hybrid"}' in text
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+
+import backend.vector_store as vs
+from backend.onnx_embeddings import OnnxEmbeddings, mean_pool
+from backend.scripts.export_onnx import cosine_agreement
+
+
+class FakeInput:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeSession:
+    # Ембедінг токена — one-hot його id, тож середнє легко порахувати вручну
+    def __init__(self, dim=4):
+        self.dim = dim
+        self.calls = []
+
+    def get_inputs(self):
+        return [FakeInput("input_ids"), FakeInput("attention_mask")]
+
+    def run(self, outputs, inputs):
+        self.calls.append(inputs)
+        return [np.eye(self.dim, dtype=np.float32)[inputs["input_ids"]]]
+
+
+def make_tokenizer():
+    tokenizer = Tokenizer(WordLevel({"[PAD]": 0, "fever": 1, "cough": 2, "rash": 3}, unk_token="[PAD]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+    return tokenizer
+
+
+def test_mean_pool_ignores_padding_and_normalizes():
+    tokens = np.array([[[1.0, 0.0], [0.0, 1.0], [9.0, 9.0]]], dtype=np.float32)
+    pooled = mean_pool(tokens, np.array([[1, 1, 0]]))
+    assert np.allclose(pooled, [[np.sqrt(0.5), np.sqrt(0.5)]])
+
+
+def test_onnx_embeddings_batches_and_feeds_only_model_inputs():
+    session = FakeSession()
+    model = OnnxEmbeddings(session, make_tokenizer(), batch_size=2)
+
+    vectors = model.embed_documents(["fever", "fever cough", "rash"])
+
+    assert len(session.calls) == 2
+    assert set(session.calls[0]) == {"input_ids", "attention_mask"}
+    assert np.allclose(vectors[0], [0, 1, 0, 0])
+    assert np.allclose(vectors[1], [0, np.sqrt(0.5), np.sqrt(0.5), 0])
+    assert np.allclose(model.embed_query("rash"), [0, 0, 0, 1])
+    assert model.embed_documents([]) == []
+
+
+def test_embedding_model_selects_backend(monkeypatch):
+    loaded = []
+    monkeypatch.setattr(OnnxEmbeddings, "load", classmethod(lambda cls, name, quantized: loaded.append(quantized)))
+
+    vs.embedding_model(backend="onnx-int8")
+    assert loaded == [True]
+    with pytest.raises(ValueError):
+        vs.embedding_model(backend="tensorrt")
+
+
+def test_cosine_agreement():
+    stats = cosine_agreement([[1, 0], [0, 1]], [[2, 0], [1, 1]])
+    assert stats["mean"] == pytest.approx((1 + np.sqrt(0.5)) / 2)
+    assert stats["min"] == pytest.approx(np.sqrt(0.5))
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from backend import retriever
+from backend.vector_store import write_meta
+
+
+class FakeEmbeddings:
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_query(self, text):
+        return self.vectors[text]
+
+
+@pytest.fixture
+def fake_db():
+    rng = np.random.default_rng(0)
+    texts = [f"cond{i} Info: description {i}" for i in range(50)]
+    vectors = rng.normal(size=(50, 16)).astype(np.float32)
+    db = MagicMock()
+    db.get.return_value = {"embeddings": vectors, "documents": texts}
+    db.embeddings = FakeEmbeddings({"query": vectors[7] + 0.01})
+    return db
+
+
+def test_top_k_indices_sorted_by_score():
+    scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3], dtype=np.float32)
+    assert list(retriever.top_k_indices(scores, 3)) == [1, 3, 2]
+    assert list(retriever.top_k_indices(scores, 10)) == [1, 3, 2, 4, 0]
+
+
+def test_numpy_retriever_matches_exact_search(fake_db, tmp_path):
+    retriever.export_numpy_index(fake_db, str(tmp_path))
+    exact = retriever.NumpyRetriever.load(fake_db.embeddings, str(tmp_path))
+    int8 = retriever.NumpyRetriever.load(fake_db.embeddings, str(tmp_path), quantize=True)
+
+    assert isinstance(exact.vectors, np.memmap)
+    docs = exact.similarity_search("query", k=5)
+    assert docs[0].page_content == "cond7 Info: description 7"
+
+    matrix = retriever.normalize(fake_db.get.return_value["embeddings"])
+    query = retriever.normalize(fake_db.embeddings.embed_query("query"))
+    expected = np.argsort(-(matrix @ query))[:5]
+    indices, _ = exact.search_by_vector(query, k=5)
+    assert list(indices) == list(expected)
+
+    int8_indices, _ = int8.search_by_vector(query, k=5)
+    assert int8_indices[0] == 7
+    assert len(set(int8_indices) & set(expected)) >= 4
+
+
+def test_batch_search_matches_single_queries(fake_db, tmp_path):
+    retriever.export_numpy_index(fake_db, str(tmp_path))
+    queries = np.random.default_rng(1).normal(size=(6, 16)).astype(np.float32)
+    for quantize in (False, True):
+        index = retriever.NumpyRetriever.load(fake_db.embeddings, str(tmp_path), quantize=quantize)
+        indices, scores = index.search_by_vectors(queries, k=4)
+        assert indices.shape == (6, 4)
+        for row, query in enumerate(queries):
+            single, single_scores = index.search_by_vector(query, k=4)
+            assert list(indices[row]) == list(single)
+            assert np.allclose(scores[row], single_scores, atol=1e-5)
+
+    docs = index.similarity_search_by_vectors(queries[:2], k=3)
+    assert [len(row) for row in docs] == [3, 3]
+    assert retriever.top_k_rows(np.array([[0.1, 0.9, 0.5]]), 5).tolist() == [[1, 2, 0]]
+
+
+def test_open_numpy_index_reexports_on_version_change(fake_db, tmp_path):
+    chroma_dir, numpy_dir = str(tmp_path / "chroma"), str(tmp_path / "numpy")
+    write_meta({"version": "v1"}, chroma_dir)
+
+    retriever.open_numpy_index(fake_db, numpy_dir, chroma_dir)
+    retriever.open_numpy_index(fake_db, numpy_dir, chroma_dir)
+    assert fake_db.get.call_count == 1
+
+    write_meta({"version": "v2"}, chroma_dir)
+    retriever.open_numpy_index(fake_db, numpy_dir, chroma_dir)
+    assert fake_db.get.call_count == 2
+
+
+def test_open_retriever_backends(fake_db):
+    assert retriever.open_retriever(fake_db, "chroma") is fake_db
+    with pytest.raises(ValueError):
+        retriever.open_retriever(fake_db, "faiss")
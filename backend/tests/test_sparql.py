@@ -1,16 +1,13 @@
 
 from backend.sparql_queries import get_drug_illness_graph, get_hospitals_from_wikidata, get_diseases_from_wikidata
+import asyncio
 import pytest
-from unittest.mock import patch, Mock
-import requests
 from backend import sparql_queries
 
-@patch("backend.sparql_queries.requests.get")
-def test_get_diseases_success(mock_get):
+
+def test_get_diseases_success(sparql_stub):
     # Імітуємо успішну відповідь з JSON
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {
+    sparql_stub.payload = {
         "results": {
             "bindings": [
                 {
@@ -29,9 +26,8 @@ def test_get_diseases_success(mock_get):
             ]
         }
     }
-    mock_get.return_value = mock_response
 
-    result = get_diseases_from_wikidata()
+    result = asyncio.run(get_diseases_from_wikidata())
     assert len(result) == 1
     disease = result[0]
     assert disease["name"] == "Test Disease"
@@ -39,37 +35,28 @@ def test_get_diseases_success(mock_get):
     assert "Cause1" in disease["causes"]
     assert "Symptom1" in disease["symptoms"]
 
-@patch("backend.sparql_queries.requests.get")
-def test_get_diseases_http_error(mock_get):
-    mock_response = Mock()
-    mock_response.status_code = 500
-    mock_response.text = "Internal Server Error"
-    mock_get.return_value = mock_response
+def test_get_diseases_http_error(sparql_stub, monkeypatch):
+    monkeypatch.setattr(sparql_queries.client, "max_retries", 0)
+    sparql_stub.status = 500
+    sparql_stub.payload = "Internal Server Error"
 
     with pytest.raises(Exception) as excinfo:
-        get_diseases_from_wikidata()
+        asyncio.run(get_diseases_from_wikidata())
     assert "Error 500" in str(excinfo.value)
 
-@patch("backend.sparql_queries.requests.get")
-def test_get_diseases_json_decode_error(mock_get):
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.json.side_effect = requests.exceptions.JSONDecodeError("msg", "doc", 0)
-    mock_get.return_value = mock_response
+def test_get_diseases_json_decode_error(sparql_stub):
+    sparql_stub.raw_body = b""
 
     with pytest.raises(Exception) as excinfo:
-        get_diseases_from_wikidata()
+        asyncio.run(get_diseases_from_wikidata())
     assert "Ошибка декодирования JSON" in str(excinfo.value)
 
 
 # --- Тести для get_hospitals_from_wikidata ---
 
-@patch("backend.sparql_queries.SPARQLWrapper.query")
-@patch("backend.sparql_queries.SPARQLWrapper.setQuery")
-@patch("backend.sparql_queries.SPARQLWrapper.setReturnFormat")
-def test_get_hospitals_parsing(mock_setReturnFormat, mock_setQuery, mock_query):
+def test_get_hospitals_parsing(sparql_stub):
     # Імітуємо результат SPARQL-запиту
-    mock_query.return_value.convert.return_value = {
+    sparql_stub.payload = {
         "results": {
             "bindings": [
                 {
@@ -86,21 +73,19 @@ def test_get_hospitals_parsing(mock_setReturnFormat, mock_setQuery, mock_query):
         }
     }
 
-    hospitals = get_hospitals_from_wikidata("US")
+    hospitals = asyncio.run(get_hospitals_from_wikidata("US"))
     assert len(hospitals) == 1
     h = hospitals[0]
     assert h["name"] == "Test Hospital"
     assert abs(h["latitude"] - 20.0) < 0.0001
     assert abs(h["longitude"] - 10.0) < 0.0001
     assert h["image"].startswith("https://commons.wikimedia.org/wiki/Special:FilePath/")
+    assert "wd:US" in sparql_stub.queries[0]
 
 # --- Тести для get_drug_illness_graph ---
 
-@patch("backend.sparql_queries.SPARQLWrapper.query")
-@patch("backend.sparql_queries.SPARQLWrapper.setQuery")
-@patch("backend.sparql_queries.SPARQLWrapper.setReturnFormat")
-def test_get_drug_illness_graph_parsing(mock_setReturnFormat, mock_setQuery, mock_query):
-    mock_query.return_value.convert.return_value = {
+def test_get_drug_illness_graph_parsing(sparql_stub):
+    sparql_stub.payload = {
         "results": {
             "bindings": [
                 {
@@ -119,10 +104,10 @@ def test_get_drug_illness_graph_parsing(mock_setReturnFormat, mock_setQuery, moc
         }
     }
 
-    data = get_drug_illness_graph()
+    data = asyncio.run(get_drug_illness_graph())
     assert len(data) == 2
     assert data[0]["label"] == "Disease1"
     assert data[0]["color"] == "FFA500"
     assert data[0]["link"] == "http://link.org/disease1"
     assert data[1]["label"] == "Drug1"
-    assert data[1]["link"] == ""
\ No newline at end of file
+    assert data[1]["link"] == ""
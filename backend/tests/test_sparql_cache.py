@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+from backend import sparql_queries
+from backend.sparql_cache import SparqlCache, cache_key
+
+HOSPITAL_BINDINGS = {
+    "results": {
+        "bindings": [
+            {
+                "hospital": {"value": "http://www.wikidata.org/entity/Q456"},
+                "hospitalLabel": {"value": "Test Hospital"},
+                "geo": {"value": "Point(10 20)"},
+            }
+        ]
+    }
+}
+
+
+def test_cache_key_depends_on_query_and_params():
+    assert cache_key("q") == cache_key("q")
+    assert cache_key("q", country="Q30") != cache_key("q", country="Q40")
+    assert cache_key("q1") != cache_key("q2")
+
+
+def test_hospitals_served_from_cache(sparql_stub, sparql_cache):
+    sparql_stub.payload = HOSPITAL_BINDINGS
+
+    first = asyncio.run(sparql_queries.get_hospitals_from_wikidata("Q30"))
+    second = asyncio.run(sparql_queries.get_hospitals_from_wikidata("Q30"))
+
+    assert first == second
+    assert first[0]["name"] == "Test Hospital"
+    assert sparql_stub.hits == 1
+    assert sparql_cache.stats() == {"hits": 1, "stale_hits": 0, "misses": 1}
+
+    asyncio.run(sparql_queries.get_hospitals_from_wikidata("Q40"))
+    assert sparql_stub.hits == 2
+
+
+def test_cache_persists_on_disk(sparql_stub, sparql_cache):
+    sparql_stub.payload = HOSPITAL_BINDINGS
+    asyncio.run(sparql_queries.get_hospitals_from_wikidata("Q30"))
+
+    reopened = SparqlCache(sparql_cache.path)
+    key = cache_key(sparql_stub.queries[0], country="Q30")
+    value, _ = reopened.get(key)
+    assert value[0]["name"] == "Test Hospital"
+
+
+def test_stale_response_is_served_while_refreshing(tmp_path):
+    cache = SparqlCache(str(tmp_path / "cache.sqlite3"), ttl=60, max_stale=3600)
+    cache.set("k", "old", created=time.time() - 120)
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "new"
+
+    async def scenario():
+        assert await cache.get_or_fetch("k", fetch) == "old"
+        assert cache.stats()["stale_hits"] == 1
+        # Приєднується до фонового оновлення в польоті, а не запускає нове
+        assert await cache._begin("k", fetch) == "new"
+
+    asyncio.run(scenario())
+    assert cache.get("k")[0] == "new"
+
+
+def test_expired_beyond_max_stale_is_a_miss(tmp_path):
+    cache = SparqlCache(str(tmp_path / "cache.sqlite3"), ttl=60, max_stale=60)
+    cache.set("k", "old", created=time.time() - 600)
+
+    async def fetch():
+        return "new"
+
+    assert asyncio.run(cache.get_or_fetch("k", fetch)) == "new"
+
+
+def test_concurrent_misses_trigger_single_upstream_request(sparql_stub):
+    sparql_stub.payload = HOSPITAL_BINDINGS
+    sparql_stub.delay = 0.2
+
+    async def scenario():
+        return await asyncio.gather(*(sparql_queries.get_hospitals_from_wikidata("Q183") for _ in range(8)))
+
+    results = asyncio.run(scenario())
+    assert len(results) == 8
+    assert sparql_stub.hits == 1
+
+
+def test_iterator_is_stored_row_by_row(tmp_path):
+    cache = SparqlCache(str(tmp_path / "cache.sqlite3"))
+    produced = []
+
+    def records():
+        for i in range(5):
+            produced.append(i)
+            yield {"id": i}
+
+    async def fetch():
+        return records()
+
+    assert asyncio.run(cache.get_or_fetch("k", fetch)) == [{"id": i} for i in range(5)]
+    assert produced == [0, 1, 2, 3, 4]
+    rows = cache._connection().execute("SELECT COUNT(*) FROM entry_rows WHERE key = 'k'").fetchone()[0]
+    assert rows == 5
+
+    # Версія однакова для однакового вмісту, незалежно від того, список це чи ітератор
+    other = SparqlCache(str(tmp_path / "other.sqlite3"))
+    other.set("k", [{"id": i} for i in range(5)])
+    assert other.meta("k")[1] == cache.meta("k")[1]
+    cache.set("s", "scalar")
+    assert cache.get("s")[0] == "scalar"
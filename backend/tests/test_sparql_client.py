@@ -0,0 +1,287 @@
+import asyncio
+import httpx
+import pytest
+
+from backend.sparql_client import (
+    SparqlClient, SparqlError, SparqlOverloaded, AdmissionQueue, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE,
+    background_priority, retry_after_seconds,
+)
+
+
+def make_client(handler, **kwargs):
+    kwargs.setdefault("backoff", 0.01)
+    return SparqlClient(transport=httpx.MockTransport(handler), **kwargs)
+
+
+def test_retries_on_429_and_honours_retry_after(monkeypatch):
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "2"}),
+        httpx.Response(503),
+        httpx.Response(200, json={"results": {"bindings": []}}),
+    ]
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr("backend.sparql_client.asyncio.sleep", fake_sleep)
+    client = make_client(lambda request: responses.pop(0), backoff=0.5)
+
+    result = asyncio.run(client.query("http://wdqs.test/sparql", "SELECT 1"))
+
+    assert result == {"results": {"bindings": []}}
+    assert sleeps == [2.0, 1.0]
+
+
+def test_gives_up_after_max_retries():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500, text="boom")
+
+    client = make_client(handler, max_retries=2)
+    with pytest.raises(SparqlError) as excinfo:
+        asyncio.run(client.query("http://wdqs.test/sparql", "SELECT 1"))
+    assert "Error 500" in str(excinfo.value)
+    assert len(calls) == 3
+
+
+def test_does_not_retry_client_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, text="bad query")
+
+    with pytest.raises(SparqlError):
+        asyncio.run(make_client(handler).query("http://wdqs.test/sparql", "SELECT"))
+    assert len(calls) == 1
+
+
+def test_concurrency_is_bounded():
+    active, peak = [0], [0]
+
+    async def handler(request):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.02)
+        active[0] -= 1
+        return httpx.Response(200, json={})
+
+    client = make_client(handler, max_concurrency=2)
+
+    async def scenario():
+        await asyncio.gather(*(client.query("http://wdqs.test/sparql", f"q{i}") for i in range(6)))
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert peak[0] == 2
+
+
+def test_backoff_does_not_hold_a_slot():
+    # Єдиний слот: поки перший запит чекає повтору після 429, другий устигає пройти
+    order = []
+
+    async def handler(request):
+        query = request.url.params["query"]
+        order.append(query)
+        if query == "throttled" and order.count("throttled") == 1:
+            return httpx.Response(429)
+        return httpx.Response(200, json={})
+
+    client = make_client(handler, max_concurrency=1, backoff=0.2)
+
+    async def scenario():
+        first = asyncio.ensure_future(client.query("http://wdqs.test/sparql", "throttled"))
+        await asyncio.sleep(0.02)
+        await client.query("http://wdqs.test/sparql", "other")
+        await first
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert order == ["throttled", "other", "throttled"]
+
+
+def test_client_of_previous_loop_is_closed():
+    client = make_client(lambda request: httpx.Response(200, json={}))
+
+    async def use():
+        await client.query("http://wdqs.test/sparql", "SELECT 1")
+        return client._client
+
+    # Цикл ще живий (в іншому потоці) — старий клієнт закривається на ньому
+    import threading
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    old = asyncio.run_coroutine_threadsafe(use(), loop).result()
+
+    asyncio.run(use())
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), loop).result()
+    assert old.is_closed
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_retry_after_parsing():
+    assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "5"})) == 5.0
+    assert retry_after_seconds(httpx.Response(429)) is None
+    assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "garbage"})) is None
+
+
+def test_identical_queries_share_one_request():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, json={"results": {"bindings": []}})
+
+    client = make_client(handler)
+
+    async def scenario():
+        results = await asyncio.gather(*(
+            client.shared("SELECT 1", lambda: client.query("http://wdqs.test/sparql", "SELECT 1")) for _ in range(5)
+        ))
+        await client.aclose()
+        return results
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(result == {"results": {"bindings": []}} for result in results)
+    assert client.stats()["coalesced"] == 4
+
+
+def test_admission_queue_prefers_interactive_and_sheds():
+    order = []
+
+    async def scenario():
+        queue = AdmissionQueue(max_concurrency=1, max_queue=2, expected_seconds=3)
+
+        async def job(name, priority):
+            async with queue.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        first = asyncio.create_task(job("first", PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        background = asyncio.create_task(job("background", PRIORITY_BACKGROUND))
+        interactive = asyncio.create_task(job("interactive", PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+
+        with pytest.raises(SparqlOverloaded) as excinfo:
+            await job("shed", PRIORITY_INTERACTIVE)
+        # Попереду один запит у роботі і два в черзі: три "хвилі" по 3 секунди
+        assert excinfo.value.retry_after == 9
+
+        await asyncio.gather(first, background, interactive)
+        return queue.stats()
+
+    stats = asyncio.run(scenario())
+    assert order == ["first", "interactive", "background"]
+    assert stats == {"active": 0, "queued": 0, "shed": 1}
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def scenario():
+        queue = AdmissionQueue(max_concurrency=1, max_queue=4)
+        release = asyncio.Event()
+
+        async def holder():
+            async with queue.slot():
+                await release.wait()
+
+        async def waiter():
+            async with queue.slot():
+                pass
+
+        held = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(waiter())
+        await asyncio.sleep(0)
+        assert queue.stats()["queued"] == 1
+
+        waiting.cancel()
+        await asyncio.sleep(0)
+        assert queue.stats()["queued"] == 0
+        release.set()
+        await held
+        return queue.stats()
+
+    assert asyncio.run(scenario())["active"] == 0
+
+
+def test_interactive_caller_promotes_shared_background_query():
+    # Один слот зайнятий; фонове оновлення і окремий фоновий запит чекають у черзі.
+    # Інтерактивний запит, що приєднався до оновлення, піднімає його попереду іншого фонового
+    order = []
+    release = asyncio.Event()
+
+    async def handler(request):
+        query = request.url.params["query"]
+        order.append(query)
+        if query == "holder":
+            await release.wait()
+        return httpx.Response(200, json={})
+
+    client = make_client(handler, max_concurrency=1)
+
+    def fetch(query):
+        return lambda: client.query("http://wdqs.test/sparql", query)
+
+    async def scenario():
+        holder = asyncio.ensure_future(client.query("http://wdqs.test/sparql", "holder"))
+        await asyncio.sleep(0.01)
+        with background_priority():
+            other = asyncio.ensure_future(client.query("http://wdqs.test/sparql", "other"))
+            await asyncio.sleep(0)
+            refresh = client.shared("refresh", fetch("refresh"))
+        await asyncio.sleep(0.01)
+        joined = client.shared("refresh", fetch("refresh"))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, other, refresh, joined)
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert order == ["holder", "refresh", "other"]
+    assert client.stats()["coalesced"] == 1
+
+
+def test_average_counts_only_upstream_time(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    responses = [httpx.Response(503), httpx.Response(200, json={})]
+    monkeypatch.setattr("backend.sparql_client.asyncio.sleep", fake_sleep)
+    client = make_client(lambda request: responses.pop(0), backoff=30)
+
+    async def scenario():
+        await client.query("http://wdqs.test/sparql", "SELECT 1")
+        return client._admission.avg_seconds
+
+    # Дві швидкі спроби наближають середнє до нуля; 30-секундна пауза між ними не рахується
+    assert asyncio.run(scenario()) < 5
+    assert sleeps == [30]
+
+
+def test_transport_error_mid_stream_is_a_sparql_error():
+    class BrokenStream(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield b'{"results": {"bindings": [{"a": 1},'
+            raise httpx.ReadError("connection reset")
+
+    client = make_client(lambda request: httpx.Response(200, stream=BrokenStream()))
+
+    async def scenario():
+        received = []
+        with pytest.raises(SparqlError):
+            async for item in client.stream_bindings("http://wdqs.test/sparql", "SELECT"):
+                received.append(item)
+        return received
+
+    assert asyncio.run(scenario()) == [{"a": 1}]
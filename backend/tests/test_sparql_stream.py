@@ -0,0 +1,60 @@
+import json
+import pytest
+
+from backend import sparql_stream
+from backend.sparql_stream import BindingsParser, BindingsParseError
+
+
+def chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_bindings_parsed_incrementally_from_any_chunking():
+    bindings = [
+        {"disease": {"type": "uri", "value": f"http://www.wikidata.org/entity/Q{i}"},
+         "symptomLabel": {"value": "fever, \"high\" ]}"}}
+        for i in range(20)
+    ]
+    text = json.dumps({"head": {"vars": ["disease"]}, "results": {"bindings": bindings}})
+
+    for size in (1, 7, 64, len(text)):
+        parser = BindingsParser()
+        result = []
+        for chunk in chunks(text, size):
+            result.extend(parser.feed(chunk))
+        parser.close()
+        assert result == bindings
+
+
+def test_items_are_yielded_before_the_document_ends():
+    parser = BindingsParser()
+    assert parser.feed('{"head": {}, "results": {"bindings": [{"a": 1}, {"b"') == [{"a": 1}]
+    assert parser.feed(': 2}]}}') == [{"b": 2}]
+    parser.close()
+
+
+def test_truncated_or_empty_response_raises():
+    parser = BindingsParser()
+    parser.feed('{"results": {"bindings": [{"a": 1}')
+    with pytest.raises(BindingsParseError):
+        parser.close()
+
+    with pytest.raises(BindingsParseError):
+        BindingsParser().close()
+
+
+def test_large_element_is_scanned_once(monkeypatch):
+    # Елемент, що приходить сотнями шматків, декодується один раз, коли він уже повний
+    decoded = []
+    monkeypatch.setattr(sparql_stream.json, "loads", lambda text: decoded.append(text) or json.JSONDecoder().decode(text))
+    binding = {"label": {"value": "x" * 5000 + '\\"'}}
+    text = json.dumps({"results": {"bindings": [binding, binding]}})
+
+    parser = BindingsParser()
+    result = []
+    for chunk in chunks(text, 13):
+        result.extend(parser.feed(chunk))
+    parser.close()
+
+    assert result == [binding, binding]
+    assert len(decoded) == 2
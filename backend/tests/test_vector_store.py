@@ -0,0 +1,101 @@
+from unittest.mock import patch, MagicMock
+import backend.vector_store as vs
+
+
+def write_source(tmp_path, text):
+    source = tmp_path / "illness_description.txt"
+    source.write_text(text, encoding="utf-8")
+    return str(source)
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+        self.embedded = 0
+        self.embeddings = "embedding_obj"
+
+    def get(self, include=None):
+        return {"ids": list(self.docs)}
+
+    def add_documents(self, documents, ids):
+        self.embedded += len(documents)
+        self.docs.update(zip(ids, (d.page_content for d in documents)))
+
+    def delete(self, ids):
+        for doc_id in ids:
+            del self.docs[doc_id]
+
+    def delete_collection(self):
+        self.docs.clear()
+
+
+@patch("backend.vector_store.HuggingFaceEmbeddings")
+@patch("backend.vector_store.Chroma")
+def test_open_index_updates_only_when_version_changes(mock_chroma, mock_embeddings, tmp_path):
+    collection = FakeCollection()
+    mock_chroma.return_value = collection
+    source = write_source(tmp_path, "flu Info: a\ncold Info: b\n")
+    directory = str(tmp_path / "db")
+
+    vs.open_index(source, directory)
+    assert sorted(collection.docs.values()) == ["cold Info: b", "flu Info: a"]
+    assert collection.embedded == 2
+    assert vs.read_meta(directory)["version"] == vs.index_version(source)
+
+    # Той самий файл і модель — індекс береться з диска
+    vs.open_index(source, directory)
+    assert collection.embedded == 2
+
+    # Змінений файл — ембедимо лише новий рядок і видаляємо зниклий
+    write_source(tmp_path, "flu Info: a\nasthma Info: c\nflu Info: a\n")
+    vs.open_index(source, directory)
+    assert sorted(collection.docs.values()) == ["asthma Info: c", "flu Info: a"]
+    assert collection.embedded == 3
+
+    # Інша модель — повна перебудова
+    vs.open_index(source, directory, model_name="other-model")
+    assert collection.embedded == 5
+    assert vs.read_meta(directory)["model_name"] == "other-model"
+
+
+def test_sync_documents_uses_batches():
+    collection = FakeCollection()
+    collection.add_documents = MagicMock()
+    documents = [vs.Document(page_content=f"cond{i} Info: x") for i in range(5)]
+
+    added, removed = vs.sync_documents(collection, documents, batch_size=2)
+
+    assert (added, removed) == (5, 0)
+    assert collection.add_documents.call_count == 3
+    first_ids = collection.add_documents.call_args_list[0].kwargs["ids"]
+    assert first_ids == [vs.line_id("cond0 Info: x"), vs.line_id("cond1 Info: x")]
+
+
+@patch("backend.vector_store.HuggingFaceEmbeddings")
+@patch("backend.vector_store.Chroma")
+def test_open_index_uses_persisted_db_without_source(mock_chroma, mock_embeddings, tmp_path):
+    directory = str(tmp_path / "db")
+    vs.write_meta({"version": "abc", "model_name": vs.MODEL_NAME}, directory)
+    mock_chroma.return_value = MagicMock()
+
+    db = vs.open_index(str(tmp_path / "missing.txt"), directory)
+
+    assert db is mock_chroma.return_value
+    mock_chroma.from_documents.assert_not_called()
+
+
+@patch("backend.vector_store.HuggingFaceEmbeddings")
+@patch("backend.vector_store.Chroma")
+def test_open_index_without_source_fails_clearly(mock_chroma, mock_embeddings, tmp_path):
+    import pytest
+
+    directory = str(tmp_path / "db")
+    missing = str(tmp_path / "missing.txt")
+    with pytest.raises(FileNotFoundError, match="missing.txt"):
+        vs.open_index(missing, directory)
+
+    # Збережений індекс іншої моделі без вихідного файлу не перебудувати — не віддаємо несумісні вектори
+    vs.write_meta({"version": "abc", "model_name": "other-model"}, directory)
+    with pytest.raises(ValueError, match="other-model"):
+        vs.open_index(missing, directory)
+    mock_chroma.assert_not_called()
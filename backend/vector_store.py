@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+
+from langchain_core.documents import Document
+from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_chroma import Chroma
+
+from backend.column_store import file_hash
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+input_file = os.path.join(project_root, "illness_description.txt")
+db_dir = os.path.join(project_root, "chroma_db")
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+# Рушій ембедінгів: torch (HuggingFaceEmbeddings), onnx або onnx-int8 (onnxruntime, без PyTorch).
+# Вектори ONNX збігаються з torch (перевірка: backend.scripts.export_onnx --verify), тож індекс спільний
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+META_FILE = "index_meta.json"
+BATCH_SIZE = 256
+
+
+def index_version(source_file=input_file, model_name=MODEL_NAME):
+    # Версія індексу залежить і від вмісту файлу, і від моделі ембедінгів
+    return hashlib.sha256(f"{model_name}:{file_hash(source_file)}".encode()).hexdigest()[:16]
+
+
+def read_meta(directory=db_dir):
+    path = os.path.join(directory, META_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_meta(meta, directory=db_dir):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def load_documents(source_file=input_file):
+    # Один рядок файлу — один документ
+    with open(source_file, encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [Document(page_content=line, metadata={"source": source_file}) for line in lines if line]
+
+
+def line_id(text):
+    # Стабільний ID рядка — хеш його вмісту
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def sync_documents(db, documents, batch_size=BATCH_SIZE):
+    wanted = {line_id(doc.page_content): doc for doc in documents}
+    existing = set(db.get(include=[])["ids"])
+
+    added = [doc_id for doc_id in wanted if doc_id not in existing]
+    removed = [doc_id for doc_id in existing if doc_id not in wanted]
+
+    for start in range(0, len(removed), batch_size):
+        db.delete(ids=removed[start:start + batch_size])
+    # Ембедимо лише нові рядки, пачками
+    for start in range(0, len(added), batch_size):
+        batch = added[start:start + batch_size]
+        db.add_documents([wanted[doc_id] for doc_id in batch], ids=batch)
+
+    return len(added), len(removed)
+
+
+def update_index(db, source_file=input_file, directory=db_dir, model_name=MODEL_NAME,
+                 full_rebuild=False, batch_size=BATCH_SIZE):
+    if full_rebuild or read_meta(directory).get("model_name") != model_name:
+        # Вектори іншої моделі несумісні — починаємо з порожньої колекції
+        embeddings = db.embeddings
+        db.delete_collection()
+        db = Chroma(embedding_function=embeddings, persist_directory=directory)
+
+    added, removed = sync_documents(db, load_documents(source_file), batch_size)
+    write_meta({
+        "version": index_version(source_file, model_name),
+        "model_name": model_name,
+        "source_hash": file_hash(source_file),
+    }, directory)
+    return db, added, removed
+
+
+def embedding_model(model_name=MODEL_NAME, backend=None):
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {EMBEDDING_BACKENDS}")
+    if backend == "torch":
+        return HuggingFaceEmbeddings(model_name=model_name)
+    from backend.onnx_embeddings import OnnxEmbeddings
+
+    return OnnxEmbeddings.load(model_name, quantized=backend == "onnx-int8")
+
+
+def open_index(source_file=input_file, directory=db_dir, model_name=MODEL_NAME):
+    meta = read_meta(directory)
+    has_source = os.path.exists(source_file)
+    if not has_source:
+        # Вихідного файлу немає — можна працювати лише зі збереженим індексом тієї ж моделі
+        if not meta:
+            raise FileNotFoundError(
+                f"Вихідний файл не знайдено за шляхом: {source_file}, а збереженого індексу в {directory} немає"
+            )
+        if meta.get("model_name") != model_name:
+            raise ValueError(
+                f"Індекс у {directory} побудовано моделлю {meta.get('model_name')!r}, а не {model_name!r}; "
+                f"без вихідного файлу {source_file} його не перебудувати"
+            )
+
+    embeddings = embedding_model(model_name)
+    db = Chroma(embedding_function=embeddings, persist_directory=directory)
+    if not has_source:
+        return db
+
+    if meta.get("version") != index_version(source_file, model_name):
+        # Індекс відсутній або застарів — оновлюємо лише змінені рядки
+        db, _, _ = update_index(db, source_file, directory, model_name)
+    return db
@@ -0,0 +1,19 @@
+// Розгортає відповідь format=columnar у масив об'єктів.
+// Скалярна колонка — коди в strings (-1 — поля немає), колонка-список — { codes, offsets }
+export function decodeColumnar(payload) {
+  const { strings, columns, length } = payload;
+  const records = Array.from({ length }, () => ({}));
+  for (const [name, column] of Object.entries(columns)) {
+    if (Array.isArray(column)) {
+      column.forEach((code, i) => {
+        if (code !== -1) records[i][name] = strings[code];
+      });
+    } else {
+      const { codes, offsets } = column;
+      for (let i = 0; i < length; i++) {
+        records[i][name] = codes.slice(offsets[i], offsets[i + 1]).map((code) => strings[code]);
+      }
+    }
+  }
+  return records;
+}